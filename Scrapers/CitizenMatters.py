@@ -1,10 +1,12 @@
 import time
-import requests
 from bs4 import BeautifulSoup
 import json
 import hashlib
 import datetime
 
+from http_client import shared_client
+from scraper_metrics import metrics
+
 
 def generate_unique_id(data_dict):
     """Generate unique ID based on content hash"""
@@ -14,84 +16,93 @@ def generate_unique_id(data_dict):
     return f"cm_{timestamp}_{unique_hash[:8]}"
 
 
-def scrapCitizenMatters():
+def parse_articles(html):
+    """Extract the articles listed on one Citizen Matters page"""
+    articles = []
+    soup = BeautifulSoup(html, "html.parser")
+
+    print("Page Title:", soup.title.string if soup.title else "No title found")
+    print("=" * 60)
+
+    # Find the main container holding all articles
+    main_container = soup.find("div", class_="archive-page")
+    if not main_container:
+        print("Main container not found.")
+    else:
+        article_list = main_container.find("div", class_="articles-post-list")
+        if not article_list:
+            print("Article list not found.")
+        else:
+            article_items = article_list.find_all("article", class_="post-list-item")
+
+            for article in article_items:
+                data = {}
+
+                # Title and Link
+                title_tag = article.find("h4", class_="title")
+                a_tag = title_tag.find("a") if title_tag else None
+                data["title"] = a_tag.get_text(strip=True) if a_tag else "No title"
+                data["article_link"] = (
+                    a_tag["href"] if a_tag and a_tag.has_attr("href") else "No link"
+                )
+
+                # Author
+                author_tag = article.find("a", class_="author")
+                data["author"] = (
+                    author_tag.get_text(strip=True) if author_tag else "No author"
+                )
+
+                # Date
+                date_tag = article.find("span", class_="post-date")
+                data["date"] = date_tag.get_text(strip=True) if date_tag else "No date"
+
+                data["type"] = "General News"
+                data["unique_id"] = generate_unique_id(data)
+                data["scraped_at"] = datetime.datetime.now().isoformat()
+
+                articles.append(data)
+
+    return articles
+
+
+def iter_articles(max_pages=5):
     """
-    Scrape articles from Citizen Matters Bengaluru.
+    Scraper plugin: yield each article listed on the first `max_pages`
+    pages of Citizen Matters Bengaluru.
     """
-    all_articles = []
     pageNum = 1
-    while pageNum <= 5:
+    while pageNum <= max_pages:
         url = f"https://citizenmatters.in/city/bengaluru/page/{pageNum}/"
         print(f"Scraping page {pageNum} from {url}")
         headers = {"User-Agent": "Mozilla/5.0 (compatible; ScraperBot/1.0)"}
 
-        response = requests.get(url, headers=headers, verify=False, timeout=30)
+        with metrics.stage("fetch"):
+            response = shared_client.get(url, headers=headers, verify=False)
+        metrics.count("pages_fetched")
 
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            print("Page Title:", soup.title.string if soup.title else "No title found")
-            print("=" * 60)
-
-            articles_data = []
-
-            # Find the main container holding all articles
-            main_container = soup.find("div", class_="archive-page")
-            if not main_container:
-                print("Main container not found.")
-            else:
-                article_list = main_container.find("div", class_="articles-post-list")
-                if not article_list:
-                    print("Article list not found.")
-                else:
-                    article_items = article_list.find_all(
-                        "article", class_="post-list-item"
-                    )
-
-                    for article in article_items:
-                        data = {}
-
-                        # Title and Link
-                        title_tag = article.find("h4", class_="title")
-                        a_tag = title_tag.find("a") if title_tag else None
-                        data["title"] = (
-                            a_tag.get_text(strip=True) if a_tag else "No title"
-                        )
-                        data["article_link"] = (
-                            a_tag["href"]
-                            if a_tag and a_tag.has_attr("href")
-                            else "No link"
-                        )
-
-                        # Author
-                        author_tag = article.find("a", class_="author")
-                        data["author"] = (
-                            author_tag.get_text(strip=True)
-                            if author_tag
-                            else "No author"
-                        )
-
-                        # Date
-                        date_tag = article.find("span", class_="post-date")
-                        data["date"] = (
-                            date_tag.get_text(strip=True) if date_tag else "No date"
-                        )
-
-                        data["type"] = "General News"
-                        data["unique_id"] = generate_unique_id(data)
-                        data["scraped_at"] = datetime.datetime.now().isoformat()
-
-                        articles_data.append(data)
-
-                    all_articles.extend(articles_data)
-
-            # Print results as JSON (for backwards compatibility)
-            print(json.dumps(articles_data, indent=2))
+            metrics.count("bytes", len(response.content))
+            with metrics.stage("parse"):
+                articles = parse_articles(response.text)
+            for data in articles:
+                metrics.count("items_yielded")
+                yield data
+
             time.sleep(2)
             pageNum += 1
 
         else:
             print(f"Failed to retrieve the page, status code: {response.status_code}")
+            metrics.count("fetch_errors")
+            pageNum += 1
+
+
+def scrapCitizenMatters():
+    """
+    Scrape articles from Citizen Matters Bengaluru.
+    """
+    with metrics.run("citizen_matters"):
+        all_articles = list(iter_articles())
 
     # Save all articles to JSON file
     with open("citizen_matters_data.json", "w", encoding="utf-8") as f:
@@ -100,9 +111,9 @@ def scrapCitizenMatters():
     print(
         f"🧾 Scraped {len(all_articles)} articles and saved to 'citizen_matters_data.json'"
     )
+    for host, stats in shared_client.stats().items():
+        print(f"🌐 {host}: {stats}")
 
 
 if __name__ == "__main__":
     scrapCitizenMatters()
-else:
-    print("This script is intended to be run directly, not imported as a module.")
@@ -1,18 +1,55 @@
 import subprocess
+import sys
 import time
-import json
-import hashlib
 import datetime
 import os
 import signal
-import requests
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import queue
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import firebase_admin
 from firebase_admin import credentials, db
 from dotenv import load_dotenv
 
+from fingerprints import SeenFingerprints, fingerprint
+from http_client import shared_client
+from json_logger import log_segments
+from json_stream import iter_json_records
+from scraper_metrics import metrics
+from write_queue import PermanentWriteError, WriteQueue, is_permanent_failure
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Runs in an isolated scraper's process: set its rlimits, then exec the
+# scraper command in place so the limits carry over
+RLIMIT_LAUNCHER = """
+import os, resource, shutil, sys
+cpu_seconds, memory_mb = int(sys.argv[1]), int(sys.argv[2])
+if cpu_seconds:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+if memory_mb:
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+command = sys.argv[3:]
+os.execv(shutil.which(command[0]) or command[0], command)
+"""
+
 load_dotenv()
 
+# Scripts and their output files live next to this module
+SCRAPER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Items per multi-location PATCH, and how many PATCHes run at once
+FIREBASE_BATCH_SIZE = int(os.getenv("FIREBASE_BATCH_SIZE", "200"))
+FIREBASE_BATCH_CONCURRENCY = int(os.getenv("FIREBASE_BATCH_CONCURRENCY", "4"))
+# Longest a streamed record waits in a partial batch before it is stored
+STREAM_FLUSH_SECONDS = float(os.getenv("STREAM_FLUSH_SECONDS", "30"))
+END_OF_STREAM = object()  # a plugin may yield None, so it can't mark the end
+
 print(f"FIREBASE_DATABASE_URL: {os.getenv('FIREBASE_DATABASE_URL')}")
 print(f"FIREBASE_PROJECT_ID: {os.getenv('FIREBASE_PROJECT_ID')}")
 # Also check other relevant ones
@@ -20,10 +57,81 @@ print(f"REDDIT_CLIENT_ID: {os.getenv('REDDIT_CLIENT_ID')}")
 print(f"REDDIT_CLIENT_SECRET: {os.getenv('REDDIT_CLIENT_SECRET')}")
 
 
+def load_plugins():
+    """
+    In-process scraper plugins. Each source is a callable returning an
+    iterator of records for one collection, consumed for at most
+    `time_budget` seconds. Scrapers whose dependencies are missing are
+    skipped.
+    """
+    plugins = []
+
+    try:
+        import btp_scraped_all3
+
+        plugins.append(
+            {
+                "name": "btp",
+                "collection": "btp_traffic_news",
+                "source": btp_scraped_all3.iter_traffic_news,
+                "time_budget": 180,
+            }
+        )
+    except ImportError as e:
+        print(f"⚠️  BTP scraper unavailable: {e}")
+
+    try:
+        import reddit_scraper_enhanced
+
+        plugins.append(
+            {
+                "name": "reddit",
+                "collection": "reddit_reports",
+                "source": partial(
+                    reddit_scraper_enhanced.iter_reports, duration_seconds=240
+                ),
+                "time_budget": 300,
+            }
+        )
+    except ImportError as e:
+        print(f"⚠️  Reddit scraper unavailable: {e}")
+
+    try:
+        import CitizenMatters
+
+        plugins.append(
+            {
+                "name": "citizen_matters",
+                "collection": "citizen_matters_articles",
+                "source": CitizenMatters.iter_articles,
+                "time_budget": 180,
+            }
+        )
+    except ImportError as e:
+        print(f"⚠️  Citizen Matters scraper unavailable: {e}")
+
+    return plugins
+
+
 class CentralScraper:
     def __init__(self):
         self.firebase_database_url = os.getenv("FIREBASE_DATABASE_URL")
         self.firebase_project_id = os.getenv("FIREBASE_PROJECT_ID")
+        self.seen = SeenFingerprints(
+            os.getenv(
+                "SEEN_FINGERPRINTS_PATH",
+                os.path.join(os.path.dirname(__file__), "seen_fingerprints.json"),
+            )
+        )
+        self.session = shared_client
+        # Failed writes wait here and are retried instead of being dropped
+        self.write_queue = WriteQueue(
+            os.getenv(
+                "PENDING_WRITES_PATH",
+                os.path.join(os.path.dirname(__file__), "pending_writes.jsonl"),
+            ),
+            max_attempts=int(os.getenv("PENDING_WRITES_MAX_ATTEMPTS", "50")),
+        )
         self.initialize_firebase()
 
     def initialize_firebase(self):
@@ -37,26 +145,21 @@ class CentralScraper:
             print("🔧 Falling back to REST API")
             self.use_rest_api = True
 
-    def generate_unique_id(self, data_dict):
-        """Generate unique ID based on content hash"""
-        # Create a consistent string representation for hashing
-        content_string = json.dumps(data_dict, sort_keys=True)
-        unique_hash = hashlib.md5(content_string.encode()).hexdigest()
+    def generate_unique_id(self, fp):
+        """
+        Firebase key for a new record: the scrape time keeps keys in
+        insertion order for change feeds, the fingerprint identifies it
+        """
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        return f"{timestamp}_{unique_hash[:8]}"
+        return f"{timestamp}_{fp[:8]}"
 
-    def check_duplicate(self, collection_name, unique_id):
-        """Check if data already exists in Firebase"""
-        if hasattr(self, "use_rest_api") and self.use_rest_api:
-            return self.check_duplicate_rest(collection_name, unique_id)
-
-        try:
-            ref = db.reference(f"{collection_name}/{unique_id}")
-            existing_data = ref.get()
-            return existing_data is not None
-        except Exception as e:
-            print(f"❌ Error checking duplicate: {e}")
-            return False
+    def check_duplicate(self, collection_name, item):
+        """
+        Fingerprint a record and check it against the local seen-set.
+        Returns (fingerprint, is_duplicate) without any network call.
+        """
+        fp = fingerprint(collection_name, item)
+        return fp, fp in self.seen
 
     def store_to_firebase(self, collection_name, data_list):
         """Store data to Firebase Realtime Database with unique IDs"""
@@ -74,17 +177,20 @@ class CentralScraper:
             ref = db.reference(collection_name)
 
             for item in data_list:
-                # Add metadata
-                item["scraped_at"] = datetime.datetime.now().isoformat()
-                item["source_script"] = collection_name
+                # Check for duplicates
+                fp, duplicate = self.check_duplicate(collection_name, item)
+                if not duplicate:
+                    # Add metadata
+                    item["scraped_at"] = datetime.datetime.now().isoformat()
+                    item["source_script"] = collection_name
+                    item["fingerprint"] = fp
 
-                # Generate unique ID
-                unique_id = self.generate_unique_id(item)
-                item["unique_id"] = unique_id
+                    # Generate unique ID
+                    unique_id = self.generate_unique_id(fp)
+                    item["unique_id"] = unique_id
 
-                # Check for duplicates
-                if not self.check_duplicate(collection_name, unique_id):
                     ref.child(unique_id).set(item)
+                    self.seen.add(fp)
                     stored_count += 1
                     print(
                         f"✅ Stored {collection_name}: {item.get('title', item.get('type', 'Unknown'))[:50]}..."
@@ -95,68 +201,173 @@ class CentralScraper:
 
         except Exception as e:
             print(f"❌ Error storing to Firebase: {e}")
+        finally:
+            self.seen.save()
 
         print(
             f"📊 {collection_name}: {stored_count} stored, {duplicate_count} duplicates skipped"
         )
-
-    def check_duplicate_rest(self, collection_name, unique_id):
-        """Check if data already exists using REST API"""
-        try:
-            import requests
-
-            url = f"{self.firebase_database_url}/{collection_name}/{unique_id}.json"
-            response = requests.get(url)
-            return response.status_code == 200 and response.json() is not None
-        except Exception as e:
-            print(f"❌ Error checking duplicate via REST: {e}")
-            return False
+        return {
+            "stored": stored_count,
+            "skipped": duplicate_count,
+            "failed": len(data_list) - stored_count - duplicate_count,
+        }
 
     def store_to_firebase_rest(self, collection_name, data_list):
-        """Store data to Firebase using REST API"""
+        """
+        Store data to Firebase using REST API: new items are written in
+        chunks, each as one multi-location PATCH, with a few chunks in
+        flight at once. Returns the stored, skipped and failed counts.
+        """
+        counts = {"stored": 0, "skipped": 0, "failed": 0, "queued": 0}
         if not data_list:
             print(f"📭 No data to store for {collection_name}")
-            return
-
-        stored_count = 0
-        duplicate_count = 0
+            return counts
 
         try:
-
-            for item in data_list:
-                # Add metadata
-                item["scraped_at"] = datetime.datetime.now().isoformat()
-                item["source_script"] = collection_name
-
-                # Generate unique ID
-                unique_id = self.generate_unique_id(item)
-                item["unique_id"] = unique_id
-
-                # Check for duplicates
-                if not self.check_duplicate_rest(collection_name, unique_id):
-                    url = f"{self.firebase_database_url}/{collection_name}/{unique_id}.json"
-                    response = requests.put(url, json=item, timeout=10)
-
-                    if response.status_code == 200:
-                        stored_count += 1
-                        print(
-                            f"✅ Stored {collection_name}: {item.get('title', item.get('type', 'Unknown'))[:50]}..."
+            with ThreadPoolExecutor(max_workers=FIREBASE_BATCH_CONCURRENCY) as executor:
+                futures = []
+                batch_seen = set()
+                for start in range(0, len(data_list), FIREBASE_BATCH_SIZE):
+                    chunk = data_list[start : start + FIREBASE_BATCH_SIZE]
+                    updates, fingerprints, skipped = {}, [], 0
+
+                    for item in chunk:
+                        # Check for duplicates, including repeats within this batch
+                        fp, duplicate = self.check_duplicate(collection_name, item)
+                        if duplicate or fp in batch_seen:
+                            skipped += 1
+                            continue
+                        batch_seen.add(fp)
+
+                        # Add metadata
+                        item["scraped_at"] = datetime.datetime.now().isoformat()
+                        item["source_script"] = collection_name
+                        item["fingerprint"] = fp
+
+                        # Generate unique ID
+                        unique_id = self.generate_unique_id(fp)
+                        item["unique_id"] = unique_id
+                        updates[unique_id] = item
+                        fingerprints.append(fp)
+
+                    futures.append(
+                        executor.submit(
+                            metrics.propagate(self.patch_chunk),
+                            collection_name,
+                            start // FIREBASE_BATCH_SIZE + 1,
+                            updates,
+                            fingerprints,
+                            skipped,
                         )
-                    else:
-                        print(f"❌ Failed to store item: {response.status_code}")
-                else:
-                    duplicate_count += 1
-                    print(f"⏭️  Skipped duplicate in {collection_name}")
+                    )
+
+                for future in futures:
+                    for key, value in future.result().items():
+                        counts[key] += value
 
         except Exception as e:
             print(f"❌ Error storing to Firebase via REST: {e}")
+        finally:
+            self.seen.save()
 
         print(
-            f"📊 {collection_name}: {stored_count} stored, {duplicate_count} duplicates skipped"
+            f"📊 {collection_name}: {counts['stored']} stored, "
+            f"{counts['skipped']} duplicates skipped, {counts['queued']} queued "
+            f"for retry, {counts['failed']} failed"
         )
+        return counts
+
+    def send_updates(self, collection_name, updates):
+        """
+        Write records with one multi-location PATCH; True if stored. Raises
+        PermanentWriteError for rejections that retrying cannot fix.
+        """
+        url = f"{self.firebase_database_url}/{collection_name}.json"
+        with metrics.stage("firebase_write"):
+            response = self.session.patch(url, json=updates, timeout=30)
+        metrics.count("write_requests")
+        if response.status_code != 200:
+            print(f"❌ Failed to store chunk: {response.status_code}")
+        if is_permanent_failure(response.status_code):
+            raise PermanentWriteError(
+                f"HTTP {response.status_code}: {response.text[:200]}"
+            )
+        return response.status_code == 200
+
+    def patch_chunk(
+        self, collection_name, chunk_number, updates, fingerprints, skipped
+    ):
+        """
+        Write one chunk of new items with a single multi-location PATCH,
+        queueing it for retry if the write fails
+        """
+        counts = {"stored": 0, "skipped": skipped, "failed": 0, "queued": 0}
+        if updates:
+            rejected = None
+            try:
+                stored = self.send_updates(collection_name, updates)
+            except PermanentWriteError as e:
+                stored, rejected = False, str(e)
+            except Exception as e:
+                print(f"❌ Error storing chunk via REST: {e}")
+                stored = False
+
+            if stored:
+                counts["stored"] = len(updates)
+            elif rejected:
+                # Retrying cannot help, so keep it aside rather than queueing
+                try:
+                    self.write_queue.dead_letter(
+                        collection_name, updates, rejected, fingerprints
+                    )
+                except Exception as e:
+                    print(f"❌ Error dead-lettering chunk: {e}")
+                counts["failed"] = len(updates)
+            else:
+                try:
+                    self.write_queue.enqueue(collection_name, updates, fingerprints)
+                    counts["queued"] = len(updates)
+                except Exception as e:
+                    print(f"❌ Error queueing chunk for retry: {e}")
+                    counts["failed"] = len(updates)
+            # Queued items will be written by the retry queue, not rescraped
+            if counts["stored"] or counts["queued"]:
+                for fp in fingerprints:
+                    self.seen.add(fp)
 
-    def run_script_with_timeout(self, script_name, timeout_seconds=180, args=None):
-        """Run a script with timeout (3 minutes)"""
+        print(
+            f"✅ {collection_name} chunk {chunk_number}: {counts['stored']} stored, "
+            f"{counts['skipped']} skipped, {counts['queued']} queued, "
+            f"{counts['failed']} failed"
+        )
+        return counts
+
+    def limited_command(self, command, cpu_seconds=None, memory_mb=None):
+        """
+        Wrap a command so it execs with CPU time and memory caps. The limits
+        are set by a small Python launcher in the child rather than a
+        preexec_fn, which is unsafe when spawning from threads.
+        """
+        if resource is None or not (cpu_seconds or memory_mb):
+            return command
+        return [
+            sys.executable,
+            "-c",
+            RLIMIT_LAUNCHER,
+            str(cpu_seconds or 0),
+            str(memory_mb or 0),
+        ] + command
+
+    def run_script_with_timeout(
+        self,
+        script_name,
+        timeout_seconds=180,
+        args=None,
+        cpu_seconds=None,
+        memory_mb=None,
+    ):
+        """Run a script in its own process with time, CPU and memory limits"""
         if args is None:
             args = []
 
@@ -167,11 +378,13 @@ class CentralScraper:
             # Start the process
             command = ["python", script_name] + args
             process = subprocess.Popen(
-                command,
+                self.limited_command(command, cpu_seconds, memory_mb),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
-                cwd="/home/needl/Downloads/Autopilots/Scrapers",
+                cwd=SCRAPER_DIR,
+                # Own process group, so a timeout also stops any browsers it spawned
+                start_new_session=True,
             )
 
             # Wait for completion or timeout
@@ -182,6 +395,9 @@ class CentralScraper:
                 if process.returncode == 0:
                     print(f"✅ {script_name} completed successfully in {elapsed:.1f}s")
                     return True, stdout, stderr
+                elif process.returncode == -getattr(signal, "SIGXCPU", 0):
+                    print(f"⏰ {script_name} exceeded its {cpu_seconds}s CPU limit")
+                    return False, stdout, stderr or "CPU limit exceeded"
                 else:
                     print(
                         f"❌ {script_name} failed with return code {process.returncode}"
@@ -193,94 +409,335 @@ class CentralScraper:
                 print(
                     f"⏰ {script_name} timed out after {timeout_seconds}s, terminating..."
                 )
-                process.terminate()
+                self.stop_process(process, signal.SIGTERM)
                 try:
-                    process.wait(timeout=5)
+                    process.communicate(timeout=5)
                 except subprocess.TimeoutExpired:
-                    process.kill()
+                    self.stop_process(process, signal.SIGKILL)
+                    process.communicate()
                 return False, "", "Script timed out"
 
         except Exception as e:
             print(f"❌ Error running {script_name}: {e}")
             return False, "", str(e)
 
-    def load_json_data(self, filename):
-        """Load data from JSON file"""
-        filepath = f"/home/needl/Downloads/Autopilots/Scrapers/{filename}"
+    def stop_process(self, process, sig):
+        """Signal a scraper and everything it started"""
         try:
-            if os.path.exists(filepath):
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                print(f"📄 Loaded data from {filename}")
-                return data
+            if os.name == "posix":
+                os.killpg(process.pid, sig)
             else:
-                print(f"❌ File not found: {filename}")
-                return None
-        except Exception as e:
-            print(f"❌ Error loading {filename}: {e}")
-            return None
+                process.kill()
+        except ProcessLookupError:
+            pass
+
+    def data_path(self, filename):
+        """Where the scrapers write their output files"""
+        return os.path.join(SCRAPER_DIR, filename)
+
+    def load_json_data(self, filename, key=None):
+        """
+        Stream records from a scraper's JSON output file one at a time. The
+        file may hold a JSON array, NDJSON, or an object whose `key` member
+        is an array.
+        """
+        filepath = self.data_path(filename)
+        if not os.path.exists(filepath):
+            print(f"❌ File not found: {filename}")
+            return
+        print(f"📄 Streaming data from {filename}")
+        yield from iter_json_records(filepath, key)
+
+    def import_json_file(self, filename, collection_name, key=None):
+        """Stream a scraper's output file through dedup and batching to Firebase"""
+        return self.run_plugin(
+            {
+                "name": filename,
+                "collection": collection_name,
+                "source": partial(self.load_json_data, filename, key),
+                "time_budget": None,
+            }
+        )
+
+    def iter_log_records(self, filename):
+        """Records of a rotating NDJSON log, oldest segment first"""
+        for segment in log_segments(self.data_path(filename)):
+            yield from self.load_json_data(segment)
 
     def process_btp_data(self):
         """Process BTP scraper data"""
-        data = self.load_json_data("btp_combined_data.json")
-        if data and "traffic_news" in data:
-            self.store_to_firebase("btp_traffic_news", data["traffic_news"])
+        self.import_json_file(
+            "btp_combined_data.json", "btp_traffic_news", key="traffic_news"
+        )
 
     def process_reddit_data(self):
-        """Process Reddit scraper data"""
-        data = self.load_json_data("reddit_reports.json")
-        if data and isinstance(data, list):
-            self.store_to_firebase("reddit_reports", data)
+        """Process Reddit scraper data, including log segments rotated away"""
+        self.run_plugin(
+            {
+                "name": "reddit_reports.jsonl",
+                "collection": "reddit_reports",
+                "source": partial(self.iter_log_records, "reddit_reports.jsonl"),
+                "time_budget": None,
+            }
+        )
 
     def process_citizen_matters_data(self):
         """Process Citizen Matters data"""
-        data = self.load_json_data("citizen_matters_data.json")
-        if data and isinstance(data, list):
-            self.store_to_firebase("citizen_matters_articles", data)
+        self.import_json_file("citizen_matters_data.json", "citizen_matters_articles")
+
+    def run_plugin(self, plugin):
+        """Run one plugin, recording its stages and counters as a metrics run"""
+        with metrics.run(plugin["name"]):
+            totals = self.stream_plugin(plugin)
+            metrics.count("records", totals["records"])
+            metrics.count("stored", totals["stored"])
+            metrics.count("duplicates", totals["skipped"])
+            metrics.count("queued_writes", totals["queued"])
+            metrics.count("write_failures", totals["failed"])
+            if totals.get("error"):
+                metrics.set_status("failed")
+        return totals
+
+    def pull_records(self, source, records, stop):
+        """
+        Producer for stream_plugin: iterate a plugin's source on this thread,
+        handing records over through `records` until the source ends or
+        `stop` is set. Ends with END_OF_STREAM, or with the exception raised.
+        """
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    records.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        iterator = None
+        try:
+            iterator = iter(source())
+            while not stop.is_set():
+                # Time spent inside the scraper itself (fetch, render, parse)
+                with metrics.stage("scrape"):
+                    record = next(iterator, END_OF_STREAM)
+                if not put(record) or record is END_OF_STREAM:
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            # A generator can only be closed from the thread running it
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def stream_plugin(self, plugin):
+        """
+        Stream one plugin's records through dedup and batching straight to
+        storage. The source runs on its own thread so the time budget and
+        the flush age are checked on a timer: a batch is written once it is
+        full or its oldest record has waited STREAM_FLUSH_SECONDS, and the
+        source is abandoned when its time budget (if any) runs out, even if
+        it is blocked.
+        """
+        name, collection = plugin["name"], plugin["collection"]
+        totals = {"records": 0, "stored": 0, "skipped": 0, "failed": 0, "queued": 0}
+        budget = plugin["time_budget"]
+        print(f"🚀 Starting {name}" + (f" (time budget: {budget}s)" if budget else ""))
+        start = time.time()
+        deadline = start + budget if budget else None
+        batch, batch_started = [], None
+
+        def flush():
+            with metrics.stage("store"):
+                counts = self.store_to_firebase(collection, batch) or {}
+            for key, value in counts.items():
+                totals[key] += value
+            batch.clear()
+
+        records = queue.Queue(maxsize=2 * FIREBASE_BATCH_SIZE)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=metrics.propagate(self.pull_records),
+            args=(plugin["source"], records, stop),
+            name=f"scrape-{name}",
+            daemon=True,
+        )
+        producer.start()
+        try:
+            while True:
+                now = time.time()
+                wakeups = [deadline] if deadline is not None else []
+                if batch_started is not None:
+                    wakeups.append(batch_started + STREAM_FLUSH_SECONDS)
+                timeout = max(0, min(wakeups) - now) if wakeups else None
+                try:
+                    record = records.get(timeout=timeout)
+                except queue.Empty:
+                    record = None
+                else:
+                    if record is END_OF_STREAM:
+                        break
+                    if isinstance(record, Exception):
+                        raise record
+                    totals["records"] += 1
+                    batch.append(record)
+                    batch_started = batch_started or time.time()
+
+                if batch and (
+                    len(batch) >= FIREBASE_BATCH_SIZE
+                    or time.time() - batch_started >= STREAM_FLUSH_SECONDS
+                ):
+                    flush()
+                    batch_started = None
+                if deadline is not None and time.time() >= deadline:
+                    print(f"⏰ {name} used its {budget}s, stopping")
+                    break
+        except Exception as e:
+            print(f"❌ Error running {name}: {e}")
+            totals["error"] = str(e)
+        finally:
+            stop.set()
+            # Keep whatever the source handed over before it was stopped
+            while True:
+                try:
+                    record = records.get_nowait()
+                except queue.Empty:
+                    break
+                if record is not END_OF_STREAM and not isinstance(record, Exception):
+                    totals["records"] += 1
+                    batch.append(record)
+            if batch:
+                flush()
+            producer.join(timeout=5)
+            if producer.is_alive():
+                print(f"⚠️  {name} is still blocked in its source, abandoning it")
+
+        totals["elapsed_s"] = round(time.time() - start, 1)
+        print(f"✅ {name} finished: {totals}")
+        return totals
+
+    def retry_pending_writes(self):
+        """Write anything left in the retry queue by earlier runs"""
+        delivered, remaining = self.write_queue.drain(self.send_updates)
+        if remaining:
+            print(f"📥 {remaining} queued writes still pending")
+        return delivered, remaining
 
     def run_all_scrapers(self):
-        """Run all scrapers sequentially with timeouts"""
+        """
+        Run every scraper plugin in this process, concurrently, streaming
+        each one's records to Firebase as they are scraped
+        """
         print("🎯 Starting Central Scraper Orchestrator")
         print("=" * 60)
+        cycle_start = time.time()
+
+        self.retry_pending_writes()
+
+        plugins = load_plugins()
+        results = {}
+        if plugins:
+            with ThreadPoolExecutor(max_workers=len(plugins)) as executor:
+                futures = {
+                    executor.submit(self.run_plugin, plugin): plugin["name"]
+                    for plugin in plugins
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+
+        print(f"\n🎉 All scrapers completed in {time.time() - cycle_start:.1f}s!")
+        for name, totals in results.items():
+            print(f"📊 {name}: {totals}")
+        for host, stats in self.session.stats().items():
+            print(f"🌐 {host}: {stats}")
+        print("=" * 60)
+        return results
+
+    def run_all_scrapers_isolated(self):
+        """
+        Run all scrapers in parallel worker processes, each with its own
+        time, CPU and memory limits, and process each scraper's data as soon
+        as it finishes
+        """
+        print("🎯 Starting Central Scraper Orchestrator")
+        print("=" * 60)
+        cycle_start = time.time()
 
-        # Script configurations: (script_name, timeout_seconds, processor_function, args)
+        # Script configurations: wall-clock timeout, CPU seconds and memory
+        # cap (MB of address space) per scraper. The BTP scraper drives
+        # Chrome, which reserves far more address space than it uses, so it
+        # is only bounded by time and CPU.
         scrapers = [
-            ("btp_scraped_all3.py", 180, self.process_btp_data, []),
-            (
-                "reddit_scraper_enhanced.py",
-                300,
-                self.process_reddit_data,
-                [],
-            ),
-            ("CitizenMatters.py", 180, self.process_citizen_matters_data, []),
+            {
+                "script": "btp_scraped_all3.py",
+                "timeout": 180,
+                "cpu_seconds": 150,
+                "memory_mb": None,
+                "processor": self.process_btp_data,
+                "args": [],
+            },
+            {
+                "script": "reddit_scraper_enhanced.py",
+                "timeout": 300,
+                "cpu_seconds": 120,
+                "memory_mb": 1024,
+                "processor": self.process_reddit_data,
+                # Follows the stream until stopped, so give it a duration
+                # that ends it (and exports its log) before the timeout
+                "args": ["--duration", "240"],
+            },
+            {
+                "script": "CitizenMatters.py",
+                "timeout": 180,
+                "cpu_seconds": 120,
+                "memory_mb": 1024,
+                "processor": self.process_citizen_matters_data,
+                "args": [],
+            },
         ]
 
-        for script_name, timeout, processor, args in scrapers:
-            print(f"\n🔄 Running {script_name}...")
-            success, stdout, stderr = self.run_script_with_timeout(
-                script_name, timeout, args
-            )
-
-            if success:
-                # Process the data after script completion
-                try:
-                    print(f"🔄 Processing data from {script_name}...")
-                    processor()
-                except Exception as e:
-                    print(f"❌ Error processing data from {script_name}: {e}")
-            else:
-                print(f"⚠️  {script_name} did not complete successfully")
-                if stderr:
-                    print(
-                        f"Error details: {stderr[:500]}..."
-                    )  # Show first 500 chars of error
-
-            print(f"⏱️  Waiting 10 seconds before next scraper...")
-            time.sleep(10)
+        # One thread per scraper just waits on its subprocess
+        with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
+            futures = {
+                executor.submit(
+                    self.run_script_with_timeout,
+                    scraper["script"],
+                    scraper["timeout"],
+                    scraper["args"],
+                    scraper["cpu_seconds"],
+                    scraper["memory_mb"],
+                ): scraper
+                for scraper in scrapers
+            }
+
+            for future in as_completed(futures):
+                scraper = futures[future]
+                success, stdout, stderr = future.result()
+                self.handle_scraper_result(
+                    scraper["script"], scraper["processor"], success, stderr
+                )
 
-        print("\n🎉 All scrapers completed!")
+        print(f"\n🎉 All scrapers completed in {time.time() - cycle_start:.1f}s!")
+        for host, stats in self.session.stats().items():
+            print(f"🌐 {host}: {stats}")
         print("=" * 60)
 
+    def handle_scraper_result(self, script_name, processor, success, stderr):
+        """Store a finished scraper's data, or report why it failed"""
+        if success:
+            # Process the data after script completion
+            try:
+                print(f"🔄 Processing data from {script_name}...")
+                processor()
+            except Exception as e:
+                print(f"❌ Error processing data from {script_name}: {e}")
+        else:
+            print(f"⚠️  {script_name} did not complete successfully")
+            if stderr:
+                print(
+                    f"Error details: {stderr[:500]}..."
+                )  # Show first 500 chars of error
+
 
 if __name__ == "__main__":
     print("🎯 Central Scraper Orchestrator")
@@ -302,4 +759,8 @@ if __name__ == "__main__":
 
     print("✅ Environment configuration looks good!")
     scraper = CentralScraper()
-    scraper.run_all_scrapers()
+    if "--isolated" in sys.argv:
+        # Separate processes with CPU/memory caps, exchanging data via files
+        scraper.run_all_scrapers_isolated()
+    else:
+        scraper.run_all_scrapers()
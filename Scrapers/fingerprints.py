@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from atomic_io import atomic_write
+
+# Fields that identify a record at its source, per collection. The first
+# group whose fields are all present is used.
+IDENTITY_FIELDS = {
+    "btp_traffic_news": [["link"], ["title", "date"]],
+    "reddit_reports": [["post_id", "comment_url"], ["post_id", "post_url"]],
+    "citizen_matters_articles": [["article_link"], ["title", "date"]],
+}
+# Used for collections without identity fields, or records missing them
+FALLBACK_FIELDS = ["link", "url", "title", "date", "description"]
+# Stand-ins scrapers write for values they could not find (e.g. CitizenMatters'
+# "No link"); they identify nothing, so they count as missing
+PLACEHOLDER_VALUES = {"no title", "no link", "no author", "no date", "n/a", "none"}
+# Set per scrape or per log write, so never part of a record's identity
+VOLATILE_FIELDS = {"scraped_at", "logged_at", "unique_id"}
+
+
+def normalize(value):
+    """Case-fold and collapse whitespace so cosmetic changes hash the same"""
+    return re.sub(r"\s+", " ", str(value)).strip().casefold()
+
+
+def identity_value(item, field):
+    """Normalized value of a field, or None if it is missing or a placeholder"""
+    value = item.get(field)
+    if not value:
+        return None
+    value = normalize(value)
+    return None if value in PLACEHOLDER_VALUES else value
+
+
+def fingerprint(collection_name, item):
+    """
+    Stable fingerprint of a scraped record, computed only from the fields
+    that identify it at its source, so the same article or comment gets the
+    same fingerprint on every run
+    """
+    fields = FALLBACK_FIELDS
+    for group in IDENTITY_FIELDS.get(collection_name, []):
+        if all(identity_value(item, field) for field in group):
+            fields = group
+            break
+
+    identity = [collection_name] + [
+        [field, identity_value(item, field)]
+        for field in fields
+        if identity_value(item, field)
+    ]
+    if len(identity) == 1:
+        # Nothing identifying: fall back to the record's stable content
+        identity.append({k: v for k, v in item.items() if k not in VOLATILE_FIELDS})
+    content = json.dumps(identity, ensure_ascii=False)
+    return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+
+class SeenFingerprints:
+    """
+    Persistent set of fingerprints already stored, so duplicates are
+    rejected locally without asking Firebase. Bounded: once full, the
+    oldest fingerprints are forgotten first.
+    """
+
+    def __init__(self, path="seen_fingerprints.json", max_entries=500000):
+        self.path = path
+        self.max_entries = max_entries
+        self.seen = OrderedDict()
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.load()
+
+    def __contains__(self, fp):
+        with self.lock:
+            return fp in self.seen
+
+    def add(self, fp):
+        """Remember a stored fingerprint"""
+        with self.lock:
+            self.dirty = True
+            self.seen[fp] = None
+            while len(self.seen) > self.max_entries:
+                self.seen.popitem(last=False)
+
+    def load(self):
+        """Load persisted fingerprints if there are any"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.seen = OrderedDict.fromkeys(json.load(f))
+        except Exception as e:
+            print(f"❌ Error loading seen fingerprints {self.path}: {e}")
+
+    def save(self):
+        """Persist the set so it survives restarts"""
+        with self.lock:
+            if not self.dirty:
+                return
+            with atomic_write(self.path) as f:
+                json.dump(list(self.seen), f)
+            self.dirty = False
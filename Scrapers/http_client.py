@@ -0,0 +1,171 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scraper_metrics import percentile
+
+# Responses worth retrying: rate limiting and server-side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Only requests that are safe to repeat are retried by default
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+
+
+class HttpClient:
+    """
+    Shared HTTP layer for the scrapers.
+
+    One keep-alive session with connection pools per host, a default
+    timeout on every request, a cap on concurrent requests per host, and
+    retries with exponential backoff and full jitter on connection errors,
+    429 and 5xx (honouring Retry-After). Requests, retries, failures and
+    latencies are counted per host.
+    """
+
+    def __init__(
+        self,
+        timeout=(5, 30),
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=30,
+        per_host_limit=4,
+        pool_maxsize=16,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.per_host_limit = per_host_limit
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.host_slots = {}  # host -> semaphore capping concurrent requests
+        self.counters = {}  # host -> request/retry/failure counts and latencies
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, host):
+        """Hold one of the host's concurrent request slots"""
+        with self.lock:
+            semaphore = self.host_slots.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit)
+                self.host_slots[host] = semaphore
+        with semaphore:
+            yield
+
+    def count(self, host, field, latency_ms=None):
+        """Update a host's counters"""
+        with self.lock:
+            counters = self.counters.setdefault(
+                host,
+                {
+                    "requests": 0,
+                    "retries": 0,
+                    "failures": 0,
+                    "latencies_ms": deque(maxlen=1000),
+                },
+            )
+            counters[field] += 1
+            if latency_ms is not None:
+                counters["latencies_ms"].append(latency_ms)
+
+    def backoff(self, attempt, response=None):
+        """Delay before the next attempt: Retry-After, or jittered backoff"""
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, int(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def request(self, method, url, retry=None, **kwargs):
+        """
+        Send a request, retrying transient failures. Non-idempotent
+        methods are only retried with retry=True. Returns the last
+        response, or raises the last connection error.
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        kwargs.setdefault("timeout", self.timeout)
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        attempts = self.max_retries + 1 if retry else 1
+
+        for attempt in range(attempts):
+            response = None
+            try:
+                with self.slot(host):
+                    start = time.perf_counter()
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.count(host, "requests")
+                if attempt == attempts - 1:
+                    self.count(host, "failures")
+                    raise
+            else:
+                latency_ms = round((time.perf_counter() - start) * 1000, 1)
+                self.count(host, "requests", latency_ms)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt == attempts - 1:
+                    self.count(host, "failures")
+                    return response
+
+            delay = self.backoff(attempt, response)
+            self.count(host, "retries")
+            print(
+                f"🔁 Retrying {method} {host} in {delay:.1f}s "
+                f"(attempt {attempt + 2}/{attempts})"
+            )
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def stats(self):
+        """Per-host request, retry and failure counts with latency percentiles"""
+        with self.lock:
+            counters = {
+                host: {**c, "latencies_ms": list(c["latencies_ms"])}
+                for host, c in self.counters.items()
+            }
+        return {
+            host: {
+                "requests": c["requests"],
+                "retries": c["retries"],
+                "failures": c["failures"],
+                "latency_p50_ms": percentile(c["latencies_ms"], 50),
+                "latency_p95_ms": percentile(c["latencies_ms"], 95),
+            }
+            for host, c in counters.items()
+        }
+
+
+# Shared by everything in the Scrapers package
+shared_client = HttpClient(
+    timeout=(5, float(os.getenv("SCRAPER_HTTP_TIMEOUT", "30"))),
+    max_retries=int(os.getenv("SCRAPER_HTTP_RETRIES", "3")),
+    per_host_limit=int(os.getenv("SCRAPER_HTTP_PER_HOST", "4")),
+)
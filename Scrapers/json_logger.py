@@ -1,13 +1,71 @@
+import atexit
+import bisect
 import json
 import datetime
 import os
 import hashlib
+import textwrap
+import threading
+import time
+
+from atomic_io import atomic_write
+
+
+def log_segments(filename, backups=5):
+    """Files of a rotated log, oldest first"""
+    paths = [f"{filename}.{i}" for i in range(backups, 0, -1)]
+    paths.append(filename)
+    return [path for path in paths if os.path.exists(path)]
 
 
 class JSONLogger:
-    def __init__(self, filename="reddit_reports.json"):
+    """
+    Append-only NDJSON report log.
+
+    Each report is one line appended to `filename` through a buffered file.
+    A background timer flushes it every `flush_interval` seconds and fsyncs
+    it every `fsync_interval` seconds, even when no further reports arrive,
+    so logging a report costs the same no matter how many came before and a
+    crash can at worst lose the last few seconds of lines. When the file
+    passes `max_bytes` it is rotated to `filename.1` ...
+    `filename.<backups>`. `export_json()` writes the whole log as the JSON
+    array format older consumers read. With `verbose`, each report is also
+    pretty-printed to stdout.
+
+    Reports logged by this process are also indexed as they arrive: by type,
+    by case-folded location, by both, and by log time, so queries cost time
+    proportional to the number of matches rather than the whole history.
+    """
+
+    def __init__(
+        self,
+        filename="reddit_reports.jsonl",
+        export_path=None,
+        flush_interval=1.0,
+        fsync_interval=5.0,
+        max_bytes=50 * 1024 * 1024,
+        backups=5,
+        verbose=False,
+    ):
         self.filename = filename
+        self.verbose = verbose
+        self.export_path = export_path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
         self.reports = []
+        self.logged_times = []  # datetime of each report, same order as reports
+        self.by_type = {}  # type -> positions in self.reports
+        self.by_location = {}  # case-folded location -> positions
+        self.by_type_location = {}  # (type, case-folded location) -> positions
+        self.lock = threading.Lock()
+        self.file = None
+        self.size = 0  # bytes in the open file (tell() would flush it)
+        self.last_flush = self.last_fsync = time.monotonic()
+        self.closed = threading.Event()
+        self.timer = None
+        atexit.register(self.close)
 
     def generate_unique_id(self, data_dict):
         """Generate unique ID based on content hash"""
@@ -24,24 +82,181 @@ class JSONLogger:
             **report,
             "logged_at": datetime.datetime.now().isoformat(),
         }
-        self.reports.append(report_with_log_time)
+        self.index(report_with_log_time)
+
+        # Append to file
+        self.write(json.dumps(report_with_log_time, ensure_ascii=False) + "\n")
+
+        if self.verbose:
+            print(json.dumps(report_with_log_time, indent=2, ensure_ascii=False))
+            print("-" * 50)
+
+    def index(self, report):
+        """Append a report and add it to every index"""
+        with self.lock:
+            position = len(self.reports)
+            self.reports.append(report)
+            logged_at = datetime.datetime.fromisoformat(report["logged_at"])
+            if self.logged_times and logged_at < self.logged_times[-1]:
+                logged_at = self.logged_times[-1]  # keep the list sorted
+            self.logged_times.append(logged_at)
+
+            report_type = report.get("type")
+            location = report.get("location")
+            location = location.casefold() if isinstance(location, str) else None
+            self.by_type.setdefault(report_type, []).append(position)
+            self.by_location.setdefault(location, []).append(position)
+            self.by_type_location.setdefault((report_type, location), []).append(
+                position
+            )
+
+    def write(self, line):
+        """Append one line, flushing, syncing and rotating as due"""
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.filename, "a", encoding="utf-8")
+                self.size = os.path.getsize(self.filename)
+            self.file.write(line)
+            self.size += len(line.encode("utf-8"))
+            self.flush_due()
+
+            if self.size >= self.max_bytes:
+                self.rotate()
+
+        if self.timer is None or not self.timer.is_alive():
+            self.closed.clear()
+            self.timer = threading.Thread(
+                target=self.flush_periodically, name="json-logger", daemon=True
+            )
+            self.timer.start()
+
+    def flush_due(self):
+        """Flush and fsync the open file if their intervals have passed"""
+        if self.file is None:
+            return
+        now = time.monotonic()
+        if now - self.last_flush >= self.flush_interval:
+            self.file.flush()
+            self.last_flush = now
+        if now - self.last_fsync >= self.fsync_interval:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.last_fsync = now
+
+    def flush_periodically(self):
+        """Timer thread: keep buffered lines moving to disk between writes"""
+        while not self.closed.wait(self.flush_interval):
+            with self.lock:
+                self.flush_due()
+
+    def rotate(self):
+        """Shift filename -> filename.1 -> ... and start a new file"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.file = None
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.filename}.{i}"):
+                os.replace(f"{self.filename}.{i}", f"{self.filename}.{i + 1}")
+        os.replace(self.filename, f"{self.filename}.1")
+
+    def segments(self):
+        """Log files, oldest first"""
+        return log_segments(self.filename, self.backups)
+
+    def flush(self, sync=True):
+        """Write out buffered lines (and fsync them)"""
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+                self.last_flush = time.monotonic()
+                if sync:
+                    os.fsync(self.file.fileno())
+                    self.last_fsync = self.last_flush
+
+    def close(self):
+        """
+        Flush and close the log, exporting the array file if configured and
+        anything was logged
+        """
+        self.closed.set()
+        self.flush()
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        if self.export_path and self.reports:
+            self.export_json(self.export_path)
+
+    def export_json(self, path):
+        """
+        Write every logged report (all segments) as one indented JSON array,
+        streaming line by line and replacing `path` atomically
+        """
+        self.flush(sync=False)
+        count = 0
+        with atomic_write(path) as out:
+            out.write("[")
+            for segment in self.segments():
+                with open(segment, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            report = json.loads(line)
+                        except ValueError:
+                            continue  # torn final line from a crash
+                        item = json.dumps(report, indent=2, ensure_ascii=False)
+                        out.write(("," if count else "") + "\n")
+                        out.write(textwrap.indent(item, "  "))
+                        count += 1
+            out.write("\n]" if count else "]")
+        return count
 
-        # Write to file
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(self.reports, f, indent=2, ensure_ascii=False)
+    def query(self, report_type=None, location=None, since=None):
+        """
+        Reports matching every given filter, oldest first. `location` is
+        matched case-insensitively; `since` (datetime or ISO string, naive
+        local time or timezone-aware) keeps reports logged at or after it.
+        """
+        with self.lock:
+            if location is not None:
+                location = location.casefold()
+            if report_type is not None and location is not None:
+                positions = self.by_type_location.get((report_type, location), [])
+            elif report_type is not None:
+                positions = self.by_type.get(report_type, [])
+            elif location is not None:
+                positions = self.by_location.get(location, [])
+            else:
+                positions = range(len(self.reports))
 
-        print(json.dumps(report_with_log_time, indent=2, ensure_ascii=False))
-        print("-" * 50)
+            start = 0
+            if since is not None:
+                if isinstance(since, str):
+                    since = datetime.datetime.fromisoformat(
+                        since.replace("Z", "+00:00")
+                    )
+                if since.tzinfo is not None:
+                    # Log times are naive local time
+                    since = since.astimezone().replace(tzinfo=None)
+                first = bisect.bisect_left(self.logged_times, since)
+                start = bisect.bisect_left(positions, first)
+            return [self.reports[i] for i in positions[start:]]
 
     def get_all_reports(self):
         return self.reports
 
     def get_reports_by_type(self, report_type):
-        return [r for r in self.reports if r["type"] == report_type]
+        return self.query(report_type=report_type)
 
     def get_reports_by_location(self, location):
-        return [r for r in self.reports if r["location"].lower() == location.lower()]
+        return self.query(location=location)
 
 
 # Global logger instance
-logger = JSONLogger()
+logger = JSONLogger(
+    "reddit_reports.jsonl",
+    export_path="reddit_reports.json",
+    verbose=os.getenv("REDDIT_LOG_VERBOSE") == "1",
+)
@@ -0,0 +1,125 @@
+import json
+
+WHITESPACE = " \t\n\r"
+
+
+class JSONStreamReader:
+    """
+    Incremental reader over a text file holding JSON values.
+
+    Only a small window of the file is buffered at a time: values are
+    decoded one by one with json's raw_decode, reading more of the file
+    whenever a value runs past the end of the buffer.
+    """
+
+    def __init__(self, f, chunk_size=65536):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read the next chunk, dropping what has been consumed"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or None at the end of the file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char):
+        """Consume one structural character"""
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number or literal touching the end of the buffer may continue
+            if end == len(self.buf) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self):
+        """Yield the elements of the array starting at the cursor"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def object_member(self, key):
+        """
+        Move the cursor to the value of `key` in the object starting at the
+        cursor, decoding and discarding the members before it. Returns False
+        if the object has no such key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            return False
+        while True:
+            name = self.value()
+            self.expect(":")
+            if name == key:
+                self.peek()
+                return True
+            self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return False
+
+
+def iter_json_records(path, key=None, chunk_size=65536):
+    """
+    Yield records one at a time from a JSON file holding an array, NDJSON
+    (or any sequence of concatenated values), or an object whose `key`
+    member is an array, without loading the whole file
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JSONStreamReader(f, chunk_size)
+        first = reader.peek()
+        if first is None:
+            return
+        if first == "[":
+            yield from reader.array()
+        elif key is not None and first == "{":
+            if reader.object_member(key):
+                if reader.peek() == "[":
+                    yield from reader.array()
+                else:
+                    yield reader.value()
+        else:
+            while reader.peek() is not None:
+                yield reader.value()
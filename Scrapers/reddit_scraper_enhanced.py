@@ -1,10 +1,14 @@
 import praw
+import argparse
 import datetime
 import re
 import os
+import signal
+import sys
 import time
 from dotenv import load_dotenv
 from json_logger import logger
+from scraper_metrics import metrics
 
 load_dotenv()
 # --- CONFIGURATION ---
@@ -49,8 +53,6 @@ COMMENT_REVISIT_INTERVAL = 300  # Revisit posts every 5 minutes for new comments
 # Track processed posts and their last comment count
 processed_posts = {}  # {post_id: last_comment_count}
 
-now = time.time()
-
 
 def extract_type_and_location(text):
     t = text.lower()
@@ -61,25 +63,6 @@ def extract_type_and_location(text):
                 return rep_type, match.group(0).title()
     return None, None
 
-<<<<<<< Updated upstream
-def reddit_post_to_report(title, body, created_utc, post_url=None, comment_url=None):
-    report_type, location = extract_type_and_location(title + ' ' + body)
-    if not report_type: return None
-    description = (title + '. ' + body).strip()
-    if len(description) < 30: return None
-    timestamp = datetime.datetime.utcfromtimestamp(created_utc).isoformat() + 'Z'
-    report = {
-        'type': report_type,
-        'location': location,
-        'description': description,
-        'timestamp': timestamp
-    }
-    if post_url:
-        report['post_url'] = post_url
-    if comment_url:
-        report['comment_url'] = comment_url
-    return report
-=======
 
 def reddit_post_to_report(title, body, created_utc, post_url=None, comment_url=None):
     report_type, location = extract_type_and_location(title + " " + body)
@@ -101,14 +84,14 @@ def reddit_post_to_report(title, body, created_utc, post_url=None, comment_url=N
         report["comment_url"] = comment_url
     return report
 
->>>>>>> Stashed changes
 
 def process_comments(submission, is_new_post=False):
-    """Process comments and return new comment count"""
+    """Yield reports from a submission's comments not processed yet"""
     try:
         # Load all comments
-        submission.comments.replace_more(limit=0)
-        current_comments = submission.comments.list()
+        with metrics.stage("fetch_comments"):
+            submission.comments.replace_more(limit=0)
+            current_comments = submission.comments.list()
         current_comment_count = len(current_comments)
 
         # Get previous comment count
@@ -133,13 +116,9 @@ def process_comments(submission, is_new_post=False):
                 print(f"⏭️  No new comments for: {submission.title[:50]}...")
 
         # Process comments
+        metrics.count("comments_seen", len(comments_to_process))
         for comment in comments_to_process:
             comment_url = f"https://reddit.com{submission.permalink}{comment.id}"
-<<<<<<< Updated upstream
-            r = reddit_post_to_report(submission.title, comment.body, comment.created_utc, 
-                                    post_url=f"https://reddit.com{submission.permalink}",
-                                    comment_url=comment_url)
-=======
             r = reddit_post_to_report(
                 submission.title,
                 comment.body,
@@ -147,23 +126,22 @@ def process_comments(submission, is_new_post=False):
                 post_url=f"https://reddit.com{submission.permalink}",
                 comment_url=comment_url,
             )
->>>>>>> Stashed changes
             if r:
                 r["source"] = "comment"
                 r["post_id"] = post_id
-                log_report(r)
+                metrics.count("items_yielded")
+                yield r
 
         # Update comment count
         processed_posts[post_id] = current_comment_count
-        return current_comment_count
 
     except Exception as e:
         print(f"❌ Error processing comments: {e}")
-        return 0
 
 
 def handle_submission(submission):
-    age_hours = (now - submission.created_utc) / 3600
+    """Yield reports from a submission and its new comments"""
+    age_hours = (time.time() - submission.created_utc) / 3600
     if age_hours > MAX_AGE_HOURS:
         return
 
@@ -171,33 +149,30 @@ def handle_submission(submission):
 
     # Check if this is a new post or revisit
     is_new_post = post_id not in processed_posts
+    metrics.count("posts_seen")
 
     if is_new_post:
         # Process the main post content
         post_url = f"https://reddit.com{submission.permalink}"
-<<<<<<< Updated upstream
-        r = reddit_post_to_report(submission.title, submission.selftext, submission.created_utc, 
-                                post_url=post_url)
-=======
         r = reddit_post_to_report(
             submission.title,
             submission.selftext,
             submission.created_utc,
             post_url=post_url,
         )
->>>>>>> Stashed changes
         if r:
             r["source"] = "post"
             r["post_id"] = post_id
-            log_report(r)
+            metrics.count("items_yielded")
+            yield r
             print(f"📝 Processed post: {submission.title[:50]}...")
 
     # Process comments (new or existing)
-    process_comments(submission, is_new_post)
+    yield from process_comments(submission, is_new_post)
 
 
-def revisit_posts_for_new_comments():
-    """Revisit posts to check for new comments"""
+def revisit_posts_for_new_comments(reddit):
+    """Revisit posts and yield reports from their new comments"""
     print(f"🔄 Revisiting {len(processed_posts)} posts for new comments...")
 
     for post_id in list(processed_posts.keys()):
@@ -206,14 +181,14 @@ def revisit_posts_for_new_comments():
             submission = reddit.submission(id=post_id)
 
             # Check if post still exists and is within age limit
-            age_hours = (now - submission.created_utc) / 3600
+            age_hours = (time.time() - submission.created_utc) / 3600
             if age_hours > MAX_AGE_HOURS:
                 # Remove old posts from tracking
                 del processed_posts[post_id]
                 continue
 
             # Process new comments
-            process_comments(submission, is_new_post=False)
+            yield from process_comments(submission, is_new_post=False)
 
         except Exception as e:
             print(f"❌ Error revisiting post {post_id}: {e}")
@@ -222,41 +197,72 @@ def revisit_posts_for_new_comments():
                 del processed_posts[post_id]
 
 
-def log_report(report):
-    """Log report to JSON file"""
-    logger.log_report(report)
-
-
-if __name__ == "__main__":
-    print("🚀 Starting Enhanced Reddit Scraper (Data Collection Only)...")
-    print(f"📁 Reports will be saved to: {logger.filename}")
-    print(
-        f"🔄 Will revisit posts every {COMMENT_REVISIT_INTERVAL} seconds for new comments"
-    )
-    print("📊 No backend posting - data collection only")
-    print("-" * 50)
-
-    reddit = praw.Reddit(
+def connect():
+    """Create the Reddit API client"""
+    return praw.Reddit(
         client_id=REDDIT_CLIENT_ID,
         client_secret=REDDIT_CLIENT_SECRET,
         user_agent=REDDIT_USER_AGENT,
     )
 
+
+def iter_reports(duration_seconds=None):
+    """
+    Scraper plugin: follow new submissions across SUBREDDITS and yield
+    reports from posts and comments, revisiting posts for new comments
+    every COMMENT_REVISIT_INTERVAL. Runs for `duration_seconds`, or
+    forever if None.
+    """
+    reddit = connect()
+
     # Combine subreddits into a search-stream channel
     subs = "+".join(SUBREDDITS)
     stream = reddit.subreddit(subs).stream.submissions(pause_after=0)
 
-    last_revisit_time = time.time()
+    started = time.time()
+    last_revisit_time = started
 
     for submission in stream:
+        if duration_seconds is not None and time.time() - started >= duration_seconds:
+            return
+
         if submission is None:
             # Check if it's time to revisit posts for new comments
             current_time = time.time()
             if current_time - last_revisit_time >= COMMENT_REVISIT_INTERVAL:
-                revisit_posts_for_new_comments()
+                yield from revisit_posts_for_new_comments(reddit)
                 last_revisit_time = current_time
 
             time.sleep(5)
             continue
 
-        handle_submission(submission)
+        yield from handle_submission(submission)
+
+
+def log_report(report):
+    """Log report to JSON file"""
+    logger.log_report(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect Reddit reports")
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="stop after this many seconds (default: run until stopped)",
+    )
+    args = parser.parse_args()
+
+    print("🚀 Starting Enhanced Reddit Scraper (Data Collection Only)...")
+    print(f"📁 Reports will be saved to: {logger.filename}")
+    print(
+        f"🔄 Will revisit posts every {COMMENT_REVISIT_INTERVAL} seconds for new comments"
+    )
+    print("📊 No backend posting - data collection only")
+    print("-" * 50)
+
+    # Exit cleanly on SIGTERM so buffered reports are flushed and exported
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    for report in iter_reports(args.duration):
+        log_report(report)
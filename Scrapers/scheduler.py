@@ -0,0 +1,201 @@
+import datetime
+import json
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from central_scraper import CentralScraper, load_plugins
+
+# Seconds between the end of one run of a source and the start of the next.
+# BTP alerts change within minutes, Citizen Matters publishes a few articles
+# a day, and Reddit is followed continuously (each run streams for a while).
+SOURCE_INTERVALS = {
+    "btp": int(os.getenv("SCRAPER_INTERVAL_BTP", "300")),
+    "citizen_matters": int(os.getenv("SCRAPER_INTERVAL_CITIZEN_MATTERS", "3600")),
+    "reddit": int(os.getenv("SCRAPER_INTERVAL_REDDIT", "0")),
+}
+DEFAULT_INTERVAL = 900
+JITTER = float(os.getenv("SCRAPER_JITTER", "0.1"))  # +/- fraction of the interval
+MIN_RETRY_SECONDS = 60
+MAX_BACKOFF_SECONDS = int(os.getenv("SCRAPER_MAX_BACKOFF", "21600"))
+RUN_HISTORY_PATH = os.getenv(
+    "SCRAPER_RUN_HISTORY",
+    os.path.join(os.path.dirname(__file__), "scraper_runs.jsonl"),
+)
+
+
+class ScraperScheduler:
+    """
+    Long-running scheduler giving each scraper plugin its own cadence.
+
+    Each source is rescheduled a jittered interval after its previous run
+    ends, so a source never overlaps with itself. After consecutive
+    failures the interval (at least MIN_RETRY_SECONDS) doubles per failure,
+    up to MAX_BACKOFF_SECONDS. Every run is appended to a JSONL history, which is
+    also read at startup so backoff and due times survive restarts.
+    """
+
+    def __init__(self, scraper, plugins, history_path=RUN_HISTORY_PATH):
+        self.scraper = scraper
+        self.plugins = {plugin["name"]: plugin for plugin in plugins}
+        self.history_path = history_path
+        self.history = deque(maxlen=1000)
+        self.failures = {name: 0 for name in self.plugins}
+        self.next_due = {name: time.time() for name in self.plugins}
+        self.running = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.wakeup = threading.Event()  # set when a run finishes
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.plugins)))
+        self.load_history()
+
+    def delay(self, name):
+        """Jittered wait before the next run, backing off after failures"""
+        interval = SOURCE_INTERVALS.get(name, DEFAULT_INTERVAL)
+        failures = self.failures[name]
+        if failures:
+            interval = min(
+                MAX_BACKOFF_SECONDS, max(interval, MIN_RETRY_SECONDS) * 2**failures
+            )
+        return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def load_history(self):
+        """Restore recent runs, failure streaks and due times"""
+        if not os.path.exists(self.history_path):
+            return
+        try:
+            with open(self.history_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self.history.append(json.loads(line))
+        except Exception as e:
+            print(f"❌ Error loading run history {self.history_path}: {e}")
+            return
+
+        for run in self.history:
+            name = run.get("source")
+            if name not in self.plugins:
+                continue
+            if run.get("status") == "succeeded":
+                self.failures[name] = 0
+            else:
+                self.failures[name] += 1
+            self.next_due[name] = run["finished_at_ts"] + self.delay(name)
+
+    def record(self, run):
+        """Keep a finished run and append it to the history file"""
+        with self.lock:
+            self.history.append(run)
+            try:
+                with open(self.history_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(run, ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"❌ Error writing run history: {e}")
+
+    def run_source(self, name):
+        """Run one source and schedule its next run"""
+        started = time.time()
+        try:
+            totals = self.scraper.run_plugin(self.plugins[name])
+        except Exception as e:
+            totals = {"error": str(e)}
+        finished = time.time()
+
+        status = "failed" if totals.get("error") else "succeeded"
+        self.record(
+            {
+                "source": name,
+                "started_at": datetime.datetime.fromtimestamp(started).isoformat(),
+                "finished_at_ts": finished,
+                "duration_s": round(finished - started, 1),
+                "status": status,
+                "records": totals.get("records", 0),
+                "stored": totals.get("stored", 0),
+                "skipped": totals.get("skipped", 0),
+                "queued": totals.get("queued", 0),
+                "failed": totals.get("failed", 0),
+                "error": totals.get("error"),
+            }
+        )
+
+        with self.lock:
+            self.failures[name] = (
+                0 if status == "succeeded" else self.failures[name] + 1
+            )
+            wait = self.delay(name)
+            self.next_due[name] = finished + wait
+            self.running.discard(name)
+        self.wakeup.set()
+        print(f"🗓️  Next {name} run in {wait:.0f}s")
+
+    def dispatch_due(self):
+        """Start every source that is due and not already running"""
+        now = time.time()
+        with self.lock:
+            due = [
+                name
+                for name, at in self.next_due.items()
+                if at <= now and name not in self.running
+            ]
+            self.running.update(due)
+        for name in due:
+            self.executor.submit(self.run_source, name)
+
+    def run_forever(self):
+        """Dispatch sources as they fall due until stopped"""
+        print(f"🗓️  Scheduling {', '.join(self.plugins)}")
+        self.scraper.write_queue.start_worker(self.scraper.send_updates)
+        while not self.stop_event.is_set():
+            self.dispatch_due()
+            with self.lock:
+                waiting = [
+                    at for name, at in self.next_due.items() if name not in self.running
+                ]
+            wait = min(waiting, default=time.time() + 60) - time.time()
+            self.wakeup.wait(min(max(wait, 0.5), 60))
+            self.wakeup.clear()
+
+        print("🛑 Scheduler stopping, waiting for running scrapers...")
+        self.scraper.write_queue.stop()
+        self.executor.shutdown(wait=True)
+
+    def stop(self, *_):
+        """Stop dispatching new runs"""
+        self.stop_event.set()
+        self.wakeup.set()
+
+    def summary(self):
+        """Per-source run counts, failures and latest outcome"""
+        sources = {}
+        for run in self.history:
+            s = sources.setdefault(
+                run["source"], {"runs": 0, "failed": 0, "records": 0, "last": None}
+            )
+            s["runs"] += 1
+            s["failed"] += run["status"] != "succeeded"
+            s["records"] += run.get("records", 0)
+            s["last"] = run
+        return sources
+
+
+if __name__ == "__main__":
+    scheduler = ScraperScheduler(CentralScraper(), load_plugins())
+
+    if "--history" in sys.argv:
+        for name, s in scheduler.summary().items():
+            last = s["last"]
+            print(
+                f"📊 {name}: {s['runs']} runs, {s['failed']} failed, "
+                f"{s['records']} records; last {last['status']} at "
+                f"{last['started_at']} ({last['duration_s']}s)"
+            )
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    scheduler.run_forever()
@@ -0,0 +1,204 @@
+import argparse
+import datetime
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (e.g. p95 of run times); None if empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ScraperMetrics:
+    """
+    Per-run stage timings and counters for scraper runs.
+
+    A run is bound to the thread executing it, so scrapers can time stages
+    (fetch, render, parse, store...) and bump counters (pages, bytes, items,
+    duplicates...) without passing a metrics object around. Outside a run,
+    recording is a no-op. Finished runs are appended to a local JSONL file.
+    """
+
+    def __init__(self, log_path="scraper_metrics.jsonl"):
+        self.log_path = log_path
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def current(self):
+        """The source run this thread is recording into, or None"""
+        return getattr(self.local, "run", None)
+
+    @contextmanager
+    def run(self, source):
+        """Record everything inside the block as one run of a source"""
+        if self.current is not None:
+            # Nested: a scraper's own run inside the orchestrator's
+            yield self.current
+            return
+
+        run = {
+            "source": source,
+            "started_at": datetime.datetime.now().isoformat(),
+            "stages": {},
+            "counters": {},
+            "status": "succeeded",
+        }
+        self.local.run = run
+        start = time.perf_counter()
+        try:
+            yield run
+        except Exception:
+            run["status"] = "failed"
+            raise
+        finally:
+            run["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self.local.run = None
+            self.finish(run)
+
+    def propagate(self, func):
+        """
+        Wrap work handed to another thread (Firebase write chunks, a
+        plugin's reader) so it records into the source run that created it
+        """
+        run = self.current
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = self.current
+            self.local.run = run
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.local.run = previous
+
+        return wrapper
+
+    @contextmanager
+    def stage(self, name):
+        """Time a scraper stage (fetch, render, parse, store...)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, (time.perf_counter() - start) * 1000)
+
+    def add_stage_time(self, name, elapsed_ms):
+        """Add milliseconds to a stage of the current source run"""
+        run = self.current
+        if run is not None:
+            # Write chunks sent in parallel each add their own time
+            with self.lock:
+                run["stages"][name] = round(run["stages"].get(name, 0) + elapsed_ms, 1)
+
+    def count(self, name, n=1):
+        """Add to a named counter of the current run"""
+        run = self.current
+        if run is not None:
+            with self.lock:
+                run["counters"][name] = run["counters"].get(name, 0) + n
+
+    def set_status(self, status):
+        """Mark the current source run, e.g. failed when its plugin errored"""
+        run = self.current
+        if run is not None:
+            run["status"] = status
+
+    def finish(self, run):
+        """Append a finished run to the metrics log"""
+        with self.lock:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(run, ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"❌ Error writing scraper metrics: {e}")
+
+    def load_runs(self, source=None, last=None):
+        """Read logged runs, optionally for one source and only the latest"""
+        runs = []
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    run = json.loads(line)
+                    if source is None or run["source"] == source:
+                        runs.append(run)
+        return runs[-last:] if last else runs
+
+    def summary(self, runs):
+        """p50/p95/p99 of run time, every stage and every counter, per source"""
+        sources = {}
+        for run in runs:
+            sources.setdefault(run["source"], []).append(run)
+
+        def spread(values):
+            return {
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+
+        summary = {}
+        for source, source_runs in sources.items():
+            stage_names = sorted({name for r in source_runs for name in r["stages"]})
+            counter_names = sorted(
+                {name for r in source_runs for name in r["counters"]}
+            )
+            summary[source] = {
+                "runs": len(source_runs),
+                "failed_runs": sum(r["status"] != "succeeded" for r in source_runs),
+                "total_ms": spread([r["total_ms"] for r in source_runs]),
+                "stages_ms": {
+                    name: spread(
+                        [r["stages"][name] for r in source_runs if name in r["stages"]]
+                    )
+                    for name in stage_names
+                },
+                "counters": {
+                    name: spread([r["counters"].get(name, 0) for r in source_runs])
+                    for name in counter_names
+                },
+            }
+        return summary
+
+
+# Shared by every scraper and the orchestrator
+metrics = ScraperMetrics(
+    os.getenv(
+        "SCRAPER_METRICS_LOG",
+        os.path.join(os.path.dirname(__file__), "scraper_metrics.jsonl"),
+    )
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Summarize scraper run metrics as percentiles"
+    )
+    parser.add_argument("--source", help="only runs of this source")
+    parser.add_argument("--last", type=int, help="only the latest N runs")
+    args = parser.parse_args()
+
+    runs = metrics.load_runs(args.source, args.last)
+    if not runs:
+        print(f"📭 No runs recorded in {metrics.log_path}")
+
+    def fmt(spread):
+        return "  ".join(f"{k}={v}" for k, v in spread.items())
+
+    for source, s in metrics.summary(runs).items():
+        print(f"📊 {source}: {s['runs']} runs, {s['failed_runs']} failed")
+        print(f"   {'total_ms':<20}{fmt(s['total_ms'])}")
+        for name, spread in s["stages_ms"].items():
+            print(f"   {name + '_ms':<20}{fmt(spread)}")
+        for name, spread in s["counters"].items():
+            print(f"   {name:<20}{fmt(spread)}")
@@ -0,0 +1,301 @@
+import datetime
+import json
+import threading
+
+import pytest
+
+from fingerprints import SeenFingerprints, fingerprint
+from json_logger import JSONLogger, log_segments
+from json_stream import iter_json_records
+from write_queue import PermanentWriteError, WriteQueue, is_permanent_failure
+
+
+def test_fingerprint_ignores_cosmetic_and_non_identity_changes():
+    item = {"article_link": "https://example.com/a", "title": "Road closed"}
+    edited = {"article_link": " HTTPS://example.com/a ", "title": "Road reopened"}
+    other = {"article_link": "https://example.com/b", "title": "Road closed"}
+
+    collection = "citizen_matters_articles"
+    assert fingerprint(collection, item) == fingerprint(collection, edited)
+    assert fingerprint(collection, item) != fingerprint(collection, other)
+    assert fingerprint(collection, item) != fingerprint("btp_traffic_news", item)
+
+
+def test_fingerprint_treats_placeholders_as_missing():
+    collection = "citizen_matters_articles"
+    first = {"title": "Lake cleanup", "article_link": "No link", "date": "No date"}
+    second = {"title": "Metro delay", "article_link": "No link", "date": "No date"}
+    assert fingerprint(collection, first) != fingerprint(collection, second)
+
+    # Falls through to the fallback fields, so a later real date matters
+    dated = {**first, "date": "July 1, 2025"}
+    assert fingerprint(collection, first) != fingerprint(collection, dated)
+    assert fingerprint(collection, first) == fingerprint(
+        collection, {**first, "scraped_at": "2025-07-01T09:00:00"}
+    )
+
+
+def test_seen_fingerprints_persist_across_restarts(tmp_path):
+    path = tmp_path / "seen.json"
+    seen = SeenFingerprints(str(path))
+    seen.add("a")
+    seen.add("b")
+    seen.save()
+
+    reloaded = SeenFingerprints(str(path))
+    assert "a" in reloaded and "b" in reloaded
+    assert "c" not in reloaded
+
+
+def test_seen_fingerprints_forget_oldest_when_full(tmp_path):
+    seen = SeenFingerprints(str(tmp_path / "seen.json"), max_entries=2)
+    for fp in ["a", "b", "c"]:
+        seen.add(fp)
+    assert "a" not in seen
+    assert "b" in seen and "c" in seen
+
+
+def test_seen_fingerprints_concurrent_saves(tmp_path):
+    path = tmp_path / "seen.json"
+    seen = SeenFingerprints(str(path))
+    errors = []
+
+    def work(n):
+        try:
+            for i in range(100):
+                seen.add(f"{n}-{i}")
+                seen.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert "2-99" in SeenFingerprints(str(path))
+
+
+def test_write_queue_survives_restart_and_drains_in_order(tmp_path):
+    path = str(tmp_path / "pending.jsonl")
+    queue = WriteQueue(path)
+    first = queue.enqueue("reddit_reports", {"k1": {"n": 1}}, ["fp1"])
+    second = queue.enqueue("reddit_reports", {"k2": {"n": 2}})
+
+    reloaded = WriteQueue(path)
+    assert [e["id"] for e in reloaded.entries()] == [first, second]
+    assert reloaded.entries()[0]["fingerprints"] == ["fp1"]
+    assert reloaded.enqueue("reddit_reports", {"k3": {}}) == second + 1
+
+    sent = []
+    assert reloaded.drain(lambda c, u: sent.append(u) or True) == (3, 0)
+    assert sent == [{"k1": {"n": 1}}, {"k2": {"n": 2}}, {"k3": {}}]
+    assert len(WriteQueue(path)) == 0
+
+
+def test_write_queue_stops_at_first_failure_and_counts_attempts(tmp_path):
+    queue = WriteQueue(str(tmp_path / "pending.jsonl"))
+    for n in range(3):
+        queue.enqueue("c", {str(n): n})
+
+    def send(collection, updates):
+        return "1" not in updates
+
+    assert queue.drain(send) == (1, 2)
+    entries = queue.entries()
+    assert [list(e["updates"]) for e in entries] == [["1"], ["2"]]
+    assert [e["attempts"] for e in entries] == [1, 0]
+
+
+def test_write_queue_dead_letters_permanent_and_exhausted_entries(tmp_path):
+    queue = WriteQueue(str(tmp_path / "pending.jsonl"), max_attempts=2)
+    for n in range(3):
+        queue.enqueue("c", {str(n): n})
+
+    def send(collection, updates):
+        if "0" in updates:
+            raise PermanentWriteError("HTTP 400")
+        return "1" not in updates
+
+    # 0 is rejected outright; 1 fails and blocks 2
+    assert queue.drain(send) == (0, 2)
+    # 1 uses up its attempts, so 2 goes through behind it
+    assert queue.drain(send) == (1, 0)
+
+    with open(queue.dead_letter_path, encoding="utf-8") as f:
+        dead = [json.loads(line) for line in f]
+    assert [list(e["updates"]) for e in dead] == [["0"], ["1"]]
+    assert dead[0]["reason"] == "HTTP 400"
+    assert len(queue) == 0
+
+
+def test_permanent_failures_exclude_timeouts_and_rate_limits():
+    assert is_permanent_failure(400)
+    assert is_permanent_failure(413)
+    assert not is_permanent_failure(408)
+    assert not is_permanent_failure(429)
+    assert not is_permanent_failure(503)
+
+
+RECORDS = [
+    {"title": "Jam on ORR", "n": 1, "tags": ["a", "b"]},
+    {"title": 'Tree fall, "Hebbal" {closed}', "n": 2.5, "ok": True},
+    {"title": "Ünïcödé ಬೆಂಗಳೂರು", "n": None},
+]
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return str(path)
+
+
+def test_iter_json_records_reads_arrays_across_chunk_boundaries(tmp_path):
+    path = write(tmp_path / "a.json", json.dumps(RECORDS, indent=2))
+    for chunk_size in (1, 2, 7, 65536):
+        assert list(iter_json_records(path, chunk_size=chunk_size)) == RECORDS
+
+
+def test_iter_json_records_reads_ndjson(tmp_path):
+    text = "".join(json.dumps(r) + "\n" for r in RECORDS) + "\n"
+    path = write(tmp_path / "a.jsonl", text)
+    for chunk_size in (3, 65536):
+        assert list(iter_json_records(path, chunk_size=chunk_size)) == RECORDS
+
+
+def test_iter_json_records_reads_a_keyed_array(tmp_path):
+    data = {"meta": {"skip": [1, {"x": "]"}]}, "traffic_news": RECORDS, "n": 3}
+    path = write(tmp_path / "k.json", json.dumps(data))
+    for chunk_size in (4, 65536):
+        records = iter_json_records(path, key="traffic_news", chunk_size=chunk_size)
+        assert list(records) == RECORDS
+    assert list(iter_json_records(path, key="missing")) == []
+
+
+def test_iter_json_records_handles_numbers_and_empty_input(tmp_path):
+    # A number split across chunks must not be cut short
+    path = write(tmp_path / "n.json", "[12345, 6]")
+    assert list(iter_json_records(path, chunk_size=2)) == [12345, 6]
+    assert list(iter_json_records(write(tmp_path / "e.json", "[]"))) == []
+    assert list(iter_json_records(write(tmp_path / "w.json", "  \n"))) == []
+
+
+def logged(logger, reports, start):
+    """Log reports with log times one minute apart from `start`"""
+    for i, report in enumerate(reports):
+        logged_at = (start + datetime.timedelta(minutes=i)).isoformat()
+        logger.index({**report, "logged_at": logged_at})
+
+
+def test_json_logger_query_combines_type_location_and_since(tmp_path):
+    logger = JSONLogger(str(tmp_path / "reports.jsonl"))
+    start = datetime.datetime(2025, 7, 1, 9, 0)
+    logged(
+        logger,
+        [
+            {"type": "traffic", "location": "HSR Layout"},
+            {"type": "flood", "location": "hsr layout"},
+            {"type": "traffic", "location": "Whitefield"},
+            {"type": "traffic", "location": "HSR LAYOUT"},
+            {"type": "traffic", "location": None},
+        ],
+        start,
+    )
+
+    def positions(reports):
+        return [logger.reports.index(r) for r in reports]
+
+    assert positions(logger.query(report_type="traffic")) == [0, 2, 3, 4]
+    assert positions(logger.query(location="Hsr Layout")) == [0, 1, 3]
+    assert positions(logger.query("traffic", "hsr layout")) == [0, 3]
+    since = start + datetime.timedelta(minutes=1)
+    assert positions(logger.query("traffic", "hsr layout", since)) == [3]
+    assert positions(logger.query(since=since.isoformat())) == [1, 2, 3, 4]
+    assert logger.query("traffic", "nowhere") == []
+    assert logger.query(since=start + datetime.timedelta(days=1)) == []
+    assert logger.get_reports_by_type("flood") == [logger.reports[1]]
+    assert len(logger.get_reports_by_location("WHITEFIELD")) == 1
+
+
+def test_json_logger_query_accepts_timezone_aware_since(tmp_path):
+    logger = JSONLogger(str(tmp_path / "reports.jsonl"))
+    start = datetime.datetime.now() - datetime.timedelta(hours=1)
+    logged(logger, [{"type": "traffic", "location": "Indiranagar"}] * 3, start)
+
+    aware = (start + datetime.timedelta(minutes=1)).astimezone(datetime.timezone.utc)
+    assert len(logger.query(since=aware)) == 2
+    assert len(logger.query(since=aware.isoformat().replace("+00:00", "Z"))) == 2
+
+
+def test_json_logger_rotates_and_exports_every_segment(tmp_path, capsys):
+    path = str(tmp_path / "reports.jsonl")
+    logger = JSONLogger(path, max_bytes=500, backups=10)
+    for n in range(20):
+        logger.log_report({"type": "traffic", "location": "Koramangala", "n": n})
+    logger.close()
+    capsys.readouterr()
+
+    segments = log_segments(path, backups=10)
+    assert len(segments) > 1
+    lines = [json.loads(line) for s in segments for line in open(s, encoding="utf-8")]
+    assert [r["n"] for r in lines] == list(range(20))
+
+    export = str(tmp_path / "reports.json")
+    assert logger.export_json(export) == 20
+    with open(export, encoding="utf-8") as f:
+        assert f.read() == json.dumps(lines, indent=2, ensure_ascii=False)
+
+
+@pytest.fixture
+def scheduler_module(monkeypatch):
+    # The scheduler imports the orchestrator, which needs the Firebase SDK
+    pytest.importorskip("firebase_admin")
+    import scheduler
+
+    monkeypatch.setattr(scheduler, "JITTER", 0)
+    monkeypatch.setitem(scheduler.SOURCE_INTERVALS, "btp", 300)
+    monkeypatch.setitem(scheduler.SOURCE_INTERVALS, "reddit", 0)
+    monkeypatch.setattr(scheduler, "MIN_RETRY_SECONDS", 60)
+    monkeypatch.setattr(scheduler, "MAX_BACKOFF_SECONDS", 3600)
+    return scheduler
+
+
+def make_scheduler(scheduler_module, history_path):
+    plugins = [{"name": "btp"}, {"name": "reddit"}]
+    return scheduler_module.ScraperScheduler(None, plugins, str(history_path))
+
+
+def test_scheduler_backs_off_exponentially_after_failures(scheduler_module, tmp_path):
+    s = make_scheduler(scheduler_module, tmp_path / "runs.jsonl")
+
+    delays = []
+    for failures in range(6):
+        s.failures["btp"] = failures
+        delays.append(s.delay("btp"))
+    assert delays == [300, 600, 1200, 2400, 3600, 3600]
+
+    # Continuous sources retry no sooner than MIN_RETRY_SECONDS
+    s.failures["reddit"] = 0
+    assert s.delay("reddit") == 0
+    s.failures["reddit"] = 2
+    assert s.delay("reddit") == 240
+
+
+def test_scheduler_restores_failures_and_due_times(scheduler_module, tmp_path):
+    path = tmp_path / "runs.jsonl"
+    runs = [
+        {"source": "btp", "status": "failed", "finished_at_ts": 1000.0},
+        {"source": "reddit", "status": "failed", "finished_at_ts": 1500.0},
+        {"source": "btp", "status": "failed", "finished_at_ts": 2000.0},
+        {"source": "reddit", "status": "succeeded", "finished_at_ts": 2500.0},
+        {"source": "retired_source", "status": "failed", "finished_at_ts": 3000.0},
+    ]
+    path.write_text("".join(json.dumps(run) + "\n" for run in runs))
+
+    s = make_scheduler(scheduler_module, path)
+    assert s.failures == {"btp": 2, "reddit": 0}
+    assert s.next_due["btp"] == 2000.0 + 1200
+    assert s.next_due["reddit"] == 2500.0
+    assert len(s.summary()) == 3
@@ -0,0 +1,195 @@
+import datetime
+import json
+import os
+import random
+import threading
+
+from atomic_io import atomic_write
+
+# Client errors that will fail the same way however often they are retried
+RETRYABLE_CLIENT_ERRORS = {408, 429}
+
+
+class PermanentWriteError(Exception):
+    """Raised by a send function when a write can never succeed as is"""
+
+
+def is_permanent_failure(status_code):
+    """True for 4xx responses other than timeouts and rate limiting"""
+    return 400 <= status_code < 500 and status_code not in RETRYABLE_CLIENT_ERRORS
+
+
+class WriteQueue:
+    """
+    Durable, ordered queue of Firebase writes that failed.
+
+    Each entry is one multi-location update (Firebase key -> record) for a
+    collection, appended to a local JSONL file and fsynced before enqueue
+    returns. Entries are retried oldest first and only removed once
+    written; draining stops at the first failure so order is preserved.
+    Replaying an entry writes the same keys again, so a retry after a
+    partial failure is harmless.
+
+    Entries that fail permanently (the send function raises
+    PermanentWriteError) or fail `max_attempts` times are moved to a
+    dead-letter file instead, so one bad entry cannot block the queue.
+    """
+
+    def __init__(
+        self,
+        path="pending_writes.jsonl",
+        base_delay=5,
+        max_delay=300,
+        max_attempts=50,
+        dead_letter_path=None,
+    ):
+        self.path = path
+        self.dead_letter_path = dead_letter_path or f"{path}.dead"
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lock = threading.Lock()  # guards the file
+        self.drain_lock = threading.Lock()  # one drain at a time
+        self.stop_event = threading.Event()
+        self.wakeup = threading.Event()
+        self.next_id = max((e["id"] for e in self.entries()), default=0) + 1
+
+    def entries(self):
+        """All pending entries, oldest first"""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # torn final line from a crash mid-append
+        return entries
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries())
+
+    def enqueue(self, collection, updates, fingerprints=None):
+        """Durably queue a failed write for retry"""
+        with self.lock:
+            entry = {
+                "id": self.next_id,
+                "collection": collection,
+                "updates": updates,
+                "fingerprints": fingerprints or [],
+                "attempts": 0,
+                "queued_at": datetime.datetime.now().isoformat(),
+            }
+            self.next_id += 1
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.wakeup.set()
+        return entry["id"]
+
+    def remove(self, ids, attempts=None):
+        """
+        Drop delivered or dead-lettered entries and record new attempt
+        counts (id -> attempts), keeping anything queued meanwhile
+        """
+        attempts = attempts or {}
+        with self.lock:
+            remaining = []
+            for entry in self.entries():
+                if entry["id"] in ids:
+                    continue
+                if entry["id"] in attempts:
+                    entry["attempts"] = attempts[entry["id"]]
+                remaining.append(entry)
+            with atomic_write(self.path, sync=True) as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def dead_letter(self, collection, updates, reason, fingerprints=None):
+        """Durably set aside a write that will not be retried"""
+        entry = {
+            "collection": collection,
+            "updates": updates,
+            "fingerprints": fingerprints or [],
+            "reason": reason,
+            "dead_at": datetime.datetime.now().isoformat(),
+        }
+        with self.lock:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        print(f"☠️  Dead-lettered {len(updates)} {collection} records: {reason}")
+
+    def drain(self, send):
+        """
+        Retry pending writes in order with `send(collection, updates)`,
+        which returns True once written. Returns (delivered, still_pending).
+        """
+        with self.drain_lock:
+            with self.lock:
+                pending = self.entries()
+            delivered = []
+            dead = []
+            attempts = {}
+            for entry in pending:
+                reason = None
+                try:
+                    ok = send(entry["collection"], entry["updates"])
+                except PermanentWriteError as e:
+                    ok, reason = False, str(e)
+                except Exception as e:
+                    print(f"❌ Error retrying queued write: {e}")
+                    ok = False
+                if ok:
+                    delivered.append(entry["id"])
+                    continue
+
+                tries = entry.get("attempts", 0) + 1
+                if reason is None and tries >= self.max_attempts:
+                    reason = f"failed {tries} attempts"
+                if reason is None:
+                    attempts[entry["id"]] = tries
+                    break
+                self.dead_letter(
+                    entry["collection"],
+                    entry["updates"],
+                    reason,
+                    entry.get("fingerprints"),
+                )
+                dead.append(entry["id"])
+
+            if delivered or dead or attempts:
+                self.remove(set(delivered) | set(dead), attempts)
+            if delivered:
+                print(f"📤 Delivered {len(delivered)} queued writes")
+            return len(delivered), len(pending) - len(delivered) - len(dead)
+
+    def start_worker(self, send, idle_seconds=60):
+        """Drain in the background, backing off while writes keep failing"""
+
+        def work():
+            failures = 0
+            while not self.stop_event.is_set():
+                _, remaining = self.drain(send)
+                if remaining:
+                    failures += 1
+                    delay = min(self.max_delay, self.base_delay * 2**failures)
+                    delay *= random.uniform(0.5, 1.0)
+                else:
+                    failures = 0
+                    delay = idle_seconds
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+
+        thread = threading.Thread(target=work, name="write-queue", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop the background worker"""
+        self.stop_event.set()
+        self.wakeup.set()
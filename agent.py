@@ -1,13 +1,28 @@
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import os
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 import hashlib
 import datetime
 import argparse
+import threading
+import time
+import random
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from alert_dedup import AlertLSHIndex
+from report_clusters import cluster_records, parse_timestamp
+from map_reduce import ChunkSummaryCache, map_reduce_summaries
+from event_index import VenueHistory, group_events
+from spike_detector import SpikeDetector
+from agent_telemetry import AgentTelemetry
+from change_feed import DebouncedTrigger, FirebaseChangeFeed
 
 load_dotenv()
 
@@ -20,10 +35,189 @@ FIREBASE_DATABASE_URL = os.getenv(
     "https://pulse-bengaluru-2933b-default-rtdb.firebaseio.com/",
 )
 
+# Most recent records fetched per source collection for alert generation
+SOURCE_FETCH_LIMIT = int(os.getenv("SOURCE_FETCH_LIMIT", "500"))
+
+# Raw records are clustered by area, type and time bucket before prompting
+CLUSTER_BUCKET_HOURS = int(os.getenv("CLUSTER_BUCKET_HOURS", "3"))
+MAX_CLUSTERS_PER_PROMPT = int(os.getenv("MAX_CLUSTERS_PER_PROMPT", "40"))
+
+# Large inputs are summarized map-reduce style instead: chunks of each
+# collection are summarized by Gemini in parallel, and the partial summaries
+# are reduced until they fit in a prompt. SUMMARY_MODE is "clusters",
+# "map_reduce", or "auto" (map-reduce once a prompt's input has at least
+# MAP_REDUCE_MIN_RECORDS records). Chunk summaries are cached by content hash.
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "auto")
+MAP_REDUCE_MIN_RECORDS = int(os.getenv("MAP_REDUCE_MIN_RECORDS", "1000"))
+MAP_CHUNK_SIZE = int(os.getenv("MAP_CHUNK_SIZE", "40"))
+MAP_CONCURRENCY = int(os.getenv("MAP_CONCURRENCY", "4"))
+MAX_SUMMARIES_PER_CHUNK = 5
+
+# Maximum number of items written in a single multi-location PATCH
+FIREBASE_BATCH_SIZE = int(os.getenv("FIREBASE_BATCH_SIZE", "500"))
+
+# Pooled session so Firebase writes reuse keep-alive connections
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+http_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Background job execution for agent pipelines
+AGENT_JOB_WORKERS = int(os.getenv("AGENT_JOB_WORKERS", "2"))
+JOB_HISTORY_LIMIT = 200
+
+job_executor = ThreadPoolExecutor(max_workers=AGENT_JOB_WORKERS)
+jobs = OrderedDict()  # job_id -> job record, oldest first
+inflight_jobs = {}  # pipeline name -> job_id of the queued/running job
+jobs_lock = threading.Lock()
+jobs_changed = threading.Condition(jobs_lock)  # notified on job events
+job_events = {}  # job_id -> [(event, data)] published while it runs
+job_listeners = {}  # job_id -> callbacks run (under jobs_lock) on its events
+current_job = threading.local()  # job_id of the job running on this thread
+JOB_EVENT_KEEPALIVE_SECONDS = 15
+
+# Read path for /api/alerts and /api/forecasts. Paginated queries need an
+# ".indexOn": "created_at" rule on both collections; without it we fall back
+# to downloading the collection and sorting locally.
+READ_CACHE_TTL_SECONDS = int(os.getenv("READ_CACHE_TTL_SECONDS", "60"))
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Cursors are client-supplied, so the cache is bounded as well as expiring
+MAX_CACHED_PAGES = int(os.getenv("MAX_CACHED_PAGES", "256"))
+
+read_cache = OrderedDict()  # (collection, limit, before) -> (expires_at, items)
+read_cache_lock = threading.Lock()
+
+# Retention: items older than this many days are archived and removed
+RETENTION_POLICIES = {
+    "alerts": float(os.getenv("ALERT_RETENTION_DAYS", "7")),
+    "urban_forecasts": float(os.getenv("FORECAST_RETENTION_DAYS", "3")),
+}
+ARCHIVE_EXPIRED = os.getenv("ARCHIVE_EXPIRED", "true").lower() == "true"
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "21600"))
+
+last_compaction = {}  # collection -> time.time() of the last compaction
+retention_lock = threading.Lock()
+
+# Expected fields of model output. None accepts any non-empty string,
+# a tuple restricts the field to those values.
+ALERT_FIELDS = {
+    "title": None,
+    "description": None,
+    "type": ("urgent", "warning", "info"),
+}
+FORECAST_FIELDS = {
+    "area": None,
+    "expected_effects": None,
+    "time_window": None,
+    "signal_type": ("traffic", "crowd", "public_service", "quiet"),
+    "confidence": ("Low", "Medium", "High"),
+}
+
+CHUNK_SUMMARY_FIELDS = {
+    "area": None,
+    "summary": None,
+    "severity": ("low", "medium", "high"),
+}
+
+# Near-duplicate alert suppression across agent runs
+alert_index = AlertLSHIndex(
+    path=os.getenv("ALERT_INDEX_PATH", "alert_index.json"),
+    threshold=float(os.getenv("ALERT_DEDUP_THRESHOLD", "0.5")),
+    window_hours=float(os.getenv("ALERT_DEDUP_WINDOW_HOURS", "24")),
+)
+alert_index_lock = threading.Lock()
+
+# Deterministic urban forecasts for venues and time slots seen before
+venue_history = VenueHistory(
+    path=os.getenv("VENUE_HISTORY_PATH", "venue_history.json"),
+    min_observations=int(os.getenv("RULE_MIN_OBSERVATIONS", "2")),
+)
+venue_history_lock = threading.Lock()
+
+chunk_cache = ChunkSummaryCache(
+    path=os.getenv("CHUNK_CACHE_PATH", "chunk_summaries.json"),
+    max_entries=int(os.getenv("CHUNK_CACHE_SIZE", "2000")),
+)
+
+# Gemini request policy. Each call has an overall deadline; transient
+# failures are retried with jittered exponential backoff; and if a request
+# is slower than the recent p95 latency, a duplicate (hedged) request is
+# sent and whichever answers first wins.
+GEMINI_DEADLINE_SECONDS = float(os.getenv("GEMINI_DEADLINE_SECONDS", "90"))
+GEMINI_MAX_ATTEMPTS = max(1, int(os.getenv("GEMINI_MAX_ATTEMPTS", "3")))
+GEMINI_BACKOFF_SECONDS = float(os.getenv("GEMINI_BACKOFF_SECONDS", "1"))
+GEMINI_MAX_BACKOFF_SECONDS = 20
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "1") == "1"
+GEMINI_HEDGE_MIN_SAMPLES = 20
+GEMINI_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("GEMINI_HEDGE_MIN_DELAY_SECONDS", "2"))
+
+gemini_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GEMINI_WORKERS", "8")),
+    thread_name_prefix="gemini",
+)
+gemini_latencies = deque(maxlen=200)  # seconds, successful requests only
+gemini_latencies_lock = threading.Lock()
+
+TRANSIENT_GEMINI_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    requests.exceptions.ConnectionError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class GeminiCallError(RuntimeError):
+    """Raised when a Gemini call fails or misses its deadline"""
+
+
+# Report volume spikes per area and type. Source records are counted as
+# they are first seen; spikes found here, or published to the "spikes"
+# collection by the reports API, get urgent alerts ahead of routine ones.
+spike_detector = SpikeDetector(
+    path=os.getenv("AGENT_SPIKE_STATE_PATH", "agent_spike_state.json"),
+    bucket_minutes=int(os.getenv("SPIKE_BUCKET_MINUTES", "60")),
+    z_threshold=float(os.getenv("SPIKE_Z_THRESHOLD", "3")),
+)
+spike_lock = threading.Lock()
+MAX_SPIKES_PER_PROMPT = 5
+
+# How many times to re-ask the model for items missing from its output
+MAX_FOLLOWUP_PROMPTS = int(os.getenv("MAX_FOLLOWUP_PROMPTS", "1"))
+
+# Event-driven alert generation (--watch): new source records are buffered,
+# and an incremental run starts once enough have arrived and the feed has
+# been quiet for a while, but never more often than the minimum interval
+WATCH_COLLECTIONS = os.getenv(
+    "WATCH_COLLECTIONS", "btp_traffic_news,reddit_reports,citizen_matters_articles"
+).split(",")
+alert_trigger = DebouncedTrigger(
+    min_records=int(os.getenv("WATCH_MIN_NEW_RECORDS", "5")),
+    debounce_seconds=float(os.getenv("WATCH_DEBOUNCE_SECONDS", "60")),
+    max_wait_seconds=float(os.getenv("WATCH_MAX_WAIT_SECONDS", "300")),
+    min_interval_seconds=float(os.getenv("WATCH_MIN_INTERVAL_SECONDS", "900")),
+)
+pending_records = {}  # collection -> records not yet seen by an incremental run
+pending_records_lock = threading.Lock()
+
+# Stage timings, model latency, token usage and cost per pipeline run.
+# Prices are USD per million tokens for the configured Gemini model.
+telemetry = AgentTelemetry(
+    log_path=os.getenv("AGENT_METRICS_LOG", "agent_metrics.jsonl"),
+    input_cost_per_mtok=float(os.getenv("GEMINI_INPUT_COST_PER_MTOK", "0.30")),
+    output_cost_per_mtok=float(os.getenv("GEMINI_OUTPUT_COST_PER_MTOK", "2.50")),
+)
+
 
 def fetch_firebase_data():
     """
-    Fetch 2 items each from all Firebase collections including forecast data
+    Fetch the most recent records from all Firebase source collections,
+    and every item of the forecast collection
     """
     collections = [
         "btp_traffic_news",
@@ -42,19 +236,19 @@ def fetch_firebase_data():
     for collection in collections:
         try:
             url = f"{FIREBASE_DATABASE_URL}/{collection}.json"
-            response = requests.get(url, timeout=10)
+            if collection == "forecast":
+                params = {}  # Get all forecast items
+            else:
+                # Scraper keys start with a timestamp, so key order is time order
+                params = {"orderBy": '"$key"', "limitToLast": SOURCE_FETCH_LIMIT}
+            response = http_session.get(url, params=params, timeout=30)
 
             if response.status_code == 200:
                 data = response.json()
                 if data:
-                    # Convert Firebase data to list and get first 2 items (or all for forecast)
+                    # Convert Firebase data to list
                     items = list(data.values()) if isinstance(data, dict) else data
-                    if collection == "forecast":
-                        all_data[collection] = items  # Get all forecast items
-                    else:
-                        all_data[collection] = items[
-                            :2
-                        ]  # Get only 2 items for other collections
+                    all_data[collection] = [item for item in items if item]
                     print(
                         f"✅ Fetched {len(all_data[collection])} items from {collection}"
                     )
@@ -71,53 +265,516 @@ def fetch_firebase_data():
     return all_data
 
 
-def store_alerts_to_firebase(alerts):
+def summarize_for_prompt(data_by_collection):
+    """
+    Condense raw records into prompt input: cluster summaries for normal
+    volumes, or hierarchical map-reduce summaries for large inputs
+    """
+    total = sum(len(records) for records in data_by_collection.values())
+    if SUMMARY_MODE == "map_reduce" or (
+        SUMMARY_MODE == "auto" and total >= MAP_REDUCE_MIN_RECORDS
+    ):
+        with telemetry.stage("map_reduce"):
+            summaries = map_reduce_summaries(
+                data_by_collection,
+                telemetry.propagate(summarize_chunk),
+                chunk_cache,
+                max_summaries=MAX_CLUSTERS_PER_PROMPT,
+                chunk_size=MAP_CHUNK_SIZE,
+                max_workers=MAP_CONCURRENCY,
+                fallback=cluster_chunk_summaries,
+            )
+            try:
+                chunk_cache.save()
+            except Exception as e:
+                print(f"❌ Error saving chunk summaries: {e}")
+
+        print(f"🗜️  Reduced {total} records to {len(summaries)} summaries")
+        return (
+            f"{total} records were summarized in chunks. Each summary gives an area, "
+            "what is happening there, its severity and roughly how many reports mention it.\n\n"
+            f"        Summaries: {json.dumps(summaries, ensure_ascii=False)}"
+        )
+
+    with telemetry.stage("prompt_build"):
+        clusters = cluster_records(
+            data_by_collection,
+            bucket_hours=CLUSTER_BUCKET_HOURS,
+            limit=MAX_CLUSTERS_PER_PROMPT,
+        )
+        return (
+            f"Records are pre-grouped into clusters by area, type and {CLUSTER_BUCKET_HOURS}-hour window. "
+            "Each cluster gives the number of raw reports, which sources they came from, "
+            "when they were first and last seen, and sample texts.\n\n"
+            f"        Clusters: {json.dumps(clusters, ensure_ascii=False)}"
+        )
+
+
+def summarize_chunk(label, records):
+    """
+    Map step: ask Gemini to condense one chunk of records (or of partial
+    summaries) into a few area-level summaries
+    """
+    prompt = f"""
+    Summarize the following {len(records)} items from "{label}" (Bengaluru civic data) into at most {MAX_SUMMARIES_PER_CHUNK} summaries.
+    Merge items about the same area and issue. Keep concrete details: places, times, and what citizens should expect.
+
+    Items:
+    {json.dumps(records, ensure_ascii=False)}
+
+    Return response as valid JSON array with this format:
+    [
+      {{"area": "Area/Neighborhood name", "summary": "What is happening (max 200 chars)", "severity": "low|medium|high", "reports": 3}}
+    ]
+    """
+    return generate_validated_items(
+        prompt,
+        CHUNK_SUMMARY_FIELDS,
+        f"{label} summaries",
+        1,
+        MAX_SUMMARIES_PER_CHUNK,
+    )
+
+
+def cluster_chunk_summaries(label, records):
+    """
+    Fallback for chunks Gemini could not summarize: describe them with
+    cluster summaries in the same shape as the map step output
+    """
+    if label.startswith("summaries_level_"):
+        return records
+
+    return [
+        {
+            "area": cluster["location"],
+            "summary": f"{cluster['type']}: " + " | ".join(cluster["samples"]),
+            "severity": "medium" if cluster["count"] > 1 else "low",
+            "reports": cluster["count"],
+        }
+        for cluster in cluster_records(
+            {label: records},
+            bucket_hours=CLUSTER_BUCKET_HOURS,
+            limit=MAX_SUMMARIES_PER_CHUNK,
+        )
+    ]
+
+
+def batch_write_to_firebase(collection, items_by_key):
+    """
+    Write a {key: item} mapping into a Firebase collection using chunked
+    multi-location PATCH requests.
+
+    Returns a {key: bool} mapping with the outcome for every item. A PATCH
+    is atomic, so all items in a chunk succeed or fail together.
+    """
+    results = {}
+    keys = list(items_by_key.keys())
+    url = f"{FIREBASE_DATABASE_URL}/{collection}.json"
+
+    for start in range(0, len(keys), FIREBASE_BATCH_SIZE):
+        chunk_keys = keys[start : start + FIREBASE_BATCH_SIZE]
+        payload = {key: items_by_key[key] for key in chunk_keys}
+
+        try:
+            response = http_session.patch(url, json=payload, timeout=30)
+            ok = response.status_code == 200
+            if not ok:
+                print(
+                    f"❌ Failed to write {len(chunk_keys)} items to {collection}: {response.status_code}"
+                )
+        except Exception as e:
+            print(f"❌ Error writing {len(chunk_keys)} items to {collection}: {e}")
+            ok = False
+
+        for key in chunk_keys:
+            results[key] = ok
+
+    return results
+
+
+def query_by_created_at(collection, params, timeout=10):
+    """
+    Run a created_at-ordered query against a Firebase collection.
+
+    Falls back to a full download when the collection has no created_at
+    index, so callers must still filter and sort the returned items.
+    Returns a {key: item} mapping.
+    """
+    url = f"{FIREBASE_DATABASE_URL}/{collection}.json"
+    response = http_session.get(
+        url, params={"orderBy": '"created_at"', **params}, timeout=timeout
+    )
+
+    if response.status_code == 400:
+        print(f"⚠️  No created_at index on {collection}, fetching full collection")
+        response = http_session.get(url, timeout=timeout)
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code}")
+
+    data = response.json() or {}
+    if isinstance(data, list):
+        data = {str(i): item for i, item in enumerate(data) if item}
+    return data
+
+
+def fetch_latest(collection, limit, before=None):
+    """
+    Fetch the newest `limit` items of a collection ordered by created_at,
+    optionally only those created before the `before` cursor.
+
+    Results are cached in-process until READ_CACHE_TTL_SECONDS pass or the
+    collection is written to.
+    """
+    cache_key = (collection, limit, before)
+    items = get_cached_page(cache_key)
+    if items is not None:
+        return items
+
+    data = query_by_created_at(collection, latest_query_params(limit, before))
+    items = select_latest(data, limit, before)
+    cache_page(cache_key, items)
+    return items
+
+
+def latest_query_params(limit, before=None):
+    """
+    Firebase query parameters for the newest `limit` items before a cursor
+    """
+    params = {"limitToLast": limit}
+    if before:
+        # endAt is inclusive, so fetch one extra for the cursor item itself
+        params["endAt"] = json.dumps(before)
+        params["limitToLast"] = limit + 1
+    return params
+
+
+def select_latest(data, limit, before=None):
+    """
+    Pick the newest `limit` items before a cursor from a {key: item} mapping
+    """
+    items = [item for item in data.values() if isinstance(item, dict)]
+    if before:
+        items = [item for item in items if item.get("created_at", "") < before]
+    items.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+    return items[:limit]
+
+
+def get_cached_page(cache_key):
+    """
+    Return a cached page of items, or None if it is missing or expired
+    """
+    with read_cache_lock:
+        cached = read_cache.get(cache_key)
+        if cached is None:
+            return None
+        if cached[0] <= time.time():
+            del read_cache[cache_key]
+            return None
+        read_cache.move_to_end(cache_key)
+        return cached[1]
+
+
+def cache_page(cache_key, items):
+    """
+    Cache a page of items for READ_CACHE_TTL_SECONDS, evicting the least
+    recently used page once MAX_CACHED_PAGES are cached
+    """
+    with read_cache_lock:
+        read_cache[cache_key] = (time.time() + READ_CACHE_TTL_SECONDS, items)
+        read_cache.move_to_end(cache_key)
+        while len(read_cache) > MAX_CACHED_PAGES:
+            read_cache.popitem(last=False)
+
+
+def invalidate_read_cache(collection):
+    """
+    Drop cached pages of a collection after it has been written to
+    """
+    with read_cache_lock:
+        for key in [key for key in read_cache if key[0] == collection]:
+            del read_cache[key]
+
+
+def compact_collection(collection, retention_days):
+    """
+    Archive and remove items older than retention_days from a collection.
+    Returns the number of items removed.
+    """
+    cutoff = (
+        datetime.datetime.now() - datetime.timedelta(days=retention_days)
+    ).isoformat()
+    data = query_by_created_at(collection, {"endAt": json.dumps(cutoff)}, timeout=30)
+    expired = {
+        key: item
+        for key, item in data.items()
+        if isinstance(item, dict) and item.get("created_at", "") <= cutoff
+    }
+
+    if not expired:
+        print(f"📭 No expired items in {collection}")
+        return 0
+
+    if ARCHIVE_EXPIRED:
+        archived = batch_write_to_firebase(f"{collection}_archive", expired)
+        expired_keys = [key for key, ok in archived.items() if ok]
+    else:
+        expired_keys = list(expired.keys())
+
+    # Writing null to a path in a multi-location update deletes it
+    results = batch_write_to_firebase(collection, {key: None for key in expired_keys})
+    removed = sum(results.values())
+    invalidate_read_cache(collection)
+
+    print(
+        f"🧹 Removed {removed} items older than {retention_days} days from {collection}"
+    )
+    return removed
+
+
+def run_retention(force=False):
     """
-    Store generated alerts to Firebase alerts collection
+    Compact every collection in RETENTION_POLICIES, at most once per
+    RETENTION_INTERVAL_SECONDS unless forced. Returns {collection: removed}.
     """
+    summary = {}
+    for collection, retention_days in RETENTION_POLICIES.items():
+        with retention_lock:
+            now = time.time()
+            if (
+                not force
+                and now - last_compaction.get(collection, 0)
+                < RETENTION_INTERVAL_SECONDS
+            ):
+                continue
+            last_compaction[collection] = now
+
+        try:
+            summary[collection] = compact_collection(collection, retention_days)
+        except Exception as e:
+            print(f"❌ Error compacting {collection}: {e}")
+
+    return summary
+
+
+def seed_alert_index():
+    """
+    Populate an empty alert index from the most recent stored alerts, so
+    deduplication survives restarts without a local index file
+    """
+    if alert_index.loaded or len(alert_index):
+        return
+
     try:
-        url = f"{FIREBASE_DATABASE_URL}/alerts.json"
+        recent = fetch_latest("alerts", 200)
+    except Exception as e:
+        print(f"❌ Error seeding alert index: {e}")
+        return
+
+    for alert in recent:
+        if "id" in alert and "title" in alert and "description" in alert:
+            alert_index.add(
+                alert["id"],
+                f"{alert['title']} {alert['description']}",
+                alert.get("created_at", ""),
+                alert.get("occurrences", 1),
+            )
+    alert_index.loaded = True
+    print(f"🗂️  Seeded alert index with {len(alert_index)} recent alerts")
 
-        for alert in alerts:
-            # Add timestamp and unique ID
-            alert["created_at"] = datetime.datetime.now().isoformat()
-            alert["id"] = hashlib.md5(
-                (alert["title"] + alert["description"]).encode()
-            ).hexdigest()[:8]
 
-            # Store each alert individually
-            alert_url = f"{FIREBASE_DATABASE_URL}/alerts/{alert['id']}.json"
-            response = requests.put(alert_url, json=alert, timeout=10)
+def store_alerts_to_firebase(alerts):
+    """
+    Store generated alerts to Firebase alerts collection.
 
-            if response.status_code == 200:
-                print(f"✅ Stored alert: {alert['title'][:50]}...")
-            else:
-                print(f"❌ Failed to store alert: {response.status_code}")
+    Alerts that are near-duplicates of a recent alert are not stored again;
+    the existing alert is refreshed and its occurrence count bumped instead.
+    """
+    try:
+        with alert_index_lock:
+            seed_alert_index()
+
+            alerts_by_id = {}
+            refreshed = {}
+            merged = 0
+            for alert in alerts:
+                now = datetime.datetime.now().isoformat()
+                text = f"{alert['title']} {alert['description']}"
+
+                duplicate_id, similarity = alert_index.find_duplicate(text)
+                if duplicate_id is not None:
+                    entry = alert_index.refresh(duplicate_id, now)
+                    merged += 1
+                    if duplicate_id in alerts_by_id:
+                        # Duplicate of an alert from this same batch
+                        alerts_by_id[duplicate_id]["occurrences"] = entry["occurrences"]
+                    else:
+                        refreshed[f"{duplicate_id}/created_at"] = now
+                        refreshed[f"{duplicate_id}/occurrences"] = entry["occurrences"]
+                    print(
+                        f"🔁 Merged near-duplicate alert into {duplicate_id} ({similarity:.2f}): {alert['title'][:50]}..."
+                    )
+                    continue
+
+                # Add timestamp and unique ID
+                alert["created_at"] = now
+                alert["id"] = hashlib.md5(
+                    (alert["title"] + alert["description"]).encode()
+                ).hexdigest()[:8]
+                alert["occurrences"] = 1
+                alerts_by_id[alert["id"]] = alert
+                alert_index.add(alert["id"], text, now)
+
+            # Store new alerts and refresh duplicates with a single multi-location update
+            results = batch_write_to_firebase("alerts", {**alerts_by_id, **refreshed})
+            invalidate_read_cache("alerts")
+
+            for alert_id, alert in alerts_by_id.items():
+                if results[alert_id]:
+                    print(f"✅ Stored alert: {alert['title'][:50]}...")
+                else:
+                    print(f"❌ Failed to store alert: {alert['title'][:50]}...")
+                    alert_index.remove(alert_id)
+
+            alert_index.save()
 
-        print(f"📊 Stored {len(alerts)} alerts to Firebase")
-        return True
+        stored = sum(results[alert_id] for alert_id in alerts_by_id)
+        print(f"📊 Stored {stored} new alerts, merged {merged} near-duplicates")
+        return all(results.values())
 
     except Exception as e:
         print(f"❌ Error storing alerts to Firebase: {e}")
         return False
 
 
-def generate_multiple_alerts(firebase_data):
+def count_new_records(data_by_collection):
+    """
+    Feed source records the spike detector has not seen yet into it, in
+    time order. Returns True if any of them belongs to a spiking series.
+    """
+    new_records = []
+    with spike_lock:
+        for collection, records in data_by_collection.items():
+            if collection == "forecast":
+                continue
+            for record in records:
+                if not isinstance(record, dict):
+                    continue
+                fingerprint = hashlib.sha1(
+                    json.dumps(record, sort_keys=True, default=str).encode()
+                ).hexdigest()
+                if not spike_detector.mark_seen(fingerprint):
+                    continue
+                new_records.append(
+                    (parse_timestamp(record, utc=True), collection, record)
+                )
+
+        latest = datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+        new_records.sort(key=lambda r: r[0] or latest)
+        priorities = [
+            spike_detector.observe_record(record, collection)
+            for _, collection, record in new_records
+        ]
+    return "high" in priorities
+
+
+def fetch_published_spikes():
     """
-    Generate alerts using 4 separate prompts to Gemini, including forecast data
+    Fetch spikes the reports API flagged in the last two buckets
+    """
+    try:
+        response = http_session.get(
+            f"{FIREBASE_DATABASE_URL}/spikes.json",
+            params={"orderBy": '"$key"', "limitToLast": 20},
+            timeout=10,
+        )
+        if response.status_code != 200:
+            print(f"❌ Failed to fetch spikes: {response.status_code}")
+            return []
+        data = response.json() or {}
+    except Exception as e:
+        print(f"❌ Error fetching spikes: {e}")
+        return []
+
+    # The reports API buckets by its UTC submission timestamps
+    cutoff = (
+        datetime.datetime.utcnow()
+        - datetime.timedelta(seconds=2 * spike_detector.bucket_seconds)
+    ).isoformat()
+    return [
+        spike
+        for spike in data.values()
+        if isinstance(spike, dict) and spike.get("bucket_start", "") >= cutoff
+    ]
+
+
+def detect_spikes(data_by_collection):
+    """
+    Update the spike detector with new source records and return every
+    current spike, most significant first
+    """
+    with telemetry.stage("spikes"):
+        count_new_records(data_by_collection)
+        try:
+            spike_detector.save()
+        except Exception as e:
+            print(f"❌ Error saving spike state: {e}")
+
+        spikes = {(s["area"], s["type"]): s for s in fetch_published_spikes()}
+        for spike in spike_detector.spikes():
+            key = (spike["area"], spike["type"])
+            if key not in spikes or spike["zscore"] > spikes[key]["zscore"]:
+                spikes[key] = spike
+
+    spikes = sorted(spikes.values(), key=lambda s: s.get("zscore", 0), reverse=True)
+    if spikes:
+        print(f"📈 {len(spikes)} report volume spike(s) detected")
+    return spikes
+
+
+def generate_multiple_alerts(firebase_data, spikes=None):
+    """
+    Generate alerts using 4 separate prompts to Gemini, including forecast data.
+    Each prompt gets cluster or map-reduce summaries of its sources rather
+    than raw records. Detected spikes get their own prompt first, and its
+    alerts lead the list with high priority.
     """
     all_alerts = []
 
+    # Prompt 0: Report volume spikes
+    if spikes:
+        spikes = spikes[:MAX_SPIKES_PER_PROMPT]
+        spike_prompt = f"""
+        Report volume in these Bengaluru areas has suddenly jumped far above its normal level for the time of day.
+        Each spike gives the area, report type, reports in the current {spike_detector.bucket_seconds // 60}-minute window, the usual count (baseline) and how many standard deviations above normal it is (zscore).
+        Generate ONE urgent, actionable alert per spike, at most {len(spikes)} alerts.
+
+        Spikes: {json.dumps(spikes, ensure_ascii=False)}
+
+        Return response as valid JSON array with this format:
+        [
+          {{"title": "Alert title (max 80 chars)", "description": "Brief description (max 150 chars)", "type": "urgent|warning|info"}}
+        ]
+        """
+
+        spike_alerts = generate_validated_items(
+            spike_prompt, ALERT_FIELDS, "spike alerts", 1, len(spikes)
+        )
+        for alert in spike_alerts:
+            alert["priority"] = "high"
+        all_alerts.extend(spike_alerts)
+
     # Prompt 1: Traffic and Infrastructure
-    traffic_data = firebase_data.get("btp_traffic_news", []) + firebase_data.get(
-        "reddit_reports", []
-    )
-    if traffic_data:
+    traffic_data = {
+        "btp_traffic_news": firebase_data.get("btp_traffic_news", []),
+        "reddit_reports": firebase_data.get("reddit_reports", []),
+    }
+    if any(traffic_data.values()):
         traffic_prompt = f"""
         Based on the following traffic and infrastructure data from Bengaluru, generate EXACTLY 2 concise alerts for citizens.
         Focus on traffic conditions, road closures, and transportation issues.
         
-        Data: {json.dumps(traffic_data, indent=2)}
+        {summarize_for_prompt(traffic_data)}
         
         Return response as valid JSON array with this format:
         [
@@ -126,25 +783,23 @@ def generate_multiple_alerts(firebase_data):
         ]
         """
 
-        traffic_alerts = call_gemini(traffic_prompt)
-        try:
-            parsed_alerts = json.loads(
-                traffic_alerts.strip().replace("```json", "").replace("```", "")
+        all_alerts.extend(
+            generate_validated_items(
+                traffic_prompt, ALERT_FIELDS, "traffic alerts", 2, 2
             )
-            all_alerts.extend(parsed_alerts[:2])  # Ensure only 2 alerts
-        except json.JSONDecodeError:
-            print("❌ Failed to parse traffic alerts")
+        )
 
     # Prompt 2: Citizen Issues and Reports
-    citizen_data = firebase_data.get(
-        "citizen_matters_articles", []
-    ) + firebase_data.get("reddit_reports", [])
-    if citizen_data:
+    citizen_data = {
+        "citizen_matters_articles": firebase_data.get("citizen_matters_articles", []),
+        "reddit_reports": firebase_data.get("reddit_reports", []),
+    }
+    if any(citizen_data.values()):
         citizen_prompt = f"""
         Based on the following citizen reports and local news from Bengaluru, generate EXACTLY 2 concise alerts.
         Focus on public services, local issues, and community concerns.
         
-        Data: {json.dumps(citizen_data, indent=2)}
+        {summarize_for_prompt(citizen_data)}
         
         Return response as valid JSON array with this format:
         [
@@ -153,23 +808,20 @@ def generate_multiple_alerts(firebase_data):
         ]
         """
 
-        citizen_alerts = call_gemini(citizen_prompt)
-        try:
-            parsed_alerts = json.loads(
-                citizen_alerts.strip().replace("```json", "").replace("```", "")
+        all_alerts.extend(
+            generate_validated_items(
+                citizen_prompt, ALERT_FIELDS, "citizen alerts", 2, 2
             )
-            all_alerts.extend(parsed_alerts[:2])  # Ensure only 2 alerts
-        except json.JSONDecodeError:
-            print("❌ Failed to parse citizen alerts")
+        )
 
     # Prompt 3: Forecast-based Alerts
-    forecast_data = firebase_data.get("forecast", [])
-    if forecast_data:
+    forecast_data = {"forecast": firebase_data.get("forecast", [])}
+    if any(forecast_data.values()):
         forecast_prompt = f"""
         Based on the following upcoming events and forecast data from Bengaluru, generate EXACTLY 2 proactive alerts.
         Focus on expected traffic patterns, crowd management, and event-related impacts.
         
-        Data: {json.dumps(forecast_data, indent=2)}
+        {summarize_for_prompt(forecast_data)}
         
         Return response as valid JSON array with this format:
         [
@@ -178,26 +830,20 @@ def generate_multiple_alerts(firebase_data):
         ]
         """
 
-        forecast_alerts = call_gemini(forecast_prompt)
-        try:
-            parsed_alerts = json.loads(
-                forecast_alerts.strip().replace("```json", "").replace("```", "")
+        all_alerts.extend(
+            generate_validated_items(
+                forecast_prompt, ALERT_FIELDS, "forecast alerts", 2, 2
             )
-            all_alerts.extend(parsed_alerts[:2])  # Ensure only 2 alerts
-        except json.JSONDecodeError:
-            print("❌ Failed to parse forecast alerts")
+        )
 
     # Prompt 4: Combined Analysis and Recommendations
-    combined_data = []
-    for collection_data in firebase_data.values():
-        combined_data.extend(collection_data)
-
-    if combined_data:
+    combined_data = firebase_data
+    if any(combined_data.values()):
         combined_prompt = f"""
         Based on analyzing ALL the following data sources together, generate EXACTLY 2 strategic alerts.
         Look for patterns, correlations, and important insights across traffic, citizen reports, news, and upcoming events.
         
-        Data: {json.dumps(combined_data, indent=2)}
+        {summarize_for_prompt(combined_data)}
         
         Return response as valid JSON array with this format:
         [
@@ -206,28 +852,406 @@ def generate_multiple_alerts(firebase_data):
         ]
         """
 
-        combined_alerts = call_gemini(combined_prompt)
-        try:
-            parsed_alerts = json.loads(
-                combined_alerts.strip().replace("```json", "").replace("```", "")
+        all_alerts.extend(
+            generate_validated_items(
+                combined_prompt, ALERT_FIELDS, "combined alerts", 2, 2
             )
-            all_alerts.extend(parsed_alerts[:2])  # Ensure only 2 alerts
-        except json.JSONDecodeError:
-            print("❌ Failed to parse combined alerts")
+        )
+
+    for alert in all_alerts:
+        alert.setdefault("priority", "medium")
 
     print(f"📊 Generated {len(all_alerts)} total alerts")
     return all_alerts
 
 
-def call_gemini(prompt):
+def record_model_call(
+    prompt, text, usage, latency_ms, streamed=False, error=None, **extra
+):
+    """
+    Record a Gemini call's latency and token usage in the current run.
+    Token counts fall back to a ~4 characters per token estimate when the
+    response carries no usage metadata.
+    """
+    metrics = {
+        "latency_ms": round(latency_ms, 1),
+        "streamed": streamed,
+    }
+    input_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    if input_tokens is None or output_tokens is None:
+        input_tokens = len(prompt) // 4
+        output_tokens = len(text) // 4
+        metrics["estimated_tokens"] = True
+    metrics["input_tokens"] = input_tokens
+    metrics["output_tokens"] = output_tokens
+
+    cached_tokens = getattr(usage, "cached_content_token_count", None)
+    if cached_tokens is not None:
+        metrics["cached_tokens"] = cached_tokens
+        metrics["cache"] = "hit" if cached_tokens else "miss"
+    if error:
+        metrics["error"] = error
+    metrics.update(extra)
+    telemetry.record_call(**metrics)
+
+
+def generate_once(prompt, deadline_at=None):
+    """
+    Make a single Gemini request, returning (text, usage metadata). With a
+    deadline the request itself times out then, so a call the caller has
+    given up on frees its gemini_executor worker instead of holding it.
+    """
     genai.configure(api_key=os.getenv("GENAI_API_KEY"))
     model = genai.GenerativeModel(model_name="gemini-2.5-flash")
 
+    start = time.perf_counter()
+    request_options = None
+    if deadline_at is not None:
+        remaining = deadline_at - start
+        if remaining <= 0:
+            raise TimeoutError("Gemini deadline exceeded before the request started")
+        request_options = {"timeout": remaining}
+    response = model.generate_content(prompt, request_options=request_options)
+    text = response.text
+    with gemini_latencies_lock:
+        gemini_latencies.append(time.perf_counter() - start)
+    return text, getattr(response, "usage_metadata", None)
+
+
+def hedge_delay():
+    """
+    Seconds to wait before sending a hedged duplicate request: the p95 of
+    recent request latencies, or None if hedging is off or unwarmed
+    """
+    if not GEMINI_HEDGE:
+        return None
+    with gemini_latencies_lock:
+        samples = sorted(gemini_latencies)
+    if len(samples) < GEMINI_HEDGE_MIN_SAMPLES:
+        return None
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return max(GEMINI_HEDGE_MIN_DELAY_SECONDS, p95)
+
+
+def generate_hedged(prompt, deadline_at):
+    """
+    Send a request, plus one duplicate if the first is slower than the
+    hedge delay. Returns (text, usage, hedged) from the first to succeed,
+    or raises the last error if both fail.
+    """
+    delay = hedge_delay()
+    sent_at = time.perf_counter()
+    pending = {gemini_executor.submit(generate_once, prompt, deadline_at)}
+    hedged = False
+    error = None
+
+    while pending:
+        remaining = deadline_at - time.perf_counter()
+        if remaining <= 0:
+            for future in pending:
+                future.cancel()  # only stops requests still waiting for a worker
+            raise TimeoutError("Gemini deadline exceeded")
+
+        timeout = remaining
+        if delay is not None and not hedged:
+            timeout = min(remaining, max(0, sent_at + delay - time.perf_counter()))
+
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                text, usage = future.result()
+                for other in pending:
+                    other.cancel()
+                return text, usage, hedged
+            except Exception as e:
+                error = e
+
+        if not done and delay is not None and not hedged:
+            print(f"🐢 Gemini slower than {delay:.1f}s, sending hedged request")
+            pending.add(gemini_executor.submit(generate_once, prompt, deadline_at))
+            hedged = True
+
+    raise error
+
+
+def gemini_backoff(attempt):
+    """Jittered exponential backoff before retrying a failed attempt"""
+    return min(
+        GEMINI_MAX_BACKOFF_SECONDS, GEMINI_BACKOFF_SECONDS * 2 ** (attempt - 1)
+    ) * random.uniform(0.5, 1.0)
+
+
+def call_gemini(prompt, deadline_seconds=None):
+    """
+    Call Gemini within a deadline, retrying transient errors with jittered
+    exponential backoff and hedging slow requests. Raises GeminiCallError
+    if no attempt succeeds in time.
+    """
+    deadline_seconds = deadline_seconds or GEMINI_DEADLINE_SECONDS
+    start = time.perf_counter()
+    deadline_at = start + deadline_seconds
+    error = None
+
+    with telemetry.stage("model"):
+        for attempt in range(1, GEMINI_MAX_ATTEMPTS + 1):
+            try:
+                text, usage, hedged = generate_hedged(prompt, deadline_at)
+                record_model_call(
+                    prompt,
+                    text,
+                    usage,
+                    (time.perf_counter() - start) * 1000,
+                    attempts=attempt,
+                    hedged=hedged,
+                )
+                return text
+            except TRANSIENT_GEMINI_ERRORS as e:
+                error = e
+            except Exception as e:
+                error = e
+                break
+
+            backoff = gemini_backoff(attempt)
+            if (
+                attempt == GEMINI_MAX_ATTEMPTS
+                or time.perf_counter() + backoff >= deadline_at
+            ):
+                break
+            print(
+                f"🔁 Gemini attempt {attempt} failed ({error}), retrying in {backoff:.1f}s"
+            )
+            time.sleep(backoff)
+
+        record_model_call(
+            prompt,
+            "",
+            None,
+            (time.perf_counter() - start) * 1000,
+            error=str(error),
+            attempts=attempt,
+        )
+    raise GeminiCallError(f"Gemini call failed after {attempt} attempt(s): {error}")
+
+
+def request_items(prompt, fields):
+    """
+    Call Gemini and parse its output into schema-valid items, treating a
+    failed call as an empty response
+    """
     try:
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"Error generating alerts: {str(e)}"
+        text = call_gemini(prompt)
+    except GeminiCallError as e:
+        print(f"❌ {e}")
+        return []
+    return parse_model_items(text, fields)
+
+
+def call_gemini_stream(prompt, deadline_seconds=None):
+    """
+    Yield response text chunks from Gemini as they are generated.
+
+    The stream runs under the same deadline as call_gemini. Transient
+    errors are retried with backoff until the first chunk has been
+    yielded; after that a retry would repeat output, so a failure just
+    ends the stream. Raises GeminiCallError if no text arrives at all.
+    """
+    genai.configure(api_key=os.getenv("GENAI_API_KEY"))
+    model = genai.GenerativeModel(model_name="gemini-2.5-flash")
+    deadline_at = time.perf_counter() + (deadline_seconds or GEMINI_DEADLINE_SECONDS)
+
+    # Only time spent waiting on Gemini counts towards the model stage, not
+    # time the consumer spends handling each chunk
+    waited = 0.0
+    parts = []
+    usage = None
+    for attempt in range(1, GEMINI_MAX_ATTEMPTS + 1):
+        error = None
+        wait_start = time.perf_counter()
+        try:
+            remaining = deadline_at - wait_start
+            if remaining <= 0:
+                raise TimeoutError("Gemini deadline exceeded")
+            response = iter(
+                model.generate_content(
+                    prompt, stream=True, request_options={"timeout": remaining}
+                )
+            )
+            while True:
+                try:
+                    chunk = next(response, None)
+                finally:
+                    waited += time.perf_counter() - wait_start
+                if chunk is None:
+                    break
+
+                # The final chunk carries the usage totals for the whole response
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. safety metadata only)
+                    text = None
+                if text:
+                    parts.append(text)
+                    yield text
+                wait_start = time.perf_counter()
+            break
+        except TRANSIENT_GEMINI_ERRORS as e:
+            error = e
+        except Exception as e:
+            error = e
+            break
+
+        backoff = gemini_backoff(attempt)
+        if (
+            parts
+            or attempt == GEMINI_MAX_ATTEMPTS
+            or time.perf_counter() + backoff >= deadline_at
+        ):
+            break
+        print(
+            f"🔁 Gemini stream attempt {attempt} failed ({error}), retrying in {backoff:.1f}s"
+        )
+        time.sleep(backoff)
+
+    telemetry.add_stage_time("model", waited * 1000)
+    record_model_call(
+        prompt,
+        "".join(parts),
+        usage,
+        waited * 1000,
+        streamed=True,
+        error=str(error) if error else None,
+        attempts=attempt,
+    )
+    if error is not None:
+        if not parts:
+            raise GeminiCallError(
+                f"Gemini stream failed after {attempt} attempt(s): {error}"
+            )
+        print(f"⚠️  Gemini stream ended early: {error}")
+
+
+def iter_json_objects(chunks):
+    """
+    Incrementally extract top-level JSON objects from streamed model output.
+
+    Each object is yielded as soon as its closing brace arrives. Anything
+    outside an object (array brackets, commas, code fences, stray prose)
+    is skipped, and objects that fail to parse are dropped.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    buffer = []
+
+    for chunk in chunks:
+        for ch in chunk:
+            if depth == 0:
+                if ch == "{":
+                    depth = 1
+                    buffer = [ch]
+                continue
+
+            buffer.append(ch)
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        yield json.loads("".join(buffer))
+                    except json.JSONDecodeError:
+                        print("⚠️  Skipping malformed object in model output")
+
+
+def validate_item(item, fields):
+    """
+    Check a parsed object against a field schema.
+
+    Returns a copy with allowed values normalized to their canonical case,
+    or None if any field is missing, empty, or outside its allowed values.
+    """
+    if not isinstance(item, dict):
+        return None
+
+    validated = dict(item)
+    for field, allowed in fields.items():
+        value = item.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        if allowed is not None:
+            matches = [a for a in allowed if a.lower() == value.strip().lower()]
+            if not matches:
+                return None
+            validated[field] = matches[0]
+    return validated
+
+
+def parse_model_items(text, fields):
+    """
+    Salvage every well-formed, schema-valid object from model output,
+    even if it is wrapped in prose or code fences or is truncated
+    """
+    items = []
+    rejected = 0
+    with telemetry.stage("parse"):
+        for obj in iter_json_objects([text]):
+            item = validate_item(obj, fields)
+            if item is None:
+                rejected += 1
+            else:
+                items.append(item)
+    telemetry.update_last_call(
+        parse_success=bool(items), items_parsed=len(items), items_rejected=rejected
+    )
+
+    if rejected:
+        print(f"⚠️  Dropped {rejected} objects that did not match the schema")
+    return items
+
+
+def followup_prompt(prompt, items, missing):
+    """Re-ask a prompt for only the items missing from an earlier answer"""
+    return f"""
+        {prompt}
+
+        You already returned these items, do not repeat them:
+        {json.dumps(items, indent=2)}
+
+        Return ONLY the {missing} remaining item(s) as a valid JSON array in the same format, no additional text.
+        """
+
+
+def generate_validated_items(prompt, fields, label, min_count, max_count=None):
+    """
+    Ask Gemini for items and keep every valid one it returns. If fewer
+    than `min_count` are valid, re-ask only for the missing items instead
+    of discarding the whole response. At most `max_count` are returned.
+    """
+    items = request_items(prompt, fields)
+
+    for _ in range(MAX_FOLLOWUP_PROMPTS):
+        missing = min_count - len(items)
+        if missing <= 0:
+            break
+
+        print(f"🔁 Re-asking for {missing} missing {label}")
+        items.extend(request_items(followup_prompt(prompt, items, missing), fields))
+
+    if not items:
+        print(f"❌ Failed to parse {label}")
+    return items[:max_count]
 
 
 def generate_alerts(json_data):
@@ -277,27 +1301,9 @@ def generate_alerts(json_data):
     Make sure the response is valid JSON only, no additional text.
     """
 
-    response = call_gemini(prompt)
+    alerts = request_items(prompt, ALERT_FIELDS)
 
-    # Try to parse the JSON response
-    try:
-        # Clean the response to extract just the JSON part
-        response_cleaned = response.strip()
-        if response_cleaned.startswith("```json"):
-            response_cleaned = (
-                response_cleaned.replace("```json", "").replace("```", "").strip()
-            )
-
-        alerts = json.loads(response_cleaned)
-
-        # Add unique IDs to each alert
-        for i, alert in enumerate(alerts):
-            alert["id"] = f"alert_{i}_{hash(alert.get('title', ''))}"
-
-        return alerts
-    except json.JSONDecodeError as e:
-        print(f"❌ Error parsing JSON response: {e}")
-        print(f"Raw response: {response}")
+    if not alerts:
         # Return fallback alerts
         return [
             {
@@ -308,60 +1314,416 @@ def generate_alerts(json_data):
             }
         ]
 
+    # Add unique IDs to each alert
+    for i, alert in enumerate(alerts):
+        alert["id"] = f"alert_{i}_{hash(alert.get('title', ''))}"
 
-@app.route("/api/start-agent", methods=["POST"])
-def start_agent():
+    return alerts
+
+
+@telemetry.track("agent")
+def run_agent_pipeline():
     """
-    API endpoint to start the agent: fetch data, generate alerts, and store to Firebase
+    Fetch data, generate alerts, and store them to Firebase
     """
-    try:
-        print("🚀 Starting agent process...")
+    print("🚀 Starting agent process...")
 
-        # Step 1: Fetch data from Firebase
+    # Step 1: Fetch data from Firebase
+    with telemetry.stage("fetch"):
         firebase_data = fetch_firebase_data()
 
-        if not any(firebase_data.values()):
-            return jsonify(
-                {
-                    "success": False,
-                    "message": "No data available from Firebase collections",
-                    "alerts_generated": 0,
-                }
-            )
+    if not any(firebase_data.values()):
+        return {
+            "success": False,
+            "message": "No data available from Firebase collections",
+            "alerts_generated": 0,
+        }
+
+    # Step 2: Generate alerts using 3 prompts
+    spikes = detect_spikes(firebase_data)
+    alerts = generate_multiple_alerts(firebase_data, spikes)
+
+    if not alerts:
+        return {
+            "success": False,
+            "message": "Failed to generate alerts",
+            "alerts_generated": 0,
+        }
+
+    # Step 3: Store alerts to Firebase
+    with telemetry.stage("store"):
+        success = store_alerts_to_firebase(alerts)
 
-        # Step 2: Generate alerts using 3 prompts
-        alerts = generate_multiple_alerts(firebase_data)
+    # Step 4: Expire old alerts and forecasts (throttled)
+    with telemetry.stage("retention"):
+        run_retention()
+
+    return {
+        "success": success,
+        "message": f"Agent completed successfully. Generated {len(alerts)} alerts.",
+        "alerts_generated": len(alerts),
+        "data_sources": {
+            "btp_traffic_news": len(firebase_data.get("btp_traffic_news", [])),
+            "reddit_reports": len(firebase_data.get("reddit_reports", [])),
+            "citizen_matters_articles": len(
+                firebase_data.get("citizen_matters_articles", [])
+            ),
+            "forecast": len(firebase_data.get("forecast", [])),
+        },
+    }
+
+
+@telemetry.track("urban_forecast")
+def run_urban_forecast_pipeline():
+    """
+    Fetch upcoming events, generate urban forecasts, and store them to Firebase
+    """
+    print("🌆 Starting urban forecast process...")
+
+    # Step 1: Fetch forecast data from Firebase
+    with telemetry.stage("fetch"):
+        forecast_data = fetch_forecast_data()
+
+    if not forecast_data:
+        return {
+            "success": False,
+            "message": "No forecast data available from Firebase",
+            "forecasts_generated": 0,
+        }
+    publish_job_event("status", {"events_analyzed": len(forecast_data)})
+
+    # Step 2: Generate urban forecasts using Gemini, publishing each one to
+    # stream subscribers as soon as it is complete
+    forecasts = []
+    try:
+        for forecast in stream_urban_forecasts(forecast_data):
+            forecasts.append(forecast)
+            publish_job_event("forecast", forecast)
+    except Exception as e:
+        print(f"❌ Error streaming urban forecasts: {e}")
+
+    if not forecasts:
+        return {
+            "success": False,
+            "message": "Failed to generate urban forecasts",
+            "forecasts_generated": 0,
+        }
+
+    # Step 3: Store forecasts to Firebase
+    with telemetry.stage("store"):
+        success = store_forecasts_to_firebase(forecasts)
+
+    # Step 4: Expire old alerts and forecasts (throttled)
+    with telemetry.stage("retention"):
+        run_retention()
+
+    return {
+        "success": success,
+        "message": f"Urban forecast completed successfully. Generated {len(forecasts)} forecasts.",
+        "forecasts_generated": len(forecasts),
+        "events_analyzed": len(forecast_data),
+        "forecasts": forecasts,
+    }
+
+
+def run_retention_pipeline():
+    """
+    Archive and remove expired alerts and forecasts regardless of throttling
+    """
+    print("🧹 Starting retention compaction...")
+    summary = run_retention(force=True)
+    return {
+        "success": True,
+        "message": f"Retention completed. Removed {sum(summary.values())} items.",
+        "removed": summary,
+    }
 
-        if not alerts:
-            return jsonify(
-                {
-                    "success": False,
-                    "message": "Failed to generate alerts",
-                    "alerts_generated": 0,
-                }
-            )
 
-        # Step 3: Store alerts to Firebase
+@telemetry.track("incremental_agent")
+def run_incremental_agent_pipeline():
+    """
+    Generate alerts from only the source records that arrived since the
+    last incremental run, and store them to Firebase
+    """
+    with pending_records_lock:
+        new_data = {c: records for c, records in pending_records.items() if records}
+        pending_records.clear()
+
+    new_count = sum(len(records) for records in new_data.values())
+    print(f"⚡ Starting incremental agent process for {new_count} new records...")
+    if not new_count:
+        return {
+            "success": True,
+            "message": "No new records to analyze",
+            "alerts_generated": 0,
+        }
+
+    alerts = generate_multiple_alerts(new_data, detect_spikes(new_data))
+    if not alerts:
+        return {
+            "success": False,
+            "message": "Failed to generate alerts",
+            "alerts_generated": 0,
+        }
+
+    with telemetry.stage("store"):
         success = store_alerts_to_firebase(alerts)
 
-        return jsonify(
-            {
-                "success": success,
-                "message": f"Agent completed successfully. Generated {len(alerts)} alerts.",
-                "alerts_generated": len(alerts),
-                "data_sources": {
-                    "btp_traffic_news": len(firebase_data.get("btp_traffic_news", [])),
-                    "reddit_reports": len(firebase_data.get("reddit_reports", [])),
-                    "citizen_matters_articles": len(
-                        firebase_data.get("citizen_matters_articles", [])
-                    ),
-                    "forecast": len(firebase_data.get("forecast", [])),
-                },
-            }
+    with telemetry.stage("retention"):
+        run_retention()
+
+    return {
+        "success": success,
+        "message": f"Incremental agent completed. Generated {len(alerts)} alerts.",
+        "alerts_generated": len(alerts),
+        "data_sources": {c: len(records) for c, records in new_data.items()},
+    }
+
+
+PIPELINES = {
+    "agent": run_agent_pipeline,
+    "incremental_agent": run_incremental_agent_pipeline,
+    "urban_forecast": run_urban_forecast_pipeline,
+    "retention": run_retention_pipeline,
+}
+
+
+def submit_job(pipeline):
+    """
+    Queue a pipeline run in the background.
+
+    If a run of the same pipeline is already queued or running, the caller
+    is coalesced onto that job instead of starting a duplicate run.
+    Returns (job snapshot, coalesced).
+    """
+    with jobs_lock:
+        inflight_id = inflight_jobs.get(pipeline)
+        if inflight_id is not None:
+            job = jobs[inflight_id]
+            job["subscribers"] += 1
+            return dict(job), True
+
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "pipeline": pipeline,
+            "status": "queued",
+            "subscribers": 1,
+            "created_at": datetime.datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+        }
+        jobs[job["job_id"]] = job
+        inflight_jobs[pipeline] = job["job_id"]
+
+        job_events[job["job_id"]] = []
+
+        # Forget the oldest finished jobs once the history is full
+        for old_id in list(jobs.keys()):
+            if len(jobs) <= JOB_HISTORY_LIMIT:
+                break
+            if jobs[old_id]["status"] in ("succeeded", "failed"):
+                del jobs[old_id]
+                job_events.pop(old_id, None)
+
+        snapshot = dict(job)
+
+    job_executor.submit(run_job, job["job_id"])
+    return snapshot, False
+
+
+def run_job(job_id):
+    """
+    Execute a queued job and record its result
+    """
+    with jobs_lock:
+        job = jobs[job_id]
+        job["status"] = "running"
+        job["started_at"] = datetime.datetime.now().isoformat()
+        pipeline = job["pipeline"]
+
+    current_job.job_id = job_id
+    try:
+        result = PIPELINES[pipeline]()
+        status = "succeeded" if result.get("success") else "failed"
+    except Exception as e:
+        print(f"❌ Error in {pipeline} job {job_id}: {e}")
+        result = {"success": False, "message": f"{pipeline} job failed: {str(e)}"}
+        status = "failed"
+    finally:
+        current_job.job_id = None
+
+    with jobs_lock:
+        job["status"] = status
+        job["result"] = result
+        job["finished_at"] = datetime.datetime.now().isoformat()
+        if inflight_jobs.get(pipeline) == job_id:
+            del inflight_jobs[pipeline]
+        job_events[job_id].append(
+            ("done" if status == "succeeded" else "error", result)
         )
+        notify_job_changed(job_id)
+
+
+def notify_job_changed(job_id):
+    """Wake everything following a job. Call with jobs_lock held."""
+    jobs_changed.notify_all()
+    for callback in job_listeners.get(job_id, ()):
+        callback()
+
+
+def add_job_listener(job_id, callback):
+    """
+    Call `callback` whenever a job publishes an event, for followers that
+    cannot block a thread on jobs_changed (e.g. an event loop). Callbacks
+    run on the publishing thread with jobs_lock held, so must be quick.
+    """
+    with jobs_lock:
+        job_listeners.setdefault(job_id, set()).add(callback)
+
+
+def remove_job_listener(job_id, callback):
+    """Stop calling a callback added with add_job_listener"""
+    with jobs_lock:
+        callbacks = job_listeners.get(job_id)
+        if callbacks is not None:
+            callbacks.discard(callback)
+            if not callbacks:
+                del job_listeners[job_id]
 
+
+def job_events_since(job_id, sent):
+    """A job's events after the first `sent`, or None for an unknown job"""
+    with jobs_lock:
+        events = job_events.get(job_id)
+        return None if events is None else events[sent:]
+
+
+def publish_job_event(event, data):
+    """
+    Publish an event to subscribers of the job running on this thread.
+    Outside a job this does nothing.
+    """
+    job_id = getattr(current_job, "job_id", None)
+    if job_id is None:
+        return
+    with jobs_lock:
+        job_events[job_id].append((event, data))
+        notify_job_changed(job_id)
+
+
+def iter_job_events(job_id):
+    """
+    Yield (event, data) for a job: everything it published so far, then new
+    events as they arrive, ending with its final "done" or "error" event.
+    Yields None while idle so callers can send keepalives.
+    """
+    sent = 0
+    while True:
+        with jobs_lock:
+            events = job_events.get(job_id)
+            if events is None:
+                return
+            if sent == len(events):
+                jobs_changed.wait(JOB_EVENT_KEEPALIVE_SECONDS)
+            new_events = events[sent:]
+        sent += len(new_events)
+        if not new_events:
+            yield None
+        for event, data in new_events:
+            yield event, data
+            if event in ("done", "error"):
+                return
+
+
+def buffer_new_records(collection, records):
+    """
+    Change feed callback: keep new records for the next incremental run
+    """
+    with pending_records_lock:
+        buffered = pending_records.setdefault(collection, [])
+        buffered.extend(records)
+        del buffered[:-SOURCE_FETCH_LIMIT]
+
+    # A spike skips the debounce so its alert goes out as soon as allowed
+    spiking = count_new_records({collection: records})
+    alert_trigger.add(len(records), urgent=spiking)
+    print(f"📨 {len(records)} new record(s) in {collection}")
+
+
+def watch_for_alerts(poll_seconds=1.0):
+    """
+    Follow the source collections and queue incremental agent runs
+    whenever the trigger says enough new signal has accumulated
+    """
+    feed = FirebaseChangeFeed(
+        FIREBASE_DATABASE_URL, WATCH_COLLECTIONS, buffer_new_records
+    )
+    feed.start()
+
+    def loop():
+        while not feed.stop_event.is_set():
+            # While a run is in flight, leave the trigger armed: records
+            # buffered after that run took its snapshot need a run of their own
+            with jobs_lock:
+                busy = "incremental_agent" in inflight_jobs
+            if not busy and alert_trigger.due():
+                job, coalesced = submit_job("incremental_agent")
+                if not coalesced:
+                    alert_trigger.mark_run()
+                    print(f"⚡ Queued incremental agent job {job['job_id']}")
+            feed.stop_event.wait(poll_seconds)
+
+    threading.Thread(target=loop, name="alert-trigger", daemon=True).start()
+    return feed
+
+
+def get_job(job_id):
+    """
+    Return a snapshot of a job record, or None if it is unknown
+    """
+    with jobs_lock:
+        job = jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def queue_job(pipeline):
+    """
+    Queue a pipeline job and describe it for an API response
+    """
+    job, coalesced = submit_job(pipeline)
+    message = (
+        f"Joined in-flight {pipeline} job {job['job_id']}"
+        if coalesced
+        else f"Queued {pipeline} job {job['job_id']}"
+    )
+    print(f"📥 {message}")
+    return {
+        "success": True,
+        "message": message,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "coalesced": coalesced,
+        "status_url": f"/api/jobs/{job['job_id']}",
+    }
+
+
+def job_accepted_response(pipeline):
+    """
+    Queue a pipeline job and build the 202 response for it
+    """
+    return jsonify(queue_job(pipeline)), 202
+
+
+@app.route("/api/start-agent", methods=["POST"])
+def start_agent():
+    """
+    API endpoint to queue the agent: fetch data, generate alerts, and store to Firebase
+    """
+    try:
+        return job_accepted_response("agent")
     except Exception as e:
-        print(f"❌ Error in agent process: {e}")
+        print(f"❌ Error queueing agent process: {e}")
         return (
             jsonify(
                 {
@@ -374,38 +1736,88 @@ def start_agent():
         )
 
 
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    API endpoint to fetch the status and result of a queued agent job
+    """
+    job = get_job(job_id)
+    if job is None:
+        return (
+            jsonify({"success": False, "message": f"Job not found: {job_id}"}),
+            404,
+        )
+
+    return jsonify({"success": True, "job": job})
+
+
+@app.route("/api/agent-stats", methods=["GET"])
+def agent_stats():
+    """
+    API endpoint to fetch per-pipeline stage timings, model latency,
+    token usage and cost over recent runs
+    """
+    try:
+        limit = min(int(request.args.get("limit", 10)), telemetry.recent.maxlen)
+    except ValueError:
+        return (
+            jsonify({"success": False, "message": "limit must be an integer"}),
+            400,
+        )
+
+    return jsonify(
+        {
+            "success": True,
+            "pipelines": telemetry.summary(),
+            "recent_runs": telemetry.recent_runs(max(limit, 0)),
+        }
+    )
+
+
+@app.route("/api/retention", methods=["POST"])
+def retention():
+    """
+    API endpoint to queue archival of expired alerts and forecasts
+    """
+    try:
+        return job_accepted_response("retention")
+    except Exception as e:
+        print(f"❌ Error queueing retention: {e}")
+        return (
+            jsonify({"success": False, "message": f"Retention failed: {str(e)}"}),
+            500,
+        )
+
+
+def parse_page_args():
+    """
+    Read limit/before pagination parameters from the query string
+    """
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    before = request.args.get("before") or None
+    return limit, before
+
+
 @app.route("/api/alerts", methods=["GET"])
 def get_alerts():
     """
-    API endpoint to fetch alerts from Firebase
+    API endpoint to fetch alerts from Firebase, newest first.
+    Supports ?limit=N and ?before=<created_at cursor> pagination.
     """
     try:
-        url = f"{FIREBASE_DATABASE_URL}/alerts.json"
-        response = requests.get(url, timeout=10)
-
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                # Convert Firebase data to list and sort by creation time
-                alerts = list(data.values())
-                alerts.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        limit, before = parse_page_args()
+        alerts = fetch_latest("alerts", limit, before)
+        next_cursor = alerts[-1].get("created_at") if len(alerts) == limit else None
 
-                return jsonify(
-                    {"success": True, "alerts": alerts, "count": len(alerts)}
-                )
-            else:
-                return jsonify({"success": True, "alerts": [], "count": 0})
-        else:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": f"Failed to fetch alerts: {response.status_code}",
-                        "alerts": [],
-                    }
-                ),
-                500,
-            )
+        return jsonify(
+            {
+                "success": True,
+                "alerts": alerts,
+                "count": len(alerts),
+                "next_cursor": next_cursor,
+            }
+        )
 
     except Exception as e:
         print(f"❌ Error fetching alerts: {e}")
@@ -424,50 +1836,12 @@ def get_alerts():
 @app.route("/api/urban-forecast", methods=["POST"])
 def urban_forecast():
     """
-    API endpoint to generate urban forecasts based on upcoming events in Bengaluru
+    API endpoint to queue urban forecast generation based on upcoming events in Bengaluru
     """
     try:
-        print("🌆 Starting urban forecast process...")
-
-        # Step 1: Fetch forecast data from Firebase
-        forecast_data = fetch_forecast_data()
-
-        if not forecast_data:
-            return jsonify(
-                {
-                    "success": False,
-                    "message": "No forecast data available from Firebase",
-                    "forecasts_generated": 0,
-                }
-            )
-
-        # Step 2: Generate urban forecasts using Gemini
-        forecasts = generate_urban_forecasts(forecast_data)
-
-        if not forecasts:
-            return jsonify(
-                {
-                    "success": False,
-                    "message": "Failed to generate urban forecasts",
-                    "forecasts_generated": 0,
-                }
-            )
-
-        # Step 3: Store forecasts to Firebase
-        success = store_forecasts_to_firebase(forecasts)
-
-        return jsonify(
-            {
-                "success": success,
-                "message": f"Urban forecast completed successfully. Generated {len(forecasts)} forecasts.",
-                "forecasts_generated": len(forecasts),
-                "events_analyzed": len(forecast_data),
-                "forecasts": forecasts,
-            }
-        )
-
+        return job_accepted_response("urban_forecast")
     except Exception as e:
-        print(f"❌ Error in urban forecast process: {e}")
+        print(f"❌ Error queueing urban forecast process: {e}")
         return (
             jsonify(
                 {
@@ -480,6 +1854,43 @@ def urban_forecast():
         )
 
 
+def sse_event(event, data):
+    """
+    Format a Server-Sent Event carrying a JSON payload
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def job_event_stream(job_id):
+    """
+    Server-Sent Events for a job: its published events (for urban forecasts,
+    "status" and one "forecast" per forecast), then "done" or "error"
+    """
+    for item in iter_job_events(job_id):
+        if item is None:
+            yield ": keepalive\n\n"
+        else:
+            yield sse_event(*item)
+
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET"])
+def job_events_stream(job_id):
+    """
+    API endpoint to follow a queued job as Server-Sent Events. Every client
+    subscribes to the same run, so N dashboards cost one generation.
+    """
+    if get_job(job_id) is None:
+        return (
+            jsonify({"success": False, "message": f"Job not found: {job_id}"}),
+            404,
+        )
+    return Response(
+        stream_with_context(job_event_stream(job_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 def fetch_forecast_data():
     """
     Fetch upcoming events data from Firebase forecast collection
@@ -507,83 +1918,146 @@ def fetch_forecast_data():
         return []
 
 
-def generate_urban_forecasts(events_data):
+def build_urban_forecast_prompt(events_data):
     """
-    Generate urban forecasts using Gemini AI based on upcoming events
+    Build the Gemini prompt for urban forecasts from upcoming events
     """
-    try:
+    with telemetry.stage("prompt_build"):
         events_json = json.dumps(events_data, indent=2)
 
-        forecast_prompt = f"""
-        Given the following list of upcoming events in Bengaluru — each with title, time, and venue — generate urban forecasts and perceptions for the corresponding areas. Consider likely traffic patterns, crowd behavior, weather sensitivity, and civic impact. Identify where congestion, delays, increased activity, or public resource demand may spike.
+    return f"""
+    Given the following list of upcoming events in Bengaluru — each with title, time, and venue — generate urban forecasts and perceptions for the corresponding areas. Consider likely traffic patterns, crowd behavior, weather sensitivity, and civic impact. Identify where congestion, delays, increased activity, or public resource demand may spike.
 
-        Events Data:
-        {events_json}
+    Events Data:
+    {events_json}
 
-        Structure the response as JSON with the following fields for each forecast:
-        - area: Neighborhood or venue region
-        - expected_effects: Summary of predicted activity (e.g. "Moderate congestion due to clustered evening events")
-        - time_window: Approximate active hours
-        - signal_type: One of ["traffic", "crowd", "public_service", "quiet"]
-        - confidence: One of ["Low", "Medium", "High"]
+    Structure the response as JSON with the following fields for each forecast:
+    - area: Neighborhood or venue region
+    - expected_effects: Summary of predicted activity (e.g. "Moderate congestion due to clustered evening events")
+    - time_window: Approximate active hours
+    - signal_type: One of ["traffic", "crowd", "public_service", "quiet"]
+    - confidence: One of ["Low", "Medium", "High"]
 
-        Generate 3-8 forecasts based on the events provided. Focus on areas with multiple events or high-impact venues.
+    Generate 3-8 forecasts based on the events provided. Focus on areas with multiple events or high-impact venues.
 
-        Return response as valid JSON array with this exact format:
-        [
-          {{
-            "area": "Area/Neighborhood name",
-            "expected_effects": "Description of predicted activity and impact",
-            "time_window": "Time range (e.g., '6:00 PM - 10:00 PM')",
-            "signal_type": "traffic|crowd|public_service|quiet",
-            "confidence": "Low|Medium|High"
-          }}
-        ]
+    Return response as valid JSON array with this exact format:
+    [
+      {{
+        "area": "Area/Neighborhood name",
+        "expected_effects": "Description of predicted activity and impact",
+        "time_window": "Time range (e.g., '6:00 PM - 10:00 PM')",
+        "signal_type": "traffic|crowd|public_service|quiet",
+        "confidence": "Low|Medium|High"
+      }}
+    ]
 
-        Make sure the response is valid JSON only, no additional text.
-        """
+    Make sure the response is valid JSON only, no additional text.
+    """
 
-        response = call_gemini(forecast_prompt)
 
-        # Clean and parse the response
-        response_cleaned = response.strip()
-        if response_cleaned.startswith("```json"):
-            response_cleaned = (
-                response_cleaned.replace("```json", "").replace("```", "").strip()
-            )
+def add_forecast_metadata(forecast, index):
+    """
+    Add id, timestamp and source fields to a generated forecast
+    """
+    forecast["id"] = (
+        f"forecast_{index}_{hashlib.md5(forecast.get('area', '').encode()).hexdigest()[:8]}"
+    )
+    forecast["created_at"] = datetime.datetime.now().isoformat()
+    forecast.setdefault("source", "urban_forecast_ai")
+    return forecast
+
+
+def plan_urban_forecasts(events_data):
+    """
+    Merge overlapping events per area and forecast the groups whose venue
+    and time slot follow a known pattern without calling the model.
+    Returns (rule_forecasts, unmatched_groups).
+    """
+    groups = group_events(events_data)
+
+    rule_forecasts = []
+    unmatched_groups = []
+    with venue_history_lock:
+        for group in groups:
+            forecast = venue_history.predict(group)
+            if forecast is None:
+                unmatched_groups.append(group)
+            else:
+                rule_forecasts.append(forecast)
+
+    print(
+        f"⚡ {len(rule_forecasts)} of {len(groups)} event groups forecast from venue history"
+    )
+    return rule_forecasts, unmatched_groups
 
-        forecasts = json.loads(response_cleaned)
 
-        # Add metadata to each forecast
-        for i, forecast in enumerate(forecasts):
-            forecast["id"] = (
-                f"forecast_{i}_{hashlib.md5(forecast.get('area', '').encode()).hexdigest()[:8]}"
+def learn_urban_forecasts(forecasts, groups):
+    """
+    Record model forecasts in the venue history for future fast-path runs
+    """
+    with venue_history_lock:
+        learned = venue_history.learn(forecasts, groups)
+        venue_history.save()
+    print(f"🧠 Recorded {learned} forecast observations in venue history")
+
+
+def stream_urban_forecasts(events_data):
+    """
+    Generate urban forecasts with Gemini's streaming API, yielding each
+    forecast as soon as it has been completely generated
+    """
+    rule_forecasts, unmatched_groups = plan_urban_forecasts(events_data)
+
+    # Rule-based forecasts are ready immediately
+    count = 0
+    for forecast in rule_forecasts:
+        yield add_forecast_metadata(forecast, count)
+        count += 1
+
+    if unmatched_groups:
+        unmatched_events = [e for g in unmatched_groups for e in g["events"]]
+        forecast_prompt = build_urban_forecast_prompt(unmatched_events)
+
+        model_forecasts = []
+        rejected = 0
+        try:
+            for obj in iter_json_objects(call_gemini_stream(forecast_prompt)):
+                forecast = validate_item(obj, FORECAST_FIELDS)
+                if forecast is None:
+                    print("⚠️  Dropped streamed forecast that did not match the schema")
+                    rejected += 1
+                    continue
+                model_forecasts.append(forecast)
+                yield add_forecast_metadata(forecast, count)
+                count += 1
+        except GeminiCallError as e:
+            print(f"❌ {e}")
+        else:
+            telemetry.update_last_call(
+                parse_success=bool(model_forecasts),
+                items_parsed=len(model_forecasts),
+                items_rejected=rejected,
             )
-            forecast["created_at"] = datetime.datetime.now().isoformat()
-            forecast["source"] = "urban_forecast_ai"
 
-        print(f"✅ Generated {len(forecasts)} urban forecasts")
-        return forecasts
+        # Re-ask for missing forecasts once the stream is over, as
+        # generate_validated_items does for the non-streamed call
+        for _ in range(MAX_FOLLOWUP_PROMPTS):
+            missing = min(3, len(unmatched_groups)) - len(model_forecasts)
+            if missing <= 0:
+                break
+            print(f"🔁 Re-asking for {missing} missing urban forecasts")
+            answered = [
+                {field: f[field] for field in FORECAST_FIELDS} for f in model_forecasts
+            ]
+            prompt = followup_prompt(forecast_prompt, answered, missing)
+            for forecast in request_items(prompt, FORECAST_FIELDS):
+                model_forecasts.append(forecast)
+                yield add_forecast_metadata(forecast, count)
+                count += 1
 
-    except json.JSONDecodeError as e:
-        print(f"❌ Error parsing forecast JSON response: {e}")
-        print(f"Raw response: {response}")
-        # Return fallback forecast
-        return [
-            {
-                "area": "Central Bengaluru",
-                "expected_effects": "General urban activity patterns based on event data analysis",
-                "time_window": "Peak hours",
-                "signal_type": "traffic",
-                "confidence": "Medium",
-                "id": "fallback_forecast_1",
-                "created_at": datetime.datetime.now().isoformat(),
-                "source": "urban_forecast_ai",
-            }
-        ]
-    except Exception as e:
-        print(f"❌ Error generating urban forecasts: {e}")
-        return []
+        learn_urban_forecasts(model_forecasts, unmatched_groups)
+
+    print(f"✅ Streamed {count} urban forecasts")
 
 
 def store_forecasts_to_firebase(forecasts):
@@ -591,22 +2065,22 @@ def store_forecasts_to_firebase(forecasts):
     Store generated urban forecasts to Firebase urban_forecasts collection
     """
     try:
-        for forecast in forecasts:
-            # Store each forecast individually
-            forecast_url = (
-                f"{FIREBASE_DATABASE_URL}/urban_forecasts/{forecast['id']}.json"
-            )
-            response = requests.put(forecast_url, json=forecast, timeout=10)
+        forecasts_by_id = {forecast["id"]: forecast for forecast in forecasts}
 
-            if response.status_code == 200:
-                print(f"✅ Stored forecast for area: {forecast['area']}")
+        # Store all forecasts with a single multi-location update
+        results = batch_write_to_firebase("urban_forecasts", forecasts_by_id)
+        invalidate_read_cache("urban_forecasts")
+
+        for forecast_id, ok in results.items():
+            area = forecasts_by_id[forecast_id]["area"]
+            if ok:
+                print(f"✅ Stored forecast for area: {area}")
             else:
-                print(
-                    f"❌ Failed to store forecast for {forecast['area']}: {response.status_code}"
-                )
+                print(f"❌ Failed to store forecast for {area}")
 
-        print(f"📊 Stored {len(forecasts)} urban forecasts to Firebase")
-        return True
+        stored = sum(results.values())
+        print(f"📊 Stored {stored}/{len(forecasts)} urban forecasts to Firebase")
+        return stored == len(forecasts_by_id)
 
     except Exception as e:
         print(f"❌ Error storing forecasts to Firebase: {e}")
@@ -616,35 +2090,24 @@ def store_forecasts_to_firebase(forecasts):
 @app.route("/api/forecasts", methods=["GET"])
 def get_forecasts():
     """
-    API endpoint to fetch urban forecasts from Firebase
+    API endpoint to fetch forecasts from Firebase, newest first.
+    Supports ?limit=N and ?before=<created_at cursor> pagination.
     """
     try:
-        url = f"{FIREBASE_DATABASE_URL}/urban_forecasts.json"
-        response = requests.get(url, timeout=10)
-
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                # Convert Firebase data to list and sort by creation time
-                forecasts = list(data.values())
-                forecasts.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        limit, before = parse_page_args()
+        forecasts = fetch_latest("urban_forecasts", limit, before)
+        next_cursor = (
+            forecasts[-1].get("created_at") if len(forecasts) == limit else None
+        )
 
-                return jsonify(
-                    {"success": True, "forecasts": forecasts, "count": len(forecasts)}
-                )
-            else:
-                return jsonify({"success": True, "forecasts": [], "count": 0})
-        else:
-            return (
-                jsonify(
-                    {
-                        "success": False,
-                        "message": f"Failed to fetch forecasts: {response.status_code}",
-                        "forecasts": [],
-                    }
-                ),
-                500,
-            )
+        return jsonify(
+            {
+                "success": True,
+                "forecasts": forecasts,
+                "count": len(forecasts),
+                "next_cursor": next_cursor,
+            }
+        )
 
     except Exception as e:
         print(f"❌ Error fetching forecasts: {e}")
@@ -694,13 +2157,31 @@ if __name__ == "__main__":
     parser.add_argument(
         "--test", action="store_true", help="Test alert generation with sample data"
     )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Generate alerts automatically as new source records arrive",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Archive and remove expired alerts and forecasts",
+    )
 
     args = parser.parse_args()
 
+    if args.watch:
+        print(f"👀 Watching {', '.join(WATCH_COLLECTIONS)} for new records...")
+        feed = watch_for_alerts()
+
     if args.server:
         print("🚀 Starting Flask server...")
         port = int(os.environ.get("PORT", 5000))
         app.run(host="0.0.0.0", port=port, debug=False)
+    elif args.compact:
+        print("🧹 Running retention compaction...")
+        summary = run_retention(force=True)
+        print(f"Removed {sum(summary.values())} expired items: {summary}")
     elif args.test:
         print("🧪 Testing alert generation...")
         firebase_data = fetch_firebase_data()
@@ -708,6 +2189,12 @@ if __name__ == "__main__":
         print(f"Generated {len(alerts)} alerts:")
         for alert in alerts:
             print(f"- {alert.get('title', 'No title')}")
+    elif args.watch:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            feed.stop()
     else:
         print("Use --server to run Flask server or --test to test alert generation")
         print("Example: python agent.py --server")
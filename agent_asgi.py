@@ -0,0 +1,307 @@
+# Async (ASGI) server for the agent API: the same endpoints as
+# `python agent.py --server`, on an event loop. Firebase reads are awaited
+# with a pooled async HTTP client and concurrent readers of a page share one
+# upstream request, so reads stay responsive while generation jobs run on
+# the agent's background workers.
+#
+#   uvicorn agent_asgi:app --host 0.0.0.0 --port 5000
+#
+# Set AGENT_WATCH=1 to also follow the source collections (like --watch).
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+import agent
+
+# Page loads in flight, so concurrent readers of a page share one request
+inflight_pages = {}  # (collection, limit, before) -> asyncio.Task
+firebase_client = None
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Open the Firebase client (and optionally the change feed) per process"""
+    global firebase_client
+    firebase_client = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    feed = None
+    if os.getenv("AGENT_WATCH") == "1":
+        print(f"👀 Watching {', '.join(agent.WATCH_COLLECTIONS)} for new records...")
+        feed = agent.watch_for_alerts()
+    try:
+        yield
+    finally:
+        if feed is not None:
+            feed.stop()
+        await firebase_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+async def query_by_created_at(collection, params):
+    """
+    Async counterpart of agent.query_by_created_at: run a created_at-ordered
+    query, falling back to a full download without a created_at index
+    """
+    url = f"{agent.FIREBASE_DATABASE_URL.rstrip('/')}/{collection}.json"
+    response = await firebase_client.get(
+        url, params={"orderBy": '"created_at"', **params}
+    )
+
+    if response.status_code == 400:
+        print(f"⚠️  No created_at index on {collection}, fetching full collection")
+        response = await firebase_client.get(url)
+
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code}")
+
+    data = response.json() or {}
+    if isinstance(data, list):
+        data = {str(i): item for i, item in enumerate(data) if item}
+    return data
+
+
+async def load_page(cache_key):
+    """Load one page of a collection from Firebase and cache it"""
+    collection, limit, before = cache_key
+    data = await query_by_created_at(
+        collection, agent.latest_query_params(limit, before)
+    )
+    items = agent.select_latest(data, limit, before)
+    agent.cache_page(cache_key, items)
+    return items
+
+
+async def fetch_latest(collection, limit, before=None):
+    """
+    Async counterpart of agent.fetch_latest, sharing its read cache
+    """
+    cache_key = (collection, limit, before)
+    items = agent.get_cached_page(cache_key)
+    if items is not None:
+        return items
+
+    task = inflight_pages.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(load_page(cache_key))
+        inflight_pages[cache_key] = task
+        task.add_done_callback(lambda _: inflight_pages.pop(cache_key, None))
+    return await asyncio.shield(task)
+
+
+def clamp_limit(limit):
+    """Keep a requested page size within 1..MAX_PAGE_SIZE"""
+    return max(1, min(limit, agent.MAX_PAGE_SIZE))
+
+
+async def job_event_stream(job_id):
+    """
+    Async counterpart of agent.job_event_stream. Rather than parking a
+    thread per client on agent.jobs_changed, the job wakes this generator
+    through the event loop whenever it publishes.
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    def wake():
+        try:
+            loop.call_soon_threadsafe(changed.set)
+        except RuntimeError:
+            pass  # event loop closed
+
+    agent.add_job_listener(job_id, wake)
+    sent = 0
+    try:
+        while True:
+            # Clear before reading, so an event published meanwhile re-sets it
+            changed.clear()
+            new_events = agent.job_events_since(job_id, sent)
+            if new_events is None:
+                return
+            sent += len(new_events)
+            for event, data in new_events:
+                yield agent.sse_event(event, data)
+                if event in ("done", "error"):
+                    return
+            if new_events:
+                continue
+            try:
+                await asyncio.wait_for(
+                    changed.wait(), agent.JOB_EVENT_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        agent.remove_job_listener(job_id, wake)
+
+
+def queued_job_response(pipeline, failure_message, **failure_fields):
+    """Queue a pipeline job and build the 202 (or 500) response for it"""
+    try:
+        return JSONResponse(agent.queue_job(pipeline), status_code=202)
+    except Exception as e:
+        print(f"❌ Error queueing {pipeline} process: {e}")
+        return JSONResponse(
+            {
+                "success": False,
+                "message": f"{failure_message}: {str(e)}",
+                **failure_fields,
+            },
+            status_code=500,
+        )
+
+
+@app.post("/api/start-agent")
+async def start_agent():
+    """Queue the agent: fetch data, generate alerts, and store to Firebase"""
+    return queued_job_response("agent", "Agent failed", alerts_generated=0)
+
+
+@app.post("/api/urban-forecast")
+async def urban_forecast():
+    """Queue urban forecast generation based on upcoming events"""
+    return queued_job_response(
+        "urban_forecast", "Urban forecast failed", forecasts_generated=0
+    )
+
+
+@app.post("/api/retention")
+async def retention():
+    """Queue archival of expired alerts and forecasts"""
+    return queued_job_response("retention", "Retention failed")
+
+
+@app.get("/api/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Fetch the status and result of a queued agent job"""
+    job = agent.get_job(job_id)
+    if job is None:
+        return JSONResponse(
+            {"success": False, "message": f"Job not found: {job_id}"},
+            status_code=404,
+        )
+    return {"success": True, "job": job}
+
+
+@app.get("/api/agent-stats")
+async def agent_stats(limit: int = 10):
+    """Per-pipeline stage timings, model latency, token usage and cost"""
+    limit = min(limit, agent.telemetry.recent.maxlen)
+    return {
+        "success": True,
+        "pipelines": agent.telemetry.summary(),
+        "recent_runs": agent.telemetry.recent_runs(max(limit, 0)),
+    }
+
+
+@app.get("/api/alerts")
+async def get_alerts(
+    limit: int = agent.DEFAULT_PAGE_SIZE, before: Optional[str] = Query(None)
+):
+    """Fetch alerts newest first, with ?limit=N&before=<created_at cursor>"""
+    limit = clamp_limit(limit)
+    try:
+        alerts = await fetch_latest("alerts", limit, before or None)
+    except Exception as e:
+        print(f"❌ Error fetching alerts: {e}")
+        return JSONResponse(
+            {
+                "success": False,
+                "message": f"Failed to fetch alerts: {str(e)}",
+                "alerts": [],
+            },
+            status_code=500,
+        )
+
+    next_cursor = alerts[-1].get("created_at") if len(alerts) == limit else None
+    return {
+        "success": True,
+        "alerts": alerts,
+        "count": len(alerts),
+        "next_cursor": next_cursor,
+    }
+
+
+@app.get("/api/forecasts")
+async def get_forecasts(
+    limit: int = agent.DEFAULT_PAGE_SIZE, before: Optional[str] = Query(None)
+):
+    """Fetch forecasts newest first, with ?limit=N&before=<created_at cursor>"""
+    limit = clamp_limit(limit)
+    try:
+        forecasts = await fetch_latest("urban_forecasts", limit, before or None)
+    except Exception as e:
+        print(f"❌ Error fetching forecasts: {e}")
+        return JSONResponse(
+            {
+                "success": False,
+                "message": f"Failed to fetch forecasts: {str(e)}",
+                "forecasts": [],
+            },
+            status_code=500,
+        )
+
+    next_cursor = forecasts[-1].get("created_at") if len(forecasts) == limit else None
+    return {
+        "success": True,
+        "forecasts": forecasts,
+        "count": len(forecasts),
+        "next_cursor": next_cursor,
+    }
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events_stream(job_id: str):
+    """Follow a queued job (e.g. urban forecasts) as Server-Sent Events"""
+    if agent.get_job(job_id) is None:
+        return JSONResponse(
+            {"success": False, "message": f"Job not found: {job_id}"},
+            status_code=404,
+        )
+    return StreamingResponse(
+        job_event_stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/test-forecast")
+async def test_forecast():
+    """Check forecast data availability"""
+    try:
+        forecast_data = await run_in_threadpool(agent.fetch_forecast_data)
+    except Exception as e:
+        return JSONResponse(
+            {"success": False, "message": f"Test failed: {str(e)}", "events_found": 0},
+            status_code=500,
+        )
+    return {
+        "success": True,
+        "message": "Forecast data test completed",
+        "events_found": len(forecast_data),
+        "sample_events": forecast_data[:3] if forecast_data else [],
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,236 @@
+import datetime
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class AgentTelemetry:
+    """
+    Per-run stage timings and model call metrics for agent pipelines.
+
+    A run is bound to the thread executing it, so helpers deep in the
+    pipeline can record stages and model calls without threading a metrics
+    object through every function. Outside a run, recording is a no-op.
+    Finished runs are kept in memory for /api/agent-stats and appended to a
+    local JSONL log.
+    """
+
+    def __init__(
+        self,
+        log_path="agent_metrics.jsonl",
+        history=100,
+        input_cost_per_mtok=0.0,
+        output_cost_per_mtok=0.0,
+    ):
+        self.log_path = log_path
+        self.input_cost_per_mtok = input_cost_per_mtok
+        self.output_cost_per_mtok = output_cost_per_mtok
+        self.recent = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def current(self):
+        """The run bound to the calling thread, if any"""
+        return getattr(self.local, "run", None)
+
+    @contextmanager
+    def run(self, pipeline):
+        """Record everything inside the block as one pipeline run"""
+        run = {
+            "pipeline": pipeline,
+            "started_at": datetime.datetime.now().isoformat(),
+            "stages": {},
+            "calls": [],
+            "status": "succeeded",
+        }
+        previous = self.current
+        self.local.run = run
+        start = time.perf_counter()
+        try:
+            yield run
+        except Exception:
+            run["status"] = "failed"
+            raise
+        finally:
+            run["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self.local.run = previous
+            self.finish(run)
+
+    def track(self, pipeline):
+        """
+        Decorator recording each call of a pipeline function as a run.
+        Results with "success": False are recorded as failed runs.
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.run(pipeline):
+                    result = func(*args, **kwargs)
+                    if isinstance(result, dict) and not result.get("success", True):
+                        self.set_status("failed")
+                    return result
+
+            return wrapper
+
+        return decorator
+
+    def propagate(self, func):
+        """
+        Wrap a function handed to a worker pool (e.g. map-reduce chunk
+        summaries) so its stages and model calls count towards the
+        pipeline run that wrapped it
+        """
+        run = self.current
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            previous = self.current
+            self.local.run = run
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.local.run = previous
+
+        return wrapper
+
+    @contextmanager
+    def stage(self, name):
+        """Add the time spent inside the block to a named stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, (time.perf_counter() - start) * 1000)
+
+    def add_stage_time(self, name, elapsed_ms):
+        """Add a measured duration to a named stage of the current run"""
+        run = self.current
+        if run is not None:
+            # Map chunks summarized in parallel each add their own model time
+            with self.lock:
+                run["stages"][name] = round(run["stages"].get(name, 0) + elapsed_ms, 1)
+
+    def record_call(self, **metrics):
+        """Record one model call in the current run"""
+        run = self.current
+        if run is None:
+            return
+        metrics["cost_usd"] = round(
+            metrics.get("input_tokens", 0) * self.input_cost_per_mtok / 1e6
+            + metrics.get("output_tokens", 0) * self.output_cost_per_mtok / 1e6,
+            6,
+        )
+        with self.lock:
+            run["calls"].append(metrics)
+        self.local.last_call = (run, metrics)
+
+    def update_last_call(self, **fields):
+        """
+        Attach outcome fields (e.g. parse results) to the latest call made
+        on this thread
+        """
+        run, call = getattr(self.local, "last_call", (None, None))
+        if run is not None and run is self.current:
+            call.update(fields)
+
+    def set_status(self, status):
+        """Override the outcome of the current run"""
+        run = self.current
+        if run is not None:
+            run["status"] = status
+
+    def finish(self, run):
+        """Total up a finished run, keep it in memory and append it to the log"""
+        calls = run["calls"]
+        run["totals"] = {
+            "calls": len(calls),
+            "input_tokens": sum(c.get("input_tokens", 0) for c in calls),
+            "output_tokens": sum(c.get("output_tokens", 0) for c in calls),
+            "model_ms": round(sum(c.get("latency_ms", 0) for c in calls), 1),
+            "cost_usd": round(sum(c.get("cost_usd", 0) for c in calls), 6),
+        }
+
+        with self.lock:
+            self.recent.append(run)
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(run, ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"❌ Error writing agent metrics: {e}")
+
+    def summary(self):
+        """Aggregate the recent runs per pipeline"""
+        with self.lock:
+            runs = list(self.recent)
+
+        pipelines = {}
+        for run in runs:
+            pipelines.setdefault(run["pipeline"], []).append(run)
+
+        summary = {}
+        for pipeline, pipeline_runs in pipelines.items():
+            totals = [r["total_ms"] for r in pipeline_runs]
+            calls = [c for r in pipeline_runs for c in r["calls"]]
+            parsed = [c for c in calls if "parse_success" in c]
+            cached = [c for c in calls if c.get("cache") in ("hit", "miss")]
+
+            stage_names = {name for r in pipeline_runs for name in r["stages"]}
+            stages = {}
+            for name in sorted(stage_names):
+                values = [
+                    r["stages"][name] for r in pipeline_runs if name in r["stages"]
+                ]
+                stages[name] = {
+                    "avg_ms": round(sum(values) / len(values), 1),
+                    "p95_ms": percentile(values, 95),
+                }
+
+            latencies = [c["latency_ms"] for c in calls if "latency_ms" in c]
+            summary[pipeline] = {
+                "runs": len(pipeline_runs),
+                "failed_runs": sum(r["status"] != "succeeded" for r in pipeline_runs),
+                "total_ms": {
+                    "p50": percentile(totals, 50),
+                    "p95": percentile(totals, 95),
+                },
+                "stages": stages,
+                "model_calls": {
+                    "count": len(calls),
+                    "latency_p50_ms": percentile(latencies, 50),
+                    "latency_p95_ms": percentile(latencies, 95),
+                    "input_tokens": sum(c.get("input_tokens", 0) for c in calls),
+                    "output_tokens": sum(c.get("output_tokens", 0) for c in calls),
+                    "cost_usd": round(sum(c.get("cost_usd", 0) for c in calls), 6),
+                    "parse_success_rate": (
+                        round(sum(c["parse_success"] for c in parsed) / len(parsed), 3)
+                        if parsed
+                        else None
+                    ),
+                    "cache_hit_rate": (
+                        round(sum(c["cache"] == "hit" for c in cached) / len(cached), 3)
+                        if cached
+                        else None
+                    ),
+                },
+            }
+        return summary
+
+    def recent_runs(self, limit=10):
+        """Return the most recent finished runs, oldest first"""
+        with self.lock:
+            runs = list(self.recent)
+        return runs[max(0, len(runs) - limit) :]
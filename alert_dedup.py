@@ -0,0 +1,198 @@
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from atomic_file import atomic_write
+
+# Universal hashing modulus for MinHash permutations. Shingle hashes and
+# permutation coefficients are kept below 2**32 so a * h + b fits in uint64.
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_text(text):
+    """Lowercase text and collapse punctuation and whitespace"""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def shingle(text, size=5):
+    """Split text into the set of its overlapping character n-grams"""
+    text = normalize_text(text)
+    if len(text) <= size:
+        return {text}
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class AlertLSHIndex:
+    """
+    MinHash locality-sensitive hashing index over recent alert text.
+
+    Each alert is reduced to a MinHash signature over its character
+    shingles. The signature is split into bands, and alerts sharing any
+    band bucket are candidate near-duplicates. Candidates are then confirmed
+    by their estimated Jaccard similarity. Entries older than the window are
+    pruned, and the index is persisted to a local JSON file between runs.
+    """
+
+    def __init__(
+        self,
+        path="alert_index.json",
+        num_perm=64,
+        bands=16,
+        threshold=0.5,
+        window_hours=24,
+        seed=1,
+    ):
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.window = datetime.timedelta(hours=window_hours)
+
+        rng = random.Random(seed)
+        self.perm_a = np.array(
+            [rng.randrange(1, 1 << 32) for _ in range(num_perm)], dtype=np.uint64
+        )
+        self.perm_b = np.array(
+            [rng.randrange(0, 1 << 32) for _ in range(num_perm)], dtype=np.uint64
+        )
+
+        self.entries = {}  # alert_id -> {"signature", "created_at", "occurrences"}
+        self.buckets = [defaultdict(set) for _ in range(bands)]
+        self.lock = threading.Lock()
+        self.loaded = self.load()
+
+    def signature(self, text):
+        """Compute the MinHash signature of a piece of text"""
+        hashes = np.array(
+            [
+                int.from_bytes(
+                    hashlib.blake2b(s.encode(), digest_size=4).digest(), "big"
+                )
+                for s in shingle(text)
+            ],
+            dtype=np.uint64,
+        )
+        permuted = (np.outer(hashes, self.perm_a) + self.perm_b) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=0).tolist()
+
+    def band_keys(self, signature):
+        """Yield (band, bucket key) pairs for a signature"""
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows : (band + 1) * self.rows])
+
+    def similarity(self, sig_a, sig_b):
+        """Estimate Jaccard similarity from two signatures"""
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / self.num_perm
+
+    def find_duplicate(self, text):
+        """
+        Return (alert_id, similarity) of the most similar indexed alert at
+        or above the threshold, or (None, 0.0) if there is none
+        """
+        signature = self.signature(text)
+        with self.lock:
+            candidates = set()
+            for band, key in self.band_keys(signature):
+                candidates |= self.buckets[band].get(key, set())
+
+            best_id, best_similarity = None, 0.0
+            for alert_id in candidates:
+                similarity = self.similarity(
+                    signature, self.entries[alert_id]["signature"]
+                )
+                if similarity >= self.threshold and similarity > best_similarity:
+                    best_id, best_similarity = alert_id, similarity
+            return best_id, best_similarity
+
+    def add(self, alert_id, text, created_at, occurrences=1):
+        """Index an alert's text under its id"""
+        signature = self.signature(text)
+        with self.lock:
+            self._remove(alert_id)
+            self.entries[alert_id] = {
+                "signature": signature,
+                "created_at": created_at,
+                "occurrences": occurrences,
+            }
+            for band, key in self.band_keys(signature):
+                self.buckets[band][key].add(alert_id)
+
+    def refresh(self, alert_id, seen_at):
+        """Record another sighting of an indexed alert, returning its entry"""
+        with self.lock:
+            entry = self.entries[alert_id]
+            entry["created_at"] = seen_at
+            entry["occurrences"] += 1
+            return dict(entry)
+
+    def remove(self, alert_id):
+        """Drop an alert from the index"""
+        with self.lock:
+            self._remove(alert_id)
+
+    def _remove(self, alert_id):
+        entry = self.entries.pop(alert_id, None)
+        if entry is None:
+            return
+        for band, key in self.band_keys(entry["signature"]):
+            bucket = self.buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(alert_id)
+                if not bucket:
+                    del self.buckets[band][key]
+
+    def prune(self):
+        """Drop alerts that fall outside the deduplication window"""
+        cutoff = (datetime.datetime.now() - self.window).isoformat()
+        with self.lock:
+            expired = [
+                alert_id
+                for alert_id, entry in self.entries.items()
+                if entry["created_at"] < cutoff
+            ]
+            for alert_id in expired:
+                self._remove(alert_id)
+        return len(expired)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self):
+        """Load persisted entries, returning False if there is no index file"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"❌ Error loading alert index {self.path}: {e}")
+            return False
+
+        if data.get("num_perm") != self.num_perm:
+            print("⚠️  Alert index was built with different parameters, rebuilding")
+            return False
+
+        with self.lock:
+            for alert_id, entry in data.get("alerts", {}).items():
+                self.entries[alert_id] = entry
+                for band, key in self.band_keys(entry["signature"]):
+                    self.buckets[band][key].add(alert_id)
+        self.prune()
+        return True
+
+    def save(self):
+        """Persist the index so it survives restarts"""
+        self.prune()
+        with self.lock:
+            data = {"num_perm": self.num_perm, "alerts": self.entries}
+            with atomic_write(self.path) as f:
+                json.dump(data, f)
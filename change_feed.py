@@ -0,0 +1,226 @@
+import json
+import random
+import threading
+import time
+
+import requests
+
+
+def iter_sse_events(lines):
+    """Parse Server-Sent Event lines into (event, data) pairs"""
+    event, data = None, []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line:
+            if event is not None or data:
+                yield event, "\n".join(data)
+            event, data = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:") :].strip())
+
+
+class FirebaseChangeFeed:
+    """
+    Follows Firebase Realtime Database collections over the REST streaming
+    API and reports records added after the feed started.
+
+    Each collection gets a background thread holding an event-stream
+    connection. Before the first connection a plain read of the newest key
+    learns where the collection currently ends; every stream then starts at
+    the last key seen, so records written while disconnected are still
+    reported. A limited stream would drop children that enter and leave
+    its window in a single multi-child write. Keys are assumed to sort in
+    insertion order (timestamp prefixed or push ids).
+    """
+
+    def __init__(
+        self,
+        base_url,
+        collections,
+        on_records,
+        read_timeout=90,
+        max_backoff=60,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.collections = collections
+        self.on_records = on_records
+        self.read_timeout = read_timeout
+        self.max_backoff = max_backoff
+        self.last_keys = {}  # collection -> newest key seen
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.session = requests.Session()
+
+    def start(self):
+        """Start following every collection in the background"""
+        for collection in self.collections:
+            thread = threading.Thread(
+                target=self.follow,
+                args=(collection,),
+                name=f"change-feed-{collection}",
+                daemon=True,
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        """Ask every follower thread to exit"""
+        self.stop_event.set()
+
+    def follow(self, collection):
+        """Keep a stream open for one collection, reconnecting with backoff"""
+        failures = 0
+        while not self.stop_event.is_set():
+            try:
+                self.stream(collection)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"⚠️  Change feed for {collection} dropped: {e}")
+
+            delay = min(self.max_backoff, 2**failures) * random.uniform(0.5, 1.0)
+            self.stop_event.wait(delay)
+
+    def newest_key(self, collection):
+        """Return the newest key in a collection, or "" if it is empty"""
+        response = self.session.get(
+            f"{self.base_url}/{collection}.json",
+            params={"orderBy": '"$key"', "limitToLast": 1},
+            timeout=(10, self.read_timeout),
+        )
+        response.raise_for_status()
+        return max(response.json() or {}, default="")
+
+    def stream(self, collection):
+        """Consume one streaming connection until it closes"""
+        if collection not in self.last_keys:
+            self.last_keys[collection] = self.newest_key(collection)
+
+        with self.session.get(
+            f"{self.base_url}/{collection}.json",
+            params={
+                "orderBy": '"$key"',
+                "startAt": json.dumps(self.last_keys[collection]),
+            },
+            headers={"Accept": "text/event-stream"},
+            stream=True,
+            timeout=(10, self.read_timeout),
+        ) as response:
+            response.raise_for_status()
+            print(f"👂 Watching {collection} for new records")
+
+            for event, data in iter_sse_events(response.iter_lines()):
+                if self.stop_event.is_set():
+                    return
+                if event in ("cancel", "auth_revoked"):
+                    raise RuntimeError(f"stream {event}: {data}")
+                if event not in ("put", "patch"):
+                    continue  # keep-alive
+
+                records = self.new_records(collection, event, json.loads(data))
+                if records:
+                    self.on_records(collection, records)
+
+    def new_records(self, collection, event, payload):
+        """
+        Extract records with keys newer than the last one seen from a
+        put/patch payload, and advance the last key
+        """
+        path = payload.get("path", "/").strip("/")
+        data = payload.get("data")
+
+        if not path:
+            children = data if isinstance(data, dict) else {}
+        elif "/" not in path and event == "put":
+            children = {path: data}
+        else:
+            # Field-level updates to an existing record are not new signal
+            return []
+
+        last_key = self.last_keys.get(collection, "")
+        records = []
+        for key in sorted(children):
+            record = children[key]
+            if not isinstance(record, dict):
+                continue  # deletions
+            if key > last_key:
+                records.append(record)
+                last_key = key
+        self.last_keys[collection] = last_key
+        return records
+
+
+class DebouncedTrigger:
+    """
+    Decides when accumulated change notifications justify a run.
+
+    A run is due once at least `min_records` have arrived and either no
+    new record has arrived for `debounce_seconds`, or the oldest pending
+    record has waited `max_wait_seconds`. Urgent records make a run due
+    immediately. Runs are never closer together than `min_interval_seconds`.
+    """
+
+    def __init__(
+        self,
+        min_records=5,
+        debounce_seconds=60,
+        max_wait_seconds=300,
+        min_interval_seconds=900,
+    ):
+        self.min_records = min_records
+        self.debounce_seconds = debounce_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.pending = 0
+        self.first_pending_at = None
+        self.last_pending_at = None
+        self.last_run_at = None
+        self.urgent = False
+        self.lock = threading.Lock()
+
+    def add(self, count, now=None, urgent=False):
+        """Note that `count` new records have arrived"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if self.pending == 0:
+                self.first_pending_at = now
+            self.pending += count
+            self.last_pending_at = now
+            self.urgent = self.urgent or urgent
+
+    def due(self, now=None):
+        """Return True if a run should start now"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            if not self.pending:
+                return False
+            if (
+                self.last_run_at is not None
+                and now - self.last_run_at < self.min_interval_seconds
+            ):
+                return False
+            if self.urgent:
+                return True
+            if self.pending < self.min_records:
+                return False
+            return (
+                now - self.last_pending_at >= self.debounce_seconds
+                or now - self.first_pending_at >= self.max_wait_seconds
+            )
+
+    def mark_run(self, now=None):
+        """
+        Reset the pending count after a new run has been started. Not to be
+        called when the run was coalesced into one already in flight, whose
+        snapshot may predate the pending records.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.pending = 0
+            self.first_pending_at = None
+            self.last_pending_at = None
+            self.last_run_at = now
+            self.urgent = False
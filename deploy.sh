@@ -73,8 +73,8 @@ echo ""
 echo "📋 Next steps:"
 echo "1. Edit .env file with your Firebase credentials"
 echo "2. Start the backend server: python main.py"
-echo "3. Start the agent server: python agent.py"
-echo "4. Start the scrapers: cd Scrapers && python central_scraper.py"
+echo "3. Start the agent server: uvicorn agent_asgi:app --port 5000"
+echo "4. Start the scraper scheduler: cd Scrapers && python scheduler.py"
 echo "5. Frontend is built and ready for serving"
 echo ""
 echo "🔧 Development mode:"
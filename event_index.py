@@ -0,0 +1,279 @@
+import datetime
+import json
+import os
+from collections import Counter, defaultdict
+
+from atomic_file import atomic_write
+from report_clusters import normalize_location, parse_timestamp
+
+# Events without an end time are assumed to last this long
+DEFAULT_EVENT_HOURS = 3
+
+
+class IntervalTree:
+    """
+    Static centered interval tree over (start, end, value) tuples.
+    Supports finding every interval that overlaps a query window.
+    """
+
+    def __init__(self, intervals):
+        self.center = None
+        self.left = None
+        self.right = None
+        self.by_start = []
+        self.by_end = []
+        if not intervals:
+            return
+
+        points = sorted(p for start, end, _ in intervals for p in (start, end))
+        self.center = points[len(points) // 2]
+
+        left = [iv for iv in intervals if iv[1] < self.center]
+        right = [iv for iv in intervals if iv[0] > self.center]
+        here = [iv for iv in intervals if iv[0] <= self.center <= iv[1]]
+
+        self.by_start = sorted(here, key=lambda iv: iv[0])
+        self.by_end = sorted(here, key=lambda iv: iv[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def overlapping(self, start, end):
+        """Return every interval that overlaps [start, end]"""
+        result = []
+        self._query(start, end, result)
+        return result
+
+    def _query(self, start, end, result):
+        if self.center is None:
+            return
+
+        if end < self.center:
+            for iv in self.by_start:
+                if iv[0] > end:
+                    break
+                result.append(iv)
+            if self.left:
+                self.left._query(start, end, result)
+        elif start > self.center:
+            for iv in self.by_end:
+                if iv[1] < start:
+                    break
+                result.append(iv)
+            if self.right:
+                self.right._query(start, end, result)
+        else:
+            result.extend(self.by_start)
+            if self.left:
+                self.left._query(start, end, result)
+            if self.right:
+                self.right._query(start, end, result)
+
+
+def event_window(event):
+    """Return an event's (start, end) datetimes, or (None, None) if undated"""
+    start = parse_timestamp(
+        {
+            field: event.get(field)
+            for field in ("start_time", "time", "date", "timestamp")
+        }
+    )
+    if start is None:
+        return None, None
+
+    end = parse_timestamp({"timestamp": event.get("end_time") or event.get("end")})
+    if (
+        end is not None
+        and end.time() == datetime.time(0)
+        and end.date() >= start.date()
+    ):
+        # Date-only end times cover the whole day
+        end += datetime.timedelta(days=1)
+    if end is None or end <= start:
+        end = start + datetime.timedelta(hours=DEFAULT_EVENT_HOURS)
+    return start, end
+
+
+def time_slot(start):
+    """Bucket a start time into a weekday/weekend and time-of-day slot"""
+    if start is None:
+        return "undated"
+    day = "weekend" if start.weekday() >= 5 else "weekday"
+    if 5 <= start.hour < 12:
+        part = "morning"
+    elif 12 <= start.hour < 17:
+        part = "afternoon"
+    elif 17 <= start.hour < 21:
+        part = "evening"
+    else:
+        part = "night"
+    return f"{day}_{part}"
+
+
+def format_window(start, end):
+    """Format an event window the way forecasts present time_window"""
+    if start is None:
+        return "Varies"
+
+    def clock(t):
+        return t.strftime("%I:%M %p").lstrip("0")
+
+    if end - start <= datetime.timedelta(hours=24):
+        return f"{clock(start)} - {clock(end)}"
+    return f"{start.strftime('%d %b')} {clock(start)} - {end.strftime('%d %b')}"
+
+
+def group_events(events):
+    """
+    Merge events in the same area whose time windows overlap.
+
+    Returns groups with the area, merged start/end, time slot and the
+    member events. Undated events are grouped per area.
+    """
+    dated = []
+    undated = defaultdict(list)
+    for event in events:
+        if not isinstance(event, dict):
+            continue
+        area = normalize_location(event)
+        start, end = event_window(event)
+        if start is None:
+            undated[area].append(event)
+        else:
+            dated.append((start, end, (area, event)))
+
+    # Union overlapping intervals that share an area
+    parent = list(range(len(dated)))
+    position = {id(iv): i for i, iv in enumerate(dated)}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    tree = IntervalTree(dated)
+    for i, (start, end, (area, _)) in enumerate(dated):
+        for iv in tree.overlapping(start, end):
+            j = position[id(iv)]
+            if iv[2][0] == area:
+                parent[find(i)] = find(j)
+
+    members = defaultdict(list)
+    for i in range(len(dated)):
+        members[find(i)].append(dated[i])
+
+    groups = []
+    for intervals in members.values():
+        start = min(iv[0] for iv in intervals)
+        end = max(iv[1] for iv in intervals)
+        groups.append(
+            {
+                "area": intervals[0][2][0],
+                "start": start,
+                "end": end,
+                "slot": time_slot(start),
+                "events": [iv[2][1] for iv in intervals],
+            }
+        )
+    for area, area_events in undated.items():
+        groups.append(
+            {
+                "area": area,
+                "start": None,
+                "end": None,
+                "slot": "undated",
+                "events": area_events,
+            }
+        )
+
+    groups.sort(key=lambda g: (g["start"] is None, g["start"] or datetime.datetime.min))
+    return groups
+
+
+class VenueHistory:
+    """
+    Per-area, per-time-slot history of forecasts the model has produced.
+
+    Once an area and slot have been forecast consistently often enough, new
+    event groups matching them get a deterministic forecast from the history
+    instead of a model call. The history is persisted to a local JSON file.
+    """
+
+    def __init__(self, path="venue_history.json", min_observations=2, agreement=0.66):
+        self.path = path
+        self.min_observations = min_observations
+        self.agreement = agreement
+        self.areas = {}  # area -> slot -> entry
+        self.load()
+
+    def predict(self, group):
+        """Return a rule-based forecast for an event group, or None"""
+        entry = self.areas.get(group["area"], {}).get(group["slot"])
+        if not entry or entry["observations"] < self.min_observations:
+            return None
+
+        signal_type, votes = Counter(entry["signal_types"]).most_common(1)[0]
+        if votes / entry["observations"] < self.agreement:
+            return None
+
+        titles = [
+            str(e.get("title") or e.get("event_type") or "event")
+            for e in group["events"][:3]
+        ]
+        more = len(group["events"]) - len(titles)
+        if more > 0:
+            titles.append(f"{more} more")
+
+        return {
+            "area": group["area"],
+            "expected_effects": f"{entry['expected_effects']} ({len(group['events'])} event(s): {', '.join(titles)})",
+            "time_window": format_window(group["start"], group["end"]),
+            "signal_type": signal_type,
+            "confidence": "High" if entry["observations"] >= 5 else "Medium",
+            "source": "urban_forecast_rules",
+        }
+
+    def record(self, area, slot, forecast):
+        """Add a model forecast for an area and slot to the history"""
+        entry = self.areas.setdefault(area, {}).setdefault(
+            slot,
+            {"observations": 0, "signal_types": {}, "expected_effects": ""},
+        )
+        entry["observations"] += 1
+        signal_type = forecast["signal_type"]
+        entry["signal_types"][signal_type] = (
+            entry["signal_types"].get(signal_type, 0) + 1
+        )
+        entry["expected_effects"] = forecast["expected_effects"]
+        entry["last_seen"] = datetime.datetime.now().isoformat()
+
+    def learn(self, forecasts, groups):
+        """Record model forecasts against the event groups they cover"""
+        groups_by_area = defaultdict(list)
+        for group in groups:
+            groups_by_area[group["area"]].append(group)
+
+        # Each area and slot counts as at most one observation per run
+        seen = set()
+        for forecast in forecasts:
+            area = normalize_location({"area": forecast.get("area", "")})
+            for group in groups_by_area.get(area, []):
+                if (area, group["slot"]) not in seen:
+                    seen.add((area, group["slot"]))
+                    self.record(area, group["slot"], forecast)
+        return len(seen)
+
+    def load(self):
+        """Load the persisted history if there is one"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.areas = json.load(f)
+        except Exception as e:
+            print(f"❌ Error loading venue history {self.path}: {e}")
+
+    def save(self):
+        """Persist the history so it survives restarts"""
+        with atomic_write(self.path) as f:
+            json.dump(self.areas, f, indent=2, ensure_ascii=False)
@@ -3,6 +3,7 @@ import { motion } from 'framer-motion';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
 import { Progress } from '@/components/ui/progress';
+import { runAgentJob } from '@/lib/agentJobs';
 import { Play, CheckCircle, Loader2, Database, Zap, Upload } from 'lucide-react';
 
 interface AgentStep {
@@ -50,15 +51,7 @@ const AgentRunner = ({ onAlertsGenerated, onSuccess }: AgentRunnerProps) => {
 
         if (i === 1) {
           try {
-            const response = await fetch('http://localhost:5000/api/start-agent', {
-              method: 'POST',
-              headers: { 'Content-Type': 'application/json' }
-            });
-
-            const data = await response.json();
-            if (!response.ok || !data.success) {
-              throw new Error(data.message || 'Agent failed to run');
-            }
+            const data = await runAgentJob('/api/start-agent');
 
             setResult(data);
             onAlertsGenerated?.(); // Notify parent
@@ -3,6 +3,7 @@ import { motion } from 'framer-motion';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
 import { Progress } from '@/components/ui/progress';
+import { streamUrbanForecasts } from '@/lib/forecastStream';
 import { Play, CheckCircle, Loader2, Database, Zap, Upload, TrendingUp } from 'lucide-react';
 
 interface UrbanAgentStep {
@@ -22,6 +23,7 @@ const UrbanAgentRunner = ({ onForecastsGenerated, onSuccess }: UrbanAgentRunnerP
   const [currentStep, setCurrentStep] = useState(-1);
   const [result, setResult] = useState<any>(null);
   const [error, setError] = useState<string | null>(null);
+  const [streamedForecasts, setStreamedForecasts] = useState<any[]>([]);
   const [steps, setSteps] = useState<UrbanAgentStep[]>([
     { id: '1', name: 'Fetch Event Data', status: 'pending', icon: <Database className="h-4 w-4" /> },
     { id: '2', name: 'Generate Forecasts', status: 'pending', icon: <Zap className="h-4 w-4" /> },
@@ -34,6 +36,7 @@ const UrbanAgentRunner = ({ onForecastsGenerated, onSuccess }: UrbanAgentRunnerP
     setCurrentStep(-1);
     setError(null);
     setResult(null);
+    setStreamedForecasts([]);
     
     setSteps(prev => prev.map(step => ({ ...step, status: 'pending' })));
 
@@ -50,16 +53,10 @@ const UrbanAgentRunner = ({ onForecastsGenerated, onSuccess }: UrbanAgentRunnerP
 
         if (i === 1) {
           try {
-            const response = await fetch('http://localhost:5000/api/urban-forecast', {
-              method: 'POST',
-              headers: { 'Content-Type': 'application/json' }
+            const data = await streamUrbanForecasts((forecast) => {
+              setStreamedForecasts(prev => [...prev, forecast]);
             });
 
-            const data = await response.json();
-            if (!response.ok || !data.success) {
-              throw new Error(data.message || 'Urban forecast failed');
-            }
-
             setResult(data);
             onForecastsGenerated?.(); // Notify parent
           } catch (apiError: any) {
@@ -140,6 +137,22 @@ const UrbanAgentRunner = ({ onForecastsGenerated, onSuccess }: UrbanAgentRunnerP
         </motion.div>
       )}
 
+      {streamedForecasts.length > 0 && (
+        <div className="space-y-1">
+          {streamedForecasts.map((forecast) => (
+            <motion.div
+              key={forecast.id}
+              initial={{ opacity: 0, y: 5 }}
+              animate={{ opacity: 1, y: 0 }}
+              className="p-2 rounded border border-border/20 bg-background/30 text-xs"
+            >
+              <span className="font-medium">{forecast.area}</span>
+              <span className="text-muted-foreground"> — {forecast.expected_effects}</span>
+            </motion.div>
+          ))}
+        </div>
+      )}
+
       <div className="space-y-2">
         {steps.map((step, index) => (
           <motion.div
@@ -0,0 +1,34 @@
+export const AGENT_API_URL = 'http://localhost:5000';
+const POLL_INTERVAL_MS = 2000;
+
+// Queue an agent pipeline (e.g. /api/start-agent) and poll its job until it
+// finishes. Resolves with the pipeline result, rejects if the job fails.
+export async function runAgentJob(path: string): Promise<any> {
+  const response = await fetch(`${AGENT_API_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' }
+  });
+
+  const queued = await response.json();
+  if (!response.ok || !queued.success) {
+    throw new Error(queued.message || 'Failed to queue agent job');
+  }
+
+  while (true) {
+    await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+
+    const statusResponse = await fetch(`${AGENT_API_URL}/api/jobs/${queued.job_id}`);
+    const data = await statusResponse.json();
+    if (!statusResponse.ok || !data.success) {
+      throw new Error(data.message || 'Failed to fetch agent job status');
+    }
+
+    const { status, result } = data.job;
+    if (status === 'succeeded') {
+      return result;
+    }
+    if (status === 'failed') {
+      throw new Error(result?.message || 'Agent job failed');
+    }
+  }
+}
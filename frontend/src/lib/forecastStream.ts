@@ -0,0 +1,37 @@
+import { AGENT_API_URL } from '@/lib/agentJobs';
+
+// Queue urban forecast generation and follow its job over Server-Sent Events.
+// If a run is already in flight the agent joins this request onto it, so every
+// dashboard shares one generation. onForecast is called for each forecast as
+// soon as the agent has produced it; resolves with the final summary once the
+// batch is stored, rejects on an error event.
+export async function streamUrbanForecasts(onForecast: (forecast: any) => void): Promise<any> {
+  const response = await fetch(`${AGENT_API_URL}/api/urban-forecast`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' }
+  });
+
+  const queued = await response.json();
+  if (!response.ok || !queued.success) {
+    throw new Error(queued.message || 'Failed to queue urban forecast job');
+  }
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${AGENT_API_URL}/api/jobs/${queued.job_id}/events`);
+
+    source.addEventListener('forecast', (event) => {
+      onForecast(JSON.parse((event as MessageEvent).data));
+    });
+
+    source.addEventListener('done', (event) => {
+      source.close();
+      resolve(JSON.parse((event as MessageEvent).data));
+    });
+
+    source.addEventListener('error', (event) => {
+      source.close();
+      const data = (event as MessageEvent).data;
+      reject(new Error(data ? JSON.parse(data).message : 'Urban forecast stream failed'));
+    });
+  });
+}
@@ -8,10 +8,13 @@ from dotenv import load_dotenv
 import uuid
 import json
 import os
+import re
 import shutil
 import requests
 from typing import List, Dict, Any
 
+from spike_detector import SpikeDetector
+
 # Load environment variables
 load_dotenv()
 
@@ -47,6 +50,14 @@ REPORTS_FILE = "reports.json"
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Report volume per area and type; a sudden jump raises report priority and
+# is published to the "spikes" collection for the agent
+spike_detector = SpikeDetector(
+    path=os.getenv("SPIKE_STATE_PATH", "spike_state.json"),
+    bucket_minutes=int(os.getenv("SPIKE_BUCKET_MINUTES", "60")),
+    z_threshold=float(os.getenv("SPIKE_Z_THRESHOLD", "3")),
+)
+
 
 def save_report_to_firebase(data: Dict[Any, Any]) -> bool:
     """Save report to Firebase Realtime Database"""
@@ -123,6 +134,26 @@ def save_report(data):
         json.dump(reports[:50], f, indent=2)  # Keep latest 50 entries
 
 
+def publish_spikes(spikes: List[Dict[str, Any]]) -> None:
+    """Write current spikes to Firebase, keyed so key order is time order"""
+    updates = {}
+    for spike in spikes:
+        key = re.sub(
+            r"[.$#\[\]/\s]+",
+            "_",
+            f"{spike['bucket_start'][:13]}_{spike['area']}_{spike['type']}",
+        )
+        updates[key] = spike
+    try:
+        response = requests.patch(
+            f"{FIREBASE_DATABASE_URL}/spikes.json", json=updates, timeout=10
+        )
+        if response.status_code != 200:
+            print(f"❌ Failed to publish spikes: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Error publishing spikes: {e}")
+
+
 # 🔁 Submit report with image
 @app.post("/submit")
 async def submit_report(
@@ -150,13 +181,21 @@ async def submit_report(
             "title": title,
             "description": f"{description} (📍 {city}, {area})",
             "timestamp": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC"),
-            "priority": "medium",  # Could adjust based on context
             "location": location,
             "lat": lat,
             "lng": lng,
             "media": media_path,
         }
 
+        # Priority rises with unusual report volume for the area and type
+        new_item["priority"] = spike_detector.observe_record({**new_item, "area": area})
+        try:
+            spike_detector.save()
+        except Exception as e:
+            print(f"❌ Error saving spike state: {e}")
+        if new_item["priority"] == "high":
+            publish_spikes(spike_detector.spikes())
+
         # Save to Firebase Realtime Database (with JSON fallback)
         firebase_success = save_report_to_firebase(new_item)
 
@@ -174,6 +213,13 @@ async def submit_report(
         )
 
 
+# 📈 Current report volume spikes
+@app.get("/spikes")
+async def get_spikes():
+    spikes = spike_detector.spikes()
+    return {"status": "ok", "count": len(spikes), "items": spikes}
+
+
 # 🔎 Fetch feed
 @app.get("/feed")
 async def get_feed():
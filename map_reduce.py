@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from atomic_file import atomic_write
+from report_clusters import parse_timestamp
+
+
+def chunk_hash(label, records):
+    """Stable content hash of a chunk of records"""
+    content = json.dumps([label, records], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def chunk_records(records, chunk_size=40):
+    """
+    Split records into chunks of roughly `chunk_size` with content-defined
+    boundaries.
+
+    Records are put in time order and a chunk ends after any record whose
+    content hash is divisible by `chunk_size` (or when the chunk reaches
+    twice that size). Because boundaries depend on the records themselves
+    rather than their position, new records only change the chunk they
+    land in, and every other chunk hashes the same as on the previous run
+    so its cached summary is reused.
+    """
+    keyed = []
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        content = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+        timestamp = parse_timestamp(record)
+        keyed.append((timestamp.isoformat() if timestamp else "", content, record))
+    keyed.sort(key=lambda k: (k[0], k[1]))
+
+    min_size = max(1, chunk_size // 4)
+    chunks, current = [], []
+    for _, content, record in keyed:
+        current.append(record)
+        digest = int.from_bytes(hashlib.blake2b(content.encode()).digest()[:4], "big")
+        if len(current) >= 2 * chunk_size or (
+            len(current) >= min_size and digest % chunk_size == 0
+        ):
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class ChunkSummaryCache:
+    """
+    Bounded LRU cache of chunk summaries keyed by chunk hash, persisted to
+    a local JSON file between runs
+    """
+
+    def __init__(self, path="chunk_summaries.json", max_entries=2000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.load()
+
+    def get(self, key):
+        """Return the cached summaries for a chunk hash, or None"""
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, key, summaries):
+        """Cache a chunk's summaries, evicting the least recently used"""
+        with self.lock:
+            self.dirty = True
+            self.entries[key] = summaries
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def load(self):
+        """Load persisted summaries if there are any"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = OrderedDict(json.load(f))
+        except Exception as e:
+            print(f"❌ Error loading chunk summaries {self.path}: {e}")
+
+    def save(self):
+        """Persist the cache so it survives restarts"""
+        with self.lock:
+            if not self.dirty:
+                return
+            with atomic_write(self.path) as f:
+                json.dump(list(self.entries.items()), f, ensure_ascii=False)
+            self.dirty = False
+
+
+def summarize_chunks(chunks, summarize, cache, max_workers=4, fallback=None):
+    """
+    Summarize (label, records) chunks in parallel, skipping any whose
+    summary is already cached. `summarize(label, records)` returns a list
+    of summaries. Chunks it fails on use `fallback(label, records)` instead,
+    which is not cached so the chunk is retried next time.
+    Returns the summaries of every chunk, in chunk order.
+    """
+    keys = [chunk_hash(label, records) for label, records in chunks]
+    results = [cache.get(key) for key in keys]
+    todo = [i for i, result in enumerate(results) if result is None]
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {i: executor.submit(summarize, *chunks[i]) for i in todo}
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    print(f"❌ Error summarizing chunk of {chunks[i][0]}: {e}")
+                    results[i] = []
+                if results[i]:
+                    cache.put(keys[i], results[i])
+                elif fallback is not None:
+                    results[i] = fallback(*chunks[i])
+
+    return results
+
+
+def map_reduce_summaries(
+    data_by_collection,
+    summarize,
+    cache,
+    max_summaries=40,
+    chunk_size=40,
+    max_workers=4,
+    max_levels=3,
+    fallback=None,
+):
+    """
+    Hierarchically summarize several collections of records.
+
+    Map: each collection is chunked and every chunk summarized in parallel.
+    Reduce: while there are more than `max_summaries` partial summaries,
+    they are themselves chunked and summarized again, up to `max_levels`
+    levels. Returns the final list of summaries.
+    """
+    chunks = [
+        (collection, chunk)
+        for collection, records in data_by_collection.items()
+        for chunk in chunk_records(records, chunk_size)
+    ]
+    summaries = [
+        s
+        for result in summarize_chunks(chunks, summarize, cache, max_workers, fallback)
+        for s in result
+    ]
+
+    level = 1
+    while len(summaries) > max_summaries and level < max_levels:
+        label = f"summaries_level_{level}"
+        chunks = [
+            (label, summaries[i : i + chunk_size])
+            for i in range(0, len(summaries), chunk_size)
+        ]
+        summaries = [
+            s
+            for result in summarize_chunks(
+                chunks, summarize, cache, max_workers, fallback
+            )
+            for s in result
+        ]
+        level += 1
+
+    return summaries[:max_summaries]
@@ -0,0 +1,236 @@
+import datetime
+import re
+from collections import Counter
+
+# Canonical area names and the spellings that map to them. Anything that
+# only mentions the city itself is grouped under "Bengaluru (city-wide)".
+KNOWN_AREAS = {
+    "Outer Ring Road": ["outer ring road", "orr"],
+    "Koramangala": ["koramangala"],
+    "Whitefield": ["whitefield"],
+    "Indiranagar": ["indiranagar", "indira nagar"],
+    "MG Road": ["mg road", "m g road", "mahatma gandhi road"],
+    "Marathahalli": ["marathahalli"],
+    "Hebbal": ["hebbal"],
+    "BTM Layout": ["btm layout", "btm"],
+    "Jayanagar": ["jayanagar"],
+    "Malleshwaram": ["malleshwaram", "malleswaram"],
+    "Bellandur": ["bellandur"],
+    "Banashankari": ["banashankari"],
+    "Basavanagudi": ["basavanagudi"],
+    "Rajajinagar": ["rajajinagar"],
+    "Yelahanka": ["yelahanka"],
+    "Hosur Road": ["hosur road"],
+    "Electronic City": ["electronic city", "electronics city"],
+    "Shantinagar": ["shantinagar", "shanti nagar"],
+    "HSR Layout": ["hsr layout", "hsr"],
+    "JP Nagar": ["jp nagar", "j p nagar"],
+    "Silk Board": ["silk board"],
+    "Sarjapur Road": ["sarjapur road", "sarjapura road"],
+    "Bannerghatta Road": ["bannerghatta road"],
+    "Tumkur Road": ["tumkur road"],
+    "Mysore Road": ["mysore road", "mysuru road"],
+    "Old Airport Road": ["old airport road"],
+    "Kempegowda Airport": [
+        "kempegowda airport",
+        "kempegowda international airport",
+        "bengaluru airport",
+        "bangalore airport",
+    ],
+    "Majestic": ["majestic", "kempegowda bus station"],
+    "Chinnaswamy Stadium": ["chinnaswamy"],
+}
+CITY_WIDE = "Bengaluru (city-wide)"
+
+TYPE_KEYWORDS = {
+    "traffic": [
+        "traffic",
+        "jam",
+        "congestion",
+        "accident",
+        "roadblock",
+        "diversion",
+        "road closure",
+    ],
+    "flood": ["flood", "waterlogging", "water logging", "rain", "inundated"],
+    "outage": ["power cut", "outage", "blackout", "electricity", "no power"],
+    "water": ["water supply", "bwssb", "no water"],
+    "civic": ["garbage", "pothole", "footpath", "streetlight", "tree fall"],
+}
+
+# Timestamp fields in order of preference, and the formats they appear in
+TIME_FIELDS = [
+    "timestamp",
+    "start_time",
+    "time",
+    "date",
+    "created_at",
+    "logged_at",
+    "scraped_at",
+]
+TIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S UTC",
+    "%H:%M Hrs %d-%m-%Y",
+    "%d-%m-%Y",
+    "%B %d, %Y",
+    "%Y-%m-%d",
+]
+
+AREA_PATTERNS = [
+    (area, re.compile(r"\b(" + "|".join(map(re.escape, aliases)) + r")\b"))
+    for area, aliases in KNOWN_AREAS.items()
+]
+
+
+def record_text(record):
+    """Concatenate the human-readable text fields of a record"""
+    parts = [
+        record.get(field)
+        for field in ("title", "description", "location", "venue", "area")
+    ]
+    return " ".join(p for p in parts if isinstance(p, str))
+
+
+def normalize_location(record):
+    """Map a record to a canonical area name"""
+    text = record_text(record).lower()
+    for area, pattern in AREA_PATTERNS:
+        if pattern.search(text):
+            return area
+
+    # Fall back to the record's own location field if it names somewhere specific
+    for field in ("location", "venue", "area"):
+        value = record.get(field)
+        if isinstance(value, str) and value.strip():
+            value = " ".join(value.split()).title()
+            if value.lower() not in ("bengaluru", "bangalore", "none", "unknown"):
+                return value
+    return CITY_WIDE
+
+
+def classify_type(record, collection):
+    """Return a coarse report type for a record"""
+    if collection == "forecast":
+        return "event"
+
+    record_type = str(record.get("type", "")).lower()
+    if record_type in TYPE_KEYWORDS:
+        return record_type
+
+    text = record_text(record).lower()
+    for report_type, keywords in TYPE_KEYWORDS.items():
+        if any(keyword in text for keyword in keywords):
+            return report_type
+    return "general"
+
+
+def parse_time_value(value):
+    """Parse a timestamp string; aware only if the string names its zone"""
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    for fmt in TIME_FORMATS:
+        try:
+            parsed = datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt.endswith(" UTC"):
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed
+    return None
+
+
+def parse_timestamp(record, utc=False):
+    """
+    Return the record's timestamp, or None. By default this is the naive
+    wall-clock time as written. With utc=True it is an aware UTC datetime;
+    times written without a zone (scraped_at, BTP times) are local.
+    """
+    for field in TIME_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            continue
+        parsed = parse_time_value(value.strip())
+        if parsed is None:
+            continue
+        if utc:
+            return parsed.astimezone(datetime.timezone.utc)
+        return parsed.replace(tzinfo=None)
+    return None
+
+
+def time_bucket(timestamp, bucket_hours):
+    """Floor a timestamp to the start of its bucket"""
+    hour = timestamp.hour - timestamp.hour % bucket_hours
+    return timestamp.replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+def cluster_records(data_by_collection, bucket_hours=3, max_samples=2, limit=None):
+    """
+    Group records from several collections by area, type and time bucket.
+
+    Returns cluster summaries sorted by size, each with the record count,
+    per-collection counts, first/last seen times and a few representative
+    samples. These are compact enough to hand to the model instead of the
+    raw records.
+    """
+    clusters = {}
+
+    for collection, records in data_by_collection.items():
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+
+            location = normalize_location(record)
+            report_type = classify_type(record, collection)
+            timestamp = parse_timestamp(record)
+            bucket = (
+                time_bucket(timestamp, bucket_hours).isoformat()
+                if timestamp
+                else "undated"
+            )
+
+            key = (location, report_type, bucket)
+            cluster = clusters.get(key)
+            if cluster is None:
+                cluster = clusters[key] = {
+                    "location": location,
+                    "type": report_type,
+                    "time_bucket": bucket,
+                    "count": 0,
+                    "sources": Counter(),
+                    "first_seen": None,
+                    "last_seen": None,
+                    "samples": [],
+                }
+
+            cluster["count"] += 1
+            cluster["sources"][collection] += 1
+            if timestamp:
+                seen = timestamp.isoformat()
+                if cluster["first_seen"] is None or seen < cluster["first_seen"]:
+                    cluster["first_seen"] = seen
+                if cluster["last_seen"] is None or seen > cluster["last_seen"]:
+                    cluster["last_seen"] = seen
+
+            sample = record_text(record)[:200]
+            if (
+                sample
+                and len(cluster["samples"]) < max_samples
+                and sample not in cluster["samples"]
+            ):
+                cluster["samples"].append(sample)
+
+    summaries = sorted(
+        clusters.values(),
+        key=lambda c: (c["count"], c["last_seen"] or ""),
+        reverse=True,
+    )
+    for cluster in summaries:
+        cluster["sources"] = dict(cluster["sources"])
+        if cluster["first_seen"] is None:
+            del cluster["first_seen"]
+            del cluster["last_seen"]
+
+    return summaries[:limit]
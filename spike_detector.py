@@ -0,0 +1,255 @@
+import datetime
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from atomic_file import atomic_write
+from report_clusters import classify_type, normalize_location, parse_timestamp
+
+
+class SpikeDetector:
+    """
+    Per-area, per-type report volume counter with EWMA baselines.
+
+    Reports are counted into fixed time buckets. When a bucket closes, each
+    (area, type) series updates an exponentially weighted mean and variance
+    of its bucket counts; all series are updated at once as NumPy arrays.
+    The open bucket is scored against the baseline, and series whose count
+    is both large enough and several standard deviations above normal are
+    flagged as spikes. Fingerprints of the records already counted are kept
+    (and persisted) alongside the counters, so records fetched again after a
+    restart are not counted twice.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        bucket_minutes=60,
+        alpha=0.2,
+        z_threshold=3.0,
+        min_count=3,
+        warmup_buckets=3,
+        max_seen=20000,
+    ):
+        self.path = path
+        self.bucket_seconds = bucket_minutes * 60
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_count = min_count
+        self.warmup_buckets = warmup_buckets
+        self.max_seen = max_seen
+
+        self.keys = []  # row -> (area, type)
+        self.rows = {}  # (area, type) -> row
+        self.current = np.zeros(0)  # counts in the open bucket
+        self.mean = np.zeros(0)
+        self.var = np.zeros(0)
+        self.closed = np.zeros(0, dtype=np.int64)  # buckets seen per series
+        self.bucket = None  # index of the open bucket
+        self.total_closed = 0  # buckets closed since the detector started
+        self.seen = OrderedDict()  # fingerprints of records already counted
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+
+    def bucket_index(self, timestamp):
+        """
+        Index of the fixed-size time bucket a timestamp falls in. Naive
+        timestamps are taken as local time.
+        """
+        utc = timestamp.astimezone(datetime.timezone.utc)
+        return int(utc.timestamp() // self.bucket_seconds)
+
+    def row(self, key):
+        """Return the row for a series, growing the arrays if it is new"""
+        row = self.rows.get(key)
+        if row is not None:
+            return row
+
+        row = len(self.keys)
+        self.keys.append(key)
+        self.rows[key] = row
+        if row >= len(self.current):
+            size = max(16, 2 * len(self.current))
+            self.current = np.resize(self.current, size)
+            self.mean = np.resize(self.mean, size)
+            self.var = np.resize(self.var, size)
+            self.closed = np.resize(self.closed, size)
+            self.current[row:] = 0
+            self.mean[row:] = 0
+            self.var[row:] = 0
+            self.closed[row:] = 0
+        # A series first seen now had zero reports in every earlier bucket
+        self.closed[row] = self.total_closed
+        return row
+
+    def advance(self, bucket):
+        """Close buckets up to (not including) `bucket`, updating baselines"""
+        if self.bucket is None:
+            self.bucket = bucket
+            return
+        elapsed = bucket - self.bucket
+        if elapsed <= 0:
+            return
+
+        n = len(self.keys)
+        counts = self.current[:n]
+        # Buckets with no reports are zeros; after enough of them the
+        # baselines have decayed to nothing anyway
+        for step in range(min(elapsed, int(10 / self.alpha))):
+            if step == 1:
+                counts = np.zeros(n)
+            diff = counts - self.mean[:n]
+            self.mean[:n] += self.alpha * diff
+            self.var[:n] = (1 - self.alpha) * (self.var[:n] + self.alpha * diff**2)
+        self.closed[:n] += elapsed
+        self.total_closed += elapsed
+        self.current[:n] = 0
+        self.bucket = bucket
+
+    def observe(self, area, report_type, timestamp=None):
+        """
+        Count one report. Reports older than the open bucket are ignored.
+        Returns the priority of the report's series after counting it.
+        """
+        timestamp = timestamp or datetime.datetime.now(datetime.timezone.utc)
+        bucket = self.bucket_index(timestamp)
+        with self.lock:
+            self.advance(bucket)
+            if bucket < self.bucket:
+                return self._priority(self.rows.get((area, report_type)))
+            row = self.row((area, report_type))
+            self.current[row] += 1
+            return self._priority(row)
+
+    def mark_seen(self, fingerprint):
+        """Remember a record fingerprint; False if it was already counted"""
+        with self.lock:
+            if fingerprint in self.seen:
+                return False
+            self.seen[fingerprint] = None
+            while len(self.seen) > self.max_seen:
+                self.seen.popitem(last=False)
+            return True
+
+    def observe_record(self, record, collection=None):
+        """Count a scraped or submitted record by its area, type and time"""
+        return self.observe(
+            normalize_location(record),
+            classify_type(record, collection),
+            parse_timestamp(record, utc=True),
+        )
+
+    def zscores(self):
+        """Z-score of every series' open-bucket count against its baseline"""
+        n = len(self.keys)
+        # Counts are roughly Poisson, so the spread is at least sqrt(mean),
+        # and never below one report
+        std = np.sqrt(np.maximum(np.maximum(self.var[:n], self.mean[:n]), 1.0))
+        return (self.current[:n] - self.mean[:n]) / std
+
+    def flagged(self):
+        """Boolean mask of series currently spiking"""
+        n = len(self.keys)
+        return (
+            (self.closed[:n] >= self.warmup_buckets)
+            & (self.current[:n] >= self.min_count)
+            & (self.zscores() >= self.z_threshold)
+        )
+
+    def _priority(self, row):
+        """High for spiking series, medium when elevated, low otherwise"""
+        if row is None:
+            return "low"
+        z = self.zscores()[row]
+        if self.flagged()[row]:
+            return "high"
+        if z >= self.z_threshold / 2 and self.current[row] >= 2:
+            return "medium"
+        return "low"
+
+    def priority(self, area, report_type):
+        """Priority for a new report in an area and type"""
+        with self.lock:
+            return self._priority(self.rows.get((area, report_type)))
+
+    def spikes(self):
+        """Return the series currently spiking, most significant first"""
+        with self.lock:
+            if not self.keys:
+                return []
+            z = self.zscores()
+            rows = np.nonzero(self.flagged())[0]
+            # Naive UTC, like the cutoff the agent compares it against
+            bucket_start = (
+                datetime.datetime.fromtimestamp(
+                    self.bucket * self.bucket_seconds, datetime.timezone.utc
+                )
+                .replace(tzinfo=None)
+                .isoformat()
+            )
+            spikes = [
+                {
+                    "area": self.keys[row][0],
+                    "type": self.keys[row][1],
+                    "count": int(self.current[row]),
+                    "baseline": round(float(self.mean[row]), 2),
+                    "zscore": round(float(z[row]), 2),
+                    "priority": "high",
+                    "bucket_start": bucket_start,
+                }
+                for row in rows
+            ]
+        spikes.sort(key=lambda s: s["zscore"], reverse=True)
+        return spikes
+
+    def load(self):
+        """Load persisted counters if there are any"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"❌ Error loading spike state {self.path}: {e}")
+            return
+
+        if data.get("bucket_seconds") != self.bucket_seconds:
+            print("⚠️  Spike state was built with a different bucket size, rebuilding")
+            return
+        with self.lock:
+            for key, current, mean, var, closed in data.get("series", []):
+                row = self.row(tuple(key))
+                self.current[row] = current
+                self.mean[row] = mean
+                self.var[row] = var
+                self.closed[row] = closed
+            self.bucket = data.get("bucket")
+            self.total_closed = data.get("total_closed", 0)
+            self.seen = OrderedDict.fromkeys(data.get("seen", [])[-self.max_seen :])
+
+    def save(self):
+        """Persist the counters so baselines survive restarts"""
+        with self.lock:
+            n = len(self.keys)
+            data = {
+                "bucket_seconds": self.bucket_seconds,
+                "bucket": self.bucket,
+                "total_closed": self.total_closed,
+                "series": [
+                    [list(key), c, m, v, int(k)]
+                    for key, c, m, v, k in zip(
+                        self.keys,
+                        self.current[:n].tolist(),
+                        self.mean[:n].tolist(),
+                        self.var[:n].tolist(),
+                        self.closed[:n],
+                    )
+                ],
+                "seen": list(self.seen),
+            }
+            with atomic_write(self.path) as f:
+                json.dump(data, f)
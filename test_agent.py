@@ -0,0 +1,602 @@
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from collections import OrderedDict
+
+from alert_dedup import AlertLSHIndex
+from change_feed import DebouncedTrigger, FirebaseChangeFeed
+from event_index import IntervalTree, VenueHistory, group_events
+from map_reduce import ChunkSummaryCache, chunk_hash, chunk_records, summarize_chunks
+from report_clusters import cluster_records, parse_timestamp
+from spike_detector import SpikeDetector
+
+
+class FakeResponse:
+    def __init__(self, body=None, lines=()):
+        self.body = body
+        self.lines = lines
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Answers the newest-key read, then replays one event stream"""
+
+    def __init__(self, newest, events):
+        self.newest = newest
+        self.events = events
+        self.calls = []
+
+    def get(self, url, params=None, stream=False, **kwargs):
+        self.calls.append(params)
+        if not stream:
+            return FakeResponse(self.newest)
+        lines = []
+        for event, payload in self.events:
+            lines += [f"event: {event}", f"data: {json.dumps(payload)}", ""]
+        return FakeResponse(lines=lines)
+
+
+def replay(newest, events):
+    received = []
+    feed = FirebaseChangeFeed(
+        "https://db.example", ["reports"], lambda c, r: received.extend(r)
+    )
+    feed.session = FakeSession(newest, events)
+    feed.stream("reports")
+    return feed, received
+
+
+def test_change_feed_reports_every_child_of_a_multi_child_write():
+    feed, received = replay(
+        {"k2": {"n": 2}},
+        [
+            # Snapshot from startAt includes the last known record
+            ("put", {"path": "/", "data": {"k2": {"n": 2}}}),
+            ("patch", {"path": "/", "data": {"k3": {"n": 3}, "k4": {"n": 4}}}),
+            ("put", {"path": "/k5", "data": {"n": 5}}),
+            ("put", {"path": "/k5/status", "data": "closed"}),
+            ("keep-alive", None),
+        ],
+    )
+    assert [r["n"] for r in received] == [3, 4, 5]
+    assert feed.last_keys["reports"] == "k5"
+
+    lookup, stream = feed.session.calls
+    assert lookup["limitToLast"] == 1
+    assert stream["startAt"] == '"k2"' and "limitToLast" not in stream
+
+
+def test_change_feed_on_an_empty_collection_reports_the_first_snapshot():
+    feed, received = replay(
+        None, [("put", {"path": "/", "data": {"a": {"n": 1}, "b": {"n": 2}}})]
+    )
+    assert [r["n"] for r in received] == [1, 2]
+    assert feed.session.calls[1]["startAt"] == '""'
+
+
+def test_debounced_trigger_waits_for_quiet_or_max_wait():
+    trigger = DebouncedTrigger(
+        min_records=5,
+        debounce_seconds=60,
+        max_wait_seconds=300,
+        min_interval_seconds=900,
+    )
+    trigger.add(3, now=0)
+    assert not trigger.due(now=100)  # too few records
+    trigger.add(2, now=100)
+    assert not trigger.due(now=159)
+    assert trigger.due(now=160)  # quiet for the debounce period
+
+    # A steady trickle never goes quiet, so max wait forces the run
+    trigger.mark_run(now=160)
+    for t in range(1100, 1400, 30):
+        trigger.add(1, now=t)
+        assert not trigger.due(now=t)
+    trigger.add(1, now=1400)
+    assert trigger.due(now=1400)
+
+
+def test_debounced_trigger_urgent_records_skip_debounce_not_min_interval():
+    trigger = DebouncedTrigger(min_records=5, min_interval_seconds=900)
+    trigger.add(1, now=0, urgent=True)
+    assert trigger.due(now=0)
+    trigger.mark_run(now=0)
+    assert not trigger.due(now=1)  # nothing pending
+
+    trigger.add(1, now=10, urgent=True)
+    assert not trigger.due(now=899)
+    assert trigger.due(now=900)
+
+
+def test_alert_index_matches_near_duplicates_and_persists(tmp_path):
+    path = str(tmp_path / "alerts.json")
+    now = datetime.datetime.now().isoformat()
+    index = AlertLSHIndex(path)
+    index.add("a1", "Heavy traffic on Outer Ring Road near Marathahalli bridge", now)
+    index.add("a2", "Water supply disrupted in Jayanagar 4th block until Monday", now)
+
+    alert_id, similarity = index.find_duplicate(
+        "Heavy traffic on the Outer Ring Road near Marathahalli bridge!"
+    )
+    assert alert_id == "a1" and similarity >= index.threshold
+    assert index.find_duplicate("Metro Purple Line services resume")[0] is None
+
+    index.save()
+    reloaded = AlertLSHIndex(path)
+    assert reloaded.loaded and len(reloaded) == 2
+    assert (
+        reloaded.find_duplicate("water supply disrupted in jayanagar 4th block")[0]
+        == "a2"
+    )
+
+
+def test_alert_index_forgets_alerts_outside_the_window(tmp_path):
+    index = AlertLSHIndex(str(tmp_path / "alerts.json"), window_hours=1)
+    old = (datetime.datetime.now() - datetime.timedelta(hours=2)).isoformat()
+    index.add("old", "Tree fall blocks Hosur Road near Silk Board", old)
+    assert index.prune() == 1
+    assert (
+        index.find_duplicate("Tree fall blocks Hosur Road near Silk Board")[0] is None
+    )
+
+
+def test_cluster_records_keys_by_area_type_and_time_bucket():
+    data = {
+        "btp_traffic_news": [
+            {"title": "Traffic jam at Silk Board", "timestamp": "2025-07-01T09:10:00"},
+            {
+                "title": "Slow traffic near silk board",
+                "timestamp": "2025-07-01T11:50:00",
+            },
+            # Same area and type, next three-hour bucket
+            {"title": "Silk Board traffic jam", "timestamp": "2025-07-01T12:05:00"},
+        ],
+        "reddit_reports": [
+            {
+                "title": "Traffic crawling at Silk Board",
+                "timestamp": "2025-07-01T10:00:00Z",
+            },
+            {
+                "title": "Flooding at Silk Board junction",
+                "timestamp": "2025-07-01T10:00:00",
+            },
+            {"title": "Power cut in HSR Layout"},
+            "not a record",
+        ],
+    }
+    clusters = cluster_records(data, bucket_hours=3)
+    keys = [(c["location"], c["type"], c["time_bucket"], c["count"]) for c in clusters]
+
+    assert keys[0] == ("Silk Board", "traffic", "2025-07-01T09:00:00", 3)
+    assert clusters[0]["sources"] == {"btp_traffic_news": 2, "reddit_reports": 1}
+    assert clusters[0]["first_seen"] == "2025-07-01T09:10:00"
+    assert clusters[0]["last_seen"] == "2025-07-01T11:50:00"
+    assert ("Silk Board", "traffic", "2025-07-01T12:00:00", 1) in keys
+    assert ("HSR Layout", "outage", "undated", 1) in keys
+    assert len(clusters) == 4
+    assert len(cluster_records(data, limit=2)) == 2
+
+
+def test_parse_timestamp_normalizes_zones_only_when_asked():
+    aware = {"timestamp": "2025-07-01 09:00:00 UTC"}
+    assert parse_timestamp(aware) == datetime.datetime(2025, 7, 1, 9, 0)
+    assert parse_timestamp(aware, utc=True) == datetime.datetime(
+        2025, 7, 1, 9, 0, tzinfo=datetime.timezone.utc
+    )
+    local = {"scraped_at": "2025-07-01T09:00:00"}
+    assert parse_timestamp(local, utc=True) == datetime.datetime(
+        2025, 7, 1, 9, 0
+    ).astimezone(datetime.timezone.utc)
+    assert parse_timestamp({"date": "July 1, 2025"}).day == 1
+    assert parse_timestamp({"date": "soon"}) is None
+
+
+def test_interval_tree_finds_every_overlapping_interval():
+    intervals = [
+        (s, s + length, f"{s}+{length}")
+        for s in range(0, 100, 7)
+        for length in (1, 5, 30)
+    ]
+    tree = IntervalTree(intervals)
+    for start, end in [(0, 0), (10, 12), (50, 90), (99, 200), (-5, -1)]:
+        expected = {v for s, e, v in intervals if s <= end and e >= start}
+        assert {v for _, _, v in tree.overlapping(start, end)} == expected
+
+
+def test_group_events_merges_overlaps_within_an_area():
+    events = [
+        {
+            "title": "Concert",
+            "venue": "Palace Grounds Hebbal",
+            "start_time": "2025-07-05T18:00:00",
+            "end_time": "2025-07-05T22:00:00",
+        },
+        {"title": "Food fest", "venue": "Hebbal", "start_time": "2025-07-05T21:00:00"},
+        # Same time, different area
+        {
+            "title": "Marathon",
+            "venue": "Whitefield",
+            "start_time": "2025-07-05T19:00:00",
+        },
+        # Same area, no overlap
+        {"title": "Expo", "venue": "Hebbal", "start_time": "2025-07-06T10:00:00"},
+        {"title": "Meetup", "venue": "Hebbal"},
+    ]
+    groups = group_events(events)
+    summary = [
+        (g["area"], g["slot"], [e["title"] for e in g["events"]]) for g in groups
+    ]
+    assert summary == [
+        ("Hebbal", "weekend_evening", ["Concert", "Food fest"]),
+        ("Whitefield", "weekend_evening", ["Marathon"]),
+        ("Hebbal", "weekend_morning", ["Expo"]),
+        ("Hebbal", "undated", ["Meetup"]),
+    ]
+    assert groups[0]["end"] == datetime.datetime(2025, 7, 6, 0, 0)
+
+
+def test_venue_history_predicts_only_after_consistent_forecasts(tmp_path):
+    path = str(tmp_path / "venues.json")
+    history = VenueHistory(path, min_observations=2, agreement=0.66)
+    group = group_events(
+        [{"title": "Match", "venue": "MG Road", "start_time": "2025-07-05T18:00:00"}]
+    )[0]
+
+    def forecast(signal_type):
+        return {
+            "area": "MG Road",
+            "signal_type": signal_type,
+            "expected_effects": "Heavy traffic",
+        }
+
+    assert history.learn([forecast("traffic")], [group]) == 1
+    assert history.predict(group) is None  # one observation is not enough
+
+    # Each area and slot counts once per run, so "crowd" is not recorded
+    history.learn([forecast("traffic"), forecast("crowd")], [group])
+    prediction = history.predict(group)
+    assert prediction["signal_type"] == "traffic"
+    assert prediction["source"] == "urban_forecast_rules"
+    assert prediction["time_window"] == "6:00 PM - 9:00 PM"
+
+    # Disagreeing runs bring agreement below the threshold
+    history.learn([forecast("crowd")], [group])
+    assert history.predict(group)["signal_type"] == "traffic"  # 2 of 3
+    history.learn([forecast("crowd")], [group])
+    assert history.predict(group) is None
+
+    history.save()
+    assert VenueHistory(path).areas == history.areas
+
+
+def report(n):
+    minute = datetime.datetime(2025, 7, 1) + datetime.timedelta(minutes=n)
+    return {"title": f"Report {n}", "timestamp": minute.isoformat()}
+
+
+def test_chunk_boundaries_survive_new_records():
+    records = [report(n) for n in range(400)]
+    before = {chunk_hash("r", c) for c in chunk_records(records, chunk_size=20)}
+
+    # A record landing in the middle only changes the chunk it lands in,
+    # plus the next one when that chunk had been cut at the size cap
+    inserted = records[:200] + [{**report(200), "title": "Late report"}] + records[200:]
+    after = [chunk_hash("r", c) for c in chunk_records(inserted, chunk_size=20)]
+    assert len(before) > 5
+    assert len(before - set(after)) <= 2
+    assert len(set(after) - before) <= 2
+
+    # Input order does not matter, and sizes stay bounded
+    chunks = chunk_records(list(reversed(records)), chunk_size=20)
+    assert {chunk_hash("r", c) for c in chunks} == before
+    assert all(len(c) <= 40 for c in chunks)
+
+
+def test_summarize_chunks_reuses_cached_summaries(tmp_path):
+    path = str(tmp_path / "chunks.json")
+    calls = []
+
+    def summarize(label, records):
+        calls.append(records[0]["title"])
+        if records[0]["title"] == "Report 0":
+            raise RuntimeError("model unavailable")
+        return [f"{label}: {len(records)} reports"]
+
+    chunks = [("r", [report(n)]) for n in range(3)]
+    cache = ChunkSummaryCache(path)
+    results = summarize_chunks(chunks, summarize, cache, fallback=lambda l, r: ["raw"])
+    assert results == [["raw"], ["r: 1 reports"], ["r: 1 reports"]]
+    cache.save()
+
+    # After a restart only the chunk that failed is summarized again
+    calls.clear()
+    summarize_chunks(
+        chunks, summarize, ChunkSummaryCache(path), fallback=lambda l, r: []
+    )
+    assert calls == ["Report 0"]
+
+
+HOUR = datetime.timedelta(hours=1)
+T0 = datetime.datetime(2025, 7, 1, tzinfo=datetime.timezone.utc)
+
+
+def test_spike_detector_flags_series_far_above_their_baseline():
+    detector = SpikeDetector(min_count=3, warmup_buckets=3)
+    for hour in range(6):
+        detector.observe("Hebbal", "traffic", T0 + hour * HOUR)
+        detector.observe("Whitefield", "traffic", T0 + hour * HOUR)
+    assert detector.spikes() == []
+
+    now = T0 + 6 * HOUR
+    detector.observe("Whitefield", "traffic", now)
+    priorities = [detector.observe("Hebbal", "traffic", now) for _ in range(6)]
+    assert priorities[-1] == "high"
+
+    spikes = detector.spikes()
+    assert [(s["area"], s["count"]) for s in spikes] == [("Hebbal", 6)]
+    assert spikes[0]["zscore"] >= detector.z_threshold
+    assert spikes[0]["bucket_start"] == "2025-07-01T06:00:00"
+    assert detector.priority("Whitefield", "traffic") == "low"
+
+
+def test_spike_detector_buckets_utc_and_local_times_together():
+    detector = SpikeDetector()
+    utc = {"title": "Jam at Hebbal", "timestamp": "2025-07-01T09:30:00Z"}
+    local = {
+        "title": "Traffic jam at Hebbal",
+        "scraped_at": (T0 + 9.5 * HOUR).astimezone().replace(tzinfo=None).isoformat(),
+    }
+    detector.observe_record(utc)
+    detector.observe_record(local)
+    assert detector.bucket == detector.bucket_index(T0 + 9 * HOUR)
+    assert int(detector.current[detector.rows[("Hebbal", "traffic")]]) == 2
+
+
+def test_spike_detector_reload_does_not_count_records_twice(tmp_path):
+    path = str(tmp_path / "spikes.json")
+    detector = SpikeDetector(path)
+    assert detector.mark_seen("fp1")
+    detector.observe("Hebbal", "traffic", T0)
+    detector.save()
+
+    reloaded = SpikeDetector(path)
+    # The record fetched again after a restart was already counted
+    assert not reloaded.mark_seen("fp1")
+    assert reloaded.mark_seen("fp2")
+    assert reloaded.bucket == detector.bucket
+    assert int(reloaded.current[reloaded.rows[("Hebbal", "traffic")]]) == 1
+
+
+AGENT_STATE_FILES = {
+    "ALERT_INDEX_PATH": "alert_index.json",
+    "VENUE_HISTORY_PATH": "venue_history.json",
+    "CHUNK_CACHE_PATH": "chunk_summaries.json",
+    "AGENT_SPIKE_STATE_PATH": "agent_spike_state.json",
+    "AGENT_METRICS_LOG": "agent_metrics.jsonl",
+}
+
+
+@pytest.fixture(scope="session")
+def agent(tmp_path_factory):
+    """The agent module, with its state files kept out of the working tree"""
+    state = tmp_path_factory.mktemp("agent_state")
+    for var, name in AGENT_STATE_FILES.items():
+        os.environ[var] = str(state / name)
+    import agent
+
+    return agent
+
+
+def wait_for_job(agent, job_id):
+    """Follow a job's events until it finishes, then return its record"""
+    for _ in agent.iter_job_events(job_id):
+        pass
+    return agent.get_job(job_id)
+
+
+def test_concurrent_submissions_share_one_job(agent, monkeypatch):
+    release = threading.Event()
+    runs = []
+
+    def pipeline():
+        runs.append(1)
+        release.wait(5)
+        return {"success": True, "runs": len(runs)}
+
+    monkeypatch.setitem(agent.PIPELINES, "coalesce_test", pipeline)
+    first, coalesced = agent.submit_job("coalesce_test")
+    assert not coalesced
+    second, coalesced = agent.submit_job("coalesce_test")
+    assert coalesced and second["job_id"] == first["job_id"]
+    assert agent.queue_job("coalesce_test")["coalesced"]
+    assert agent.get_job(first["job_id"])["subscribers"] == 3
+
+    release.set()
+    job = wait_for_job(agent, first["job_id"])
+    assert job["status"] == "succeeded" and job["result"] == {
+        "success": True,
+        "runs": 1,
+    }
+
+    # Once finished, the next submission starts a fresh run
+    third, coalesced = agent.submit_job("coalesce_test")
+    assert not coalesced and third["job_id"] != first["job_id"]
+    assert wait_for_job(agent, third["job_id"])["result"]["runs"] == 2
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel, playing back scripted outcomes"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+
+    def __call__(self, **kwargs):
+        return self
+
+    def generate_content(self, prompt, request_options=None):
+        self.timeouts.append(request_options["timeout"])
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, float):
+            # A slow request, cut off by its own timeout
+            time.sleep(min(outcome, request_options["timeout"]))
+            raise TimeoutError("request timed out")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return type("Response", (), {"text": outcome, "usage_metadata": None})()
+
+
+@pytest.fixture
+def fake_model(agent, monkeypatch):
+    monkeypatch.setattr(agent, "GEMINI_HEDGE", False)
+    monkeypatch.setattr(agent, "GEMINI_BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(agent, "GEMINI_MAX_ATTEMPTS", 3)
+
+    def install(*outcomes):
+        model = FakeModel(outcomes)
+        monkeypatch.setattr(agent.genai, "GenerativeModel", model)
+        return model
+
+    return install
+
+
+def test_call_gemini_retries_transient_errors_only(agent, fake_model):
+    model = fake_model(agent.google_exceptions.ServiceUnavailable("busy"), "[]")
+    assert agent.call_gemini("prompt", deadline_seconds=5) == "[]"
+    assert len(model.timeouts) == 2
+    assert all(0 < t <= 5 for t in model.timeouts)
+
+    model = fake_model(ValueError("bad request"), "[]")
+    with pytest.raises(agent.GeminiCallError):
+        agent.call_gemini("prompt", deadline_seconds=5)
+    assert len(model.timeouts) == 1
+
+
+def test_call_gemini_gives_up_at_its_deadline(agent, fake_model):
+    model = fake_model(10.0, 10.0, 10.0)
+    start = time.perf_counter()
+    with pytest.raises(agent.GeminiCallError):
+        agent.call_gemini("prompt", deadline_seconds=0.3)
+    assert time.perf_counter() - start < 2
+    assert model.timeouts[0] <= 0.3
+
+
+def test_gemini_max_attempts_is_at_least_one(agent):
+    # Depends on `agent` so the child process uses the temporary state files
+    code = "import agent; print(agent.GEMINI_MAX_ATTEMPTS)"
+    env = {**os.environ, "GEMINI_MAX_ATTEMPTS": "0"}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "1"
+
+
+@pytest.fixture
+def asgi(agent, monkeypatch):
+    import agent_asgi
+
+    monkeypatch.setattr(agent, "read_cache", OrderedDict())
+    return agent_asgi
+
+
+def test_asgi_alerts_page_by_created_at_and_cache_reads(asgi, monkeypatch):
+    alerts = {
+        f"a{n}": {"title": f"Alert {n}", "created_at": f"2025-07-01T0{n}:00:00"}
+        for n in range(5)
+    }
+    queries = []
+
+    async def query_by_created_at(collection, params):
+        queries.append((collection, params))
+        return alerts
+
+    monkeypatch.setattr(asgi, "query_by_created_at", query_by_created_at)
+    with TestClient(asgi.app) as client:
+        page = client.get("/api/alerts", params={"limit": 2}).json()
+        assert [a["title"] for a in page["alerts"]] == ["Alert 4", "Alert 3"]
+        assert page["next_cursor"] == "2025-07-01T03:00:00"
+
+        older = client.get(
+            "/api/alerts", params={"limit": 2, "before": page["next_cursor"]}
+        ).json()
+        assert [a["title"] for a in older["alerts"]] == ["Alert 2", "Alert 1"]
+        assert queries[1][1]["endAt"] == '"2025-07-01T03:00:00"'
+
+        # The first page is served from the read cache
+        assert client.get("/api/alerts", params={"limit": 2}).json() == page
+        assert len(queries) == 2
+
+        # Out-of-range page sizes are clamped
+        client.get("/api/alerts", params={"limit": 0})
+        assert queries[-1][1]["limitToLast"] == 1
+
+
+def test_asgi_job_events_stream_to_every_subscriber(agent, asgi, monkeypatch):
+    release = threading.Event()
+
+    def pipeline():
+        agent.publish_job_event("status", {"events_analyzed": 2})
+        release.wait(5)
+        agent.publish_job_event("forecast", {"area": "Hebbal"})
+        return {"success": True, "forecasts_generated": 1}
+
+    monkeypatch.setitem(agent.PIPELINES, "events_test", pipeline)
+    job, _ = agent.submit_job("events_test")
+    url = f"/api/jobs/{job['job_id']}/events"
+
+    with TestClient(asgi.app) as client:
+        assert client.get("/api/jobs/missing/events").status_code == 404
+        threads = threading.active_count()
+        bodies = []
+
+        def follow():
+            with client.stream("GET", url) as response:
+                bodies.append("".join(response.iter_text()))
+
+        followers = [threading.Thread(target=follow) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.2)
+        # Subscribers wait on the event loop, not on threads of their own
+        assert threading.active_count() <= threads + len(followers)
+        release.set()
+        for follower in followers:
+            follower.join(5)
+
+    assert len(bodies) == 3
+    for body in bodies:
+        events = [
+            line[len("event: ") :]
+            for line in body.splitlines()
+            if line.startswith("event: ")
+        ]
+        assert events == ["status", "forecast", "done"]
+        assert '"area": "Hebbal"' in body
+    assert job["job_id"] not in agent.job_listeners